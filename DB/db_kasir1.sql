@@ -44,6 +44,24 @@ INSERT INTO `google_users` (`id`, `email`, `verified`, `created_at`) VALUES
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `history_archive`
+--
+
+CREATE TABLE `history_archive` (
+  `month` char(7) NOT NULL,
+  `status` varchar(10) NOT NULL,
+  `parts` int(11) NOT NULL DEFAULT 0,
+  `last_id` int(11) NOT NULL DEFAULT 0,
+  `row_count` int(11) DEFAULT NULL,
+  `total_amount` decimal(14,2) DEFAULT NULL,
+  `min_id` int(11) DEFAULT NULL,
+  `max_id` int(11) DEFAULT NULL,
+  `updated_at` datetime NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `produk_biasa`
 --
@@ -156,11 +174,30 @@ INSERT INTO `users` (`id`, `google_user_id`, `username`, `email`, `whatsapp`, `p
 ALTER TABLE `google_users`
   ADD PRIMARY KEY (`id`);
 
+--
+-- Indexes for table `history_archive`
+--
+ALTER TABLE `history_archive`
+  ADD PRIMARY KEY (`month`);
+
+--
+-- Indexes for table `produk_biasa`
+--
+ALTER TABLE `produk_biasa`
+  ADD PRIMARY KEY (`no_SKU`),
+  ADD KEY `idx_expired_date` (`expired_date`),
+  ADD KEY `idx_name_product` (`Name_product`),
+  ADD KEY `idx_price` (`Price`),
+  ADD KEY `idx_stok` (`stok`);
+
 --
 -- Indexes for table `produk_lelang`
 --
 ALTER TABLE `produk_lelang`
-  ADD PRIMARY KEY (`no_SKU`);
+  ADD PRIMARY KEY (`no_SKU`),
+  ADD KEY `idx_name_product` (`Name_product`),
+  ADD KEY `idx_price` (`Price`),
+  ADD KEY `idx_expired_date` (`expired_date`);
 
 --
 -- Indexes for table `transaction_history`
@@ -0,0 +1,85 @@
+-- Skema db_kasir1 untuk backend SQLite (JUSTCANI_DB_BACKEND=sqlite).
+-- Struktur sama dengan db_kasir1.sql + migrations; dijalankan otomatis oleh
+-- db_backend.py saat file database baru dibuat.
+--
+-- Catatan perbedaan dengan MySQL:
+--   * COLLATE NOCASE menggantikan utf8mb4_general_ci (perbandingan & urutan teks)
+--   * INTEGER PRIMARY KEY = rowid, jadi index sekunder sudah berisi no_SKU
+--   * DATE/DATETIME/TIMESTAMP/DECIMAL dikonversi ke tipe Python oleh db_backend.py
+--   * Default waktu memakai jam lokal seperti current_timestamp() MySQL
+
+CREATE TABLE IF NOT EXISTS google_users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email VARCHAR(100) NOT NULL,
+  verified VARCHAR(10) NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS produk_biasa (
+  no_SKU INTEGER PRIMARY KEY,
+  Name_product VARCHAR(100) NOT NULL COLLATE NOCASE,
+  expired_date DATE NOT NULL,
+  Price INTEGER NOT NULL,
+  stok INTEGER NOT NULL,
+  barcode_image TEXT DEFAULT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_produk_biasa_expired_date ON produk_biasa (expired_date);
+CREATE INDEX IF NOT EXISTS idx_produk_biasa_name_product ON produk_biasa (Name_product);
+CREATE INDEX IF NOT EXISTS idx_produk_biasa_price ON produk_biasa (Price);
+CREATE INDEX IF NOT EXISTS idx_produk_biasa_stok ON produk_biasa (stok);
+
+CREATE TABLE IF NOT EXISTS produk_lelang (
+  no_SKU INTEGER PRIMARY KEY AUTOINCREMENT,
+  Name_product VARCHAR(100) NOT NULL COLLATE NOCASE,
+  expired_date DATETIME NOT NULL,
+  Price INTEGER NOT NULL,
+  barcode_image TEXT DEFAULT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_produk_lelang_name_product ON produk_lelang (Name_product);
+CREATE INDEX IF NOT EXISTS idx_produk_lelang_price ON produk_lelang (Price);
+CREATE INDEX IF NOT EXISTS idx_produk_lelang_expired_date ON produk_lelang (expired_date);
+
+CREATE TABLE IF NOT EXISTS users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  google_user_id INTEGER DEFAULT NULL UNIQUE,
+  username VARCHAR(100) NOT NULL COLLATE NOCASE,
+  email VARCHAR(100) NOT NULL DEFAULT '' COLLATE NOCASE,
+  whatsapp VARCHAR(20) DEFAULT NULL,
+  profile_pic VARCHAR(255) DEFAULT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  role TEXT NOT NULL CHECK (role IN ('admin', 'kasir', 'staff', '')),
+  created_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS email_unique ON users (email);
+
+CREATE TABLE IF NOT EXISTS transaction_history (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  transaction_id VARCHAR(20) NOT NULL UNIQUE,
+  transaction_date DATETIME DEFAULT (datetime('now', 'localtime')),
+  user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+  username VARCHAR(100) NOT NULL COLLATE NOCASE,
+  total_amount DECIMAL(12,2) NOT NULL,
+  transaction_type TEXT NOT NULL CHECK (transaction_type IN ('biasa', 'lelang')),
+  payment_method VARCHAR(50) DEFAULT 'cash',
+  items_count INTEGER NOT NULL,
+  details TEXT DEFAULT NULL CHECK (details IS NULL OR json_valid(details))
+);
+
+CREATE INDEX IF NOT EXISTS idx_transaction_user_id ON transaction_history (user_id);
+CREATE INDEX IF NOT EXISTS idx_transaction_type ON transaction_history (transaction_type);
+CREATE INDEX IF NOT EXISTS idx_transaction_date ON transaction_history (transaction_date);
+
+CREATE TABLE IF NOT EXISTS history_archive (
+  month CHAR(7) PRIMARY KEY,
+  status VARCHAR(10) NOT NULL,
+  parts INTEGER NOT NULL DEFAULT 0,
+  last_id INTEGER NOT NULL DEFAULT 0,
+  row_count INTEGER DEFAULT NULL,
+  total_amount DECIMAL(14,2) DEFAULT NULL,
+  min_id INTEGER DEFAULT NULL,
+  max_id INTEGER DEFAULT NULL,
+  updated_at DATETIME NOT NULL
+);
@@ -0,0 +1,6 @@
+-- Import massal pakai INSERT ... ON DUPLICATE KEY UPDATE, jadi no_SKU harus unik.
+-- Cek dulu duplikat sebelum menjalankan:
+--   SELECT no_SKU, COUNT(*) FROM produk_biasa GROUP BY no_SKU HAVING COUNT(*) > 1;
+
+ALTER TABLE `produk_biasa`
+  ADD PRIMARY KEY (`no_SKU`);
@@ -0,0 +1,4 @@
+-- Sweeper expired mencari kandidat lewat expired_date, urut (expired_date, no_SKU).
+
+ALTER TABLE `produk_biasa`
+  ADD KEY `idx_expired_date` (`expired_date`);
@@ -0,0 +1,13 @@
+-- Listing produk (/api/products) sort per kolom dengan keyset (kolom, no_SKU).
+-- InnoDB menyimpan primary key di tiap secondary index, jadi index satu kolom
+-- sudah cukup untuk ORDER BY kolom, no_SKU.
+
+ALTER TABLE `produk_biasa`
+  ADD KEY `idx_name_product` (`Name_product`),
+  ADD KEY `idx_price` (`Price`),
+  ADD KEY `idx_stok` (`stok`);
+
+ALTER TABLE `produk_lelang`
+  ADD KEY `idx_name_product` (`Name_product`),
+  ADD KEY `idx_price` (`Price`),
+  ADD KEY `idx_expired_date` (`expired_date`);
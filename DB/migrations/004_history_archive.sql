@@ -0,0 +1,16 @@
+-- Katalog arsip transaction_history per bulan (history_archive.py).
+-- Bulan berstatus 'archived' sudah dihapus dari transaction_history dan dibaca
+-- dari file arsip; 'exporting' berarti ekspor chunk masih berjalan / bisa dilanjutkan.
+
+CREATE TABLE `history_archive` (
+  `month` char(7) NOT NULL,
+  `status` varchar(10) NOT NULL,
+  `parts` int(11) NOT NULL DEFAULT 0,
+  `last_id` int(11) NOT NULL DEFAULT 0,
+  `row_count` int(11) DEFAULT NULL,
+  `total_amount` decimal(14,2) DEFAULT NULL,
+  `min_id` int(11) DEFAULT NULL,
+  `max_id` int(11) DEFAULT NULL,
+  `updated_at` datetime NOT NULL,
+  PRIMARY KEY (`month`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import tasks
+
+# flock hanya ada di Unix; tanpa itu batas antar worker gunicorn tidak berlaku
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:
+    FLOCK_AVAILABLE = False
+
+# ============================================
+# ADMISSION CONTROL (PRIORITAS REQUEST)
+# ============================================
+# Laporan bulanan atau beberapa dashboard yang polling /api/stats memakai worker
+# dan koneksi DB yang sama dengan checkout. Setiap endpoint masuk satu kelas
+# (app.py ADMISSION_CLASSES), urut prioritas:
+#
+#   checkout > scan (scan/search) > report (statistik, laporan) > batch (barcode, import)
+#
+# Per kelas ada batas request bersamaan dan lama antri maksimal. Kelas rendah juga
+# hanya boleh masuk selama slot proses yang terpakai < share * ADMISSION_SLOTS, dan
+# tidak boleh menyalip kelas lebih tinggi yang sedang antri: slot terakhir selalu
+# tersisa untuk checkout. Lewat batas antri, request ditolak cepat dengan
+# 503 + Retry-After, bukan ikut menumpuk.
+#
+# Batas di atas per proses (worker thread). Kelas `shared` juga dibatasi antar worker
+# gunicorn lewat flock di file slot (ADMISSION_DIR): laporan tidak bisa memakai
+# semua worker sync sekaligus. Lock otomatis lepas kalau worker mati.
+
+ADMISSION_ENABLED = os.environ.get('JUSTCANI_ADMISSION', '1') != '0'
+# Request bersamaan per proses yang dianggap penuh (samakan dengan jumlah thread worker)
+ADMISSION_SLOTS = int(os.environ.get('JUSTCANI_ADMISSION_SLOTS', 16))
+ADMISSION_DIR = os.environ.get(
+    'JUSTCANI_ADMISSION_DIR', os.path.join(os.path.dirname(os.path.abspath(tasks.TASK_DB_PATH)), 'admission')
+)
+# Interval cek ulang slot antar proses selama antri
+SHARED_POLL_SECONDS = 0.02
+
+RequestClass = namedtuple('RequestClass', 'name priority limit queue_timeout share retry_after shared')
+
+# limit: request bersamaan per proses (shared: juga total semua worker)
+# queue_timeout: detik antri sebelum 503; share: bagian ADMISSION_SLOTS yang boleh dipakai
+CLASSES = {
+    'checkout': RequestClass('checkout', 0, 16, 10.0, 1.0, 1, False),
+    'scan': RequestClass('scan', 1, 12, 2.0, 0.9, 1, False),
+    'report': RequestClass('report', 2, 2, 0.5, 0.5, 5, True),
+    'batch': RequestClass('batch', 3, 1, 0.0, 0.25, 30, True),
+}
+
+
+def _configure():
+    """Override per kelas: JUSTCANI_ADMISSION_REPORT="limit,queue_timeout" (mis. "4,1.5")"""
+    for name, cls in list(CLASSES.items()):
+        value = os.environ.get(f'JUSTCANI_ADMISSION_{name.upper()}')
+        if not value:
+            continue
+        try:
+            limit, _, queue_timeout = value.partition(',')
+            CLASSES[name] = cls._replace(
+                limit=max(1, int(limit)),
+                queue_timeout=float(queue_timeout) if queue_timeout else cls.queue_timeout,
+            )
+        except ValueError:
+            print(f"⚠️ JUSTCANI_ADMISSION_{name.upper()}={value!r} tidak valid, pakai default")
+
+
+_configure()
+
+
+class Rejected(Exception):
+    """Request ditolak karena server penuh; retry_after = detik sebelum coba lagi"""
+
+    def __init__(self, cls):
+        super().__init__(f"Server sibuk ({cls.name}), coba lagi dalam {cls.retry_after} detik")
+        self.cls = cls
+        self.retry_after = cls.retry_after
+
+
+class Admission:
+    def __init__(self, classes, slots, shared_dir=None):
+        self.classes = classes
+        self.slots = slots
+        self.shared_dir = shared_dir if FLOCK_AVAILABLE else None
+        self.cond = threading.Condition()
+        self.in_flight = {name: 0 for name in classes}
+        self.waiting = {name: 0 for name in classes}
+        self.total = 0
+        self.admitted = {name: 0 for name in classes}
+        self.rejected = {name: 0 for name in classes}
+        self.wait_time = {name: 0.0 for name in classes}
+
+    def _can_admit(self, cls):
+        if self.in_flight[cls.name] >= cls.limit:
+            return False
+        if self.total >= max(1, int(self.slots * cls.share)):
+            return False
+        # Kelas lebih tinggi yang sedang antri didahulukan
+        return not any(self.waiting[other.name] for other in self.classes.values() if other.priority < cls.priority)
+
+    def _shared_slot(self, cls, deadline):
+        """File terbuka yang memegang salah satu slot antar proses, atau None kalau habis waktu"""
+        os.makedirs(self.shared_dir, exist_ok=True)
+        while True:
+            for i in range(cls.limit):
+                f = open(os.path.join(self.shared_dir, f"{cls.name}.{i}.lock"), 'a')
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return f
+                except OSError:
+                    f.close()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(SHARED_POLL_SECONDS)
+
+    def acquire(self, name):
+        """Tunggu giliran untuk kelas `name`; return token untuk release(), raise Rejected"""
+        cls = self.classes[name]
+        start = time.monotonic()
+        deadline = start + cls.queue_timeout
+        with self.cond:
+            self.waiting[name] += 1
+            try:
+                while not self._can_admit(cls):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected[name] += 1
+                        raise Rejected(cls)
+                    self.cond.wait(remaining)
+            finally:
+                self.waiting[name] -= 1
+                # Kelas lebih rendah mungkin tertahan oleh antrian ini
+                self.cond.notify_all()
+            self.in_flight[name] += 1
+            self.total += 1
+
+        lock_file = None
+        if cls.shared and self.shared_dir:
+            try:
+                lock_file = self._shared_slot(cls, deadline)
+            except OSError as e:
+                # Folder slot tidak bisa ditulis: cukup batas per proses
+                print(f"⚠️ Slot admission antar proses tidak tersedia ({e})")
+                self.shared_dir = None
+            if lock_file is None and self.shared_dir:
+                self._release(name)
+                with self.cond:
+                    self.rejected[name] += 1
+                raise Rejected(cls)
+
+        with self.cond:
+            self.admitted[name] += 1
+            self.wait_time[name] += time.monotonic() - start
+        return name, lock_file
+
+    def _release(self, name):
+        with self.cond:
+            self.in_flight[name] -= 1
+            self.total -= 1
+            self.cond.notify_all()
+
+    def release(self, token):
+        name, lock_file = token
+        if lock_file is not None:
+            # Menutup file melepas flock
+            lock_file.close()
+        self._release(name)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'slots': self.slots,
+                'shared': self.shared_dir is not None,
+                'in_flight': self.total,
+                'classes': {
+                    name: {
+                        'limit': cls.limit,
+                        'queue_timeout': cls.queue_timeout,
+                        'in_flight': self.in_flight[name],
+                        'waiting': self.waiting[name],
+                        'admitted': self.admitted[name],
+                        'rejected': self.rejected[name],
+                        'avg_wait_ms': round(self.wait_time[name] / self.admitted[name] * 1000, 3)
+                        if self.admitted[name] else 0,
+                    }
+                    for name, cls in self.classes.items()
+                },
+            }
+
+
+_admission = Admission(CLASSES, ADMISSION_SLOTS, ADMISSION_DIR)
+
+
+def acquire(name):
+    return _admission.acquire(name)
+
+
+def release(token):
+    _admission.release(token)
+
+
+def stats():
+    return _admission.stats()
@@ -0,0 +1,203 @@
+import json
+from datetime import datetime, timedelta
+
+from lazy_imports import lazy_import
+
+# numpy baru dimuat saat laporan pertama dihitung (lihat lazy_imports.py)
+np = lazy_import('numpy')
+NUMPY_AVAILABLE = np is not None
+
+# ============================================
+# ANALYTICS KOLOMNAR (NUMPY)
+# ============================================
+# Transaksi dan line item-nya dimuat sekali ke array NumPy per kolom (waktu
+# sebagai int64 detik, SKU sebagai kode integer), lalu semua agregasi -- jumlah
+# per grup, top-N, bucket jam/hari/minggu -- dikerjakan vektor tanpa loop per baris.
+
+BUCKETS = ('hour', 'day', 'week')
+TYPE_CODES = {'biasa': 0, 'lelang': 1}
+EPOCH = datetime(1970, 1, 1)
+
+
+class Columns:
+    """Kolom transaksi (trx_*) dan line item (item_*) untuk satu rentang waktu"""
+
+    def __init__(self, trx_ts, trx_total, trx_type, item_ts, item_sku, item_qty, item_subtotal, sku_labels):
+        self.trx_ts = trx_ts
+        self.trx_total = trx_total
+        self.trx_type = trx_type
+        self.item_ts = item_ts
+        self.item_sku = item_sku
+        self.item_qty = item_qty
+        self.item_subtotal = item_subtotal
+        # kode SKU -> label (nama produk, atau "SKU:x" kalau nama kosong)
+        self.sku_labels = sku_labels
+
+    def between(self, start, end):
+        """Potong ke rentang [start, end) tanpa query ulang"""
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        trx = (self.trx_ts >= start_ts) & (self.trx_ts < end_ts)
+        items = (self.item_ts >= start_ts) & (self.item_ts < end_ts)
+        return Columns(
+            self.trx_ts[trx], self.trx_total[trx], self.trx_type[trx],
+            self.item_ts[items], self.item_sku[items], self.item_qty[items], self.item_subtotal[items],
+            self.sku_labels
+        )
+
+
+def to_epoch(value):
+    return int((value - EPOCH).total_seconds())
+
+
+def from_rows(transactions):
+    """Ubah baris transaction_history (dict) jadi Columns. Parsing JSON details satu kali."""
+    dates = []
+    totals = []
+    types = []
+    item_trx, item_sku, item_qty, item_subtotal = [], [], [], []
+    codes = {}
+    labels = []
+
+    for i, t in enumerate(transactions):
+        dates.append(t['transaction_date'])
+        totals.append(t['total_amount'])
+        types.append(TYPE_CODES.get(t['transaction_type'], 0))
+        try:
+            details = json.loads(t['details'])
+        except (TypeError, ValueError):
+            continue
+        for item in details:
+            key = str(item.get('sku'))
+            code = codes.get(key)
+            if code is None:
+                code = codes[key] = len(labels)
+                labels.append(item.get('name', f"SKU:{item.get('sku')}"))
+            item_trx.append(i)
+            item_sku.append(code)
+            item_qty.append(item.get('qty', 0))
+            item_subtotal.append(item.get('subtotal', 0))
+
+    trx_ts = np.array(dates, dtype='datetime64[s]').astype(np.int64)
+    item_trx = np.array(item_trx, dtype=np.int64)
+    return Columns(
+        trx_ts,
+        np.array(totals, dtype=np.float64),
+        np.array(types, dtype=np.int8),
+        trx_ts[item_trx],
+        np.array(item_sku, dtype=np.int64),
+        np.array(item_qty, dtype=np.int64),
+        np.array(item_subtotal, dtype=np.float64),
+        labels
+    )
+
+
+# ============================================
+# OPERASI VEKTOR
+# ============================================
+
+def bucket_keys(ts, bucket):
+    """Nomor bucket jam/hari/minggu untuk array detik"""
+    if bucket == 'hour':
+        return ts // 3600
+    if bucket == 'week':
+        # 1970-01-01 hari Kamis; geser 3 hari supaya minggu mulai Senin
+        return (ts // 86400 + 3) // 7
+    return ts // 86400
+
+
+def bucket_label(key, bucket):
+    if bucket == 'hour':
+        return (EPOCH + timedelta(hours=int(key))).strftime('%d/%m %H:00')
+    if bucket == 'week':
+        return (EPOCH + timedelta(days=int(key) * 7 - 3)).strftime('%d/%m')
+    return (EPOCH + timedelta(days=int(key))).strftime('%d/%m')
+
+
+def grouped_sum(keys, values):
+    """Jumlah values per key unik: (keys_unik terurut, jumlah)"""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    return uniq, np.bincount(inverse, weights=values, minlength=len(uniq))
+
+
+def top_n(sums, n):
+    """Index n nilai terbesar, urut menurun (argpartition, bukan sort penuh)"""
+    n = min(n, len(sums))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-sums, n - 1)[:n]
+    return idx[np.argsort(-sums[idx], kind='stable')]
+
+
+def summarize(cols, bucket='day', top=5):
+    """Ringkasan, chart, dan produk terlaris dengan format sama seperti stats.compute_stats"""
+    total_revenue = float(cols.trx_total.sum())
+    total_transactions = int(len(cols.trx_total))
+
+    # Tren penjualan, bucket terbaru di depan (sama seperti urutan query DESC)
+    keys, sums = grouped_sum(bucket_keys(cols.trx_ts, bucket), cols.trx_total)
+    keys, sums = keys[::-1], sums[::-1]
+
+    types = np.bincount(cols.trx_type, minlength=2)
+
+    sold = np.bincount(cols.item_sku, weights=cols.item_qty, minlength=len(cols.sku_labels))
+    revenue = np.bincount(cols.item_sku, weights=cols.item_subtotal, minlength=len(cols.sku_labels))
+    best = top_n(sold, top)
+    # SKU yang tidak terjual di rentang ini tidak ikut top
+    best = best[sold[best] > 0]
+
+    return {
+        'summary': {
+            'total_revenue': total_revenue,
+            'total_transactions': total_transactions,
+            'avg_transaction': total_revenue / total_transactions if total_transactions else 0.0,
+            'total_products_sold': int(cols.item_qty.sum())
+        },
+        'charts': {
+            'sales_trend': {
+                'labels': [bucket_label(k, bucket) for k in keys],
+                'data': sums.tolist()
+            },
+            'transaction_types': {
+                'labels': ['Biasa', 'Lelang'],
+                'data': [int(types[0]), int(types[1])]
+            }
+        },
+        'tables': {
+            'top_products': [
+                {'name': cols.sku_labels[i], 'sold': int(sold[i]), 'revenue': float(revenue[i])}
+                for i in best
+            ]
+        }
+    }
+
+
+def _change(current, previous):
+    """Persentase perubahan; None kalau periode sebelumnya nol"""
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def compare(current, previous):
+    """Bandingkan summary dua periode (hasil summarize)"""
+    now, before = current['summary'], previous['summary']
+    return {key: _change(now[key], before[key]) for key in now}
+
+
+def range_report(transactions, start, end, bucket='day', top=10, previous_start=None):
+    """
+    Laporan rentang bebas [start, end) + pembanding periode sebelumnya
+    [previous_start, start), default panjangnya sama dengan rentang utama.
+    transactions harus mencakup [previous_start, end).
+    """
+    cols = from_rows(transactions)
+    previous_start = previous_start or start - (end - start)
+    current = summarize(cols.between(start, end), bucket, top)
+    previous = summarize(cols.between(previous_start, start), bucket, top)
+    return {
+        'range': {'start': start, 'end': end, 'bucket': bucket},
+        'previous_range': {'start': previous_start, 'end': start},
+        'current': current,
+        'previous': previous['summary'],
+        'change_percent': compare(current, previous)
+    }
@@ -1,124 +1,74 @@
 import sys
-from flask import Flask, render_template, url_for, flash, redirect, request, session, jsonify, send_file
-from forms import RegistrationForm, LoginForm
-from logic import CashierSystem, Inventory
-from datetime import datetime, timedelta    
+from flask import Flask, render_template, url_for, flash, redirect, request, session, jsonify, g, send_from_directory, Response, stream_with_context
+from logic import CashierSystem, Database, Inventory, primary_breaker
+from db_backend import DB_BACKEND, SERVERLESS, DatabaseUnavailable, QueryTimeout, statement_timeout
+from images import PILLOW_AVAILABLE, UPLOAD_FOLDER, UPLOAD_STAGING_FOLDER, allowed_file, avatar_variants, create_upload_folder, is_avatar_variant
+import admission
+import tasks
+import assets
+import fastjson
+import catalog_snapshot
+import events
+import history_archive
+import local_cache
+import stats_cache
+import topk
+from analytics import BUCKETS as ANALYTICS_BUCKETS, NUMPY_AVAILABLE
+from stats import compute_range_report
+from datetime import date, datetime, timedelta, timezone
 import json
+import math
+import mimetypes
 import os
+import socket
+import threading
+import time
 import base64
-from werkzeug.utils import secure_filename
-from io import BytesIO
+from functools import cached_property
+from werkzeug.utils import import_string
+from werkzeug.http import is_resource_modified
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+# `python app.py`: modul yang diimpor belakangan (barcode_admin) memakai modul ini,
+# bukan mengeksekusi app.py sekali lagi sebagai 'app'
+sys.modules.setdefault('app', sys.modules[__name__])
 
-# ============================================
-# CHECK DEPENDENCIES
-# ============================================
+logger = logging.getLogger(__name__)
 
-# Coba import PIL, jika tidak ada, disable fitur
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
-    print("INFO: Pillow not installed. Profile picture features will be limited.")
-
-# Cek apakah barcode library tersedia
-try:
-    import barcode
-    from barcode.writer import ImageWriter
-    BARCODE_AVAILABLE = True
-except ImportError:
-    BARCODE_AVAILABLE = False
-    print("INFO: Python-barcode not installed. Barcode generation features will be limited.")
+# Log header + body setiap request (mahal: body dibaca penuh), hanya untuk debugging
+LOG_REQUESTS = os.environ.get('JUSTCANI_LOG_REQUESTS') == '1'
 
 # ============================================
 # APP CONFIGURATION
 # ============================================
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'justcani-secret-key-2025'
-
-# Upload configuration
-UPLOAD_FOLDER = 'static/uploads/profile_pics'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def create_upload_folder():
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
+def log_request_info():
+    logger.debug('Headers: %s', request.headers)
+    logger.debug('Body: %s', request.get_data())
 
-def process_and_save_image(file, user_id):
-    if not PILLOW_AVAILABLE:
-        # Fallback sederhana
-        filename = f"profile_{user_id}.jpg"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        return f"/{UPLOAD_FOLDER}/{filename}"
+def create_app():
+    """
+    Flask app + konfigurasi, tanpa kerja berat saat import (penting untuk cold start
+    serverless). Modul berat dimuat saat pertama dipakai: numpy (laporan), Pillow
+    (barcode/foto), wtforms (form login/daftar), bcrypt, dan view barcode admin.
+    Route di bawah didaftarkan ke app ini: app = create_app().
+    """
+    logging.basicConfig(level=logging.DEBUG if LOG_REQUESTS else logging.INFO)
     
-    try:
-        img = Image.open(file)
-        
-        if img.mode in ('RGBA', 'LA'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[3])
-            else:
-                background.paste(img, mask=img.split()[1])
-            img = background
-        
-        width, height = img.size
-        min_dim = min(width, height)
-        left = (width - min_dim) / 2
-        top = (height - min_dim) / 2
-        right = (width + min_dim) / 2
-        bottom = (height + min_dim) / 2
-        img = img.crop((left, top, right, bottom))
-        
-        img = img.resize((400, 400), Image.Resampling.LANCZOS)
-        
-        filename = f"profile_{user_id}.jpg"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        img.save(filepath, 'JPEG', quality=85)
-        
-        return f"/{UPLOAD_FOLDER}/{filename}"
-        
-    except Exception as e:
-        print(f"Error processing image: {e}")
-        return None
-
-@app.route('/')
-def home():
-    return "Website sudah jalan di Vercel!"
-
-#=============================================
-# UTILITY FUNCTIONS
-# ============================================
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'justcani-secret-key-2025'
+    # jsonify lewat orjson (fastjson.py): Decimal persis, tanggal ISO 8601
+    app.json = fastjson.FastJSONProvider(app)
+    
+    # Upload configuration
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
+    
+    if LOG_REQUESTS:
+        app.before_request(log_request_info)
+    return app
 
-def get_time_ago(timestamp):
-    if isinstance(timestamp, str):
-        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-    
-    now = datetime.now()
-    diff = now - timestamp
-    
-    if diff.days > 0:
-        return f"{diff.days} hari lalu"
-    elif diff.seconds > 3600:
-        hours = diff.seconds // 3600
-        return f"{hours} jam lalu"
-    elif diff.seconds > 60:
-        minutes = diff.seconds // 60
-        return f"{minutes} menit lalu"
-    else:
-        return "Baru saja"
+app = create_app()
 
 # ============================================
 # ROUTES - AUTHENTICATION & PROFILE
@@ -131,9 +81,11 @@ def home():
 
 @app.route("/register", methods=['GET', 'POST'])
 def register():
+    # wtforms + email_validator (~50ms import) cuma dibutuhkan halaman ini & login
+    from forms import RegistrationForm
     form = RegistrationForm()
     if form.validate_on_submit():
-        sys = CashierSystem()
+        sys = CashierSystem(required=True)
         berhasil = sys.register_user(
             form.username.data, 
             form.email.data, 
@@ -149,9 +101,10 @@ def register():
 
 @app.route("/login", methods=['GET', 'POST'])
 def login():
+    from forms import LoginForm
     form = LoginForm()
     if form.validate_on_submit():
-        sys = CashierSystem()
+        sys = CashierSystem(required=True)
         user = sys.login_user(form.email.data, form.password.data)
         if user:
             session['user_id'] = user['id']
@@ -193,31 +146,50 @@ def upload_profile_pic():
     create_upload_folder()
     
     try:
-        profile_pic_url = process_and_save_image(file, session['user_id'])
-        
-        if not profile_pic_url:
-            return jsonify({"success": False, "message": "Gagal memproses"})
-        
-        # Update database
-        sys = CashierSystem()
-        cursor = sys.db.cursor()
-        sql = "UPDATE users SET profile_pic = %s WHERE id = %s"
-        cursor.execute(sql, (profile_pic_url, session['user_id']))
-        sys.db.commit()
-        sys.close()
-        
-        session['profile_pic'] = profile_pic_url
+        # Simpan file mentah dulu (di luar static/), resize dikerjakan task worker.
+        # Ekstensi dari nama asli seperti allowed_file (secure_filename membuang nama non-ASCII)
+        ext = file.filename.rsplit('.', 1)[1].lower()
+        source_path = os.path.join(UPLOAD_STAGING_FOLDER, f"upload_{session['user_id']}_{os.urandom(6).hex()}.{ext}")
+        file.save(source_path)
+        
+        task_id = tasks.enqueue('profile_pic', {
+            'user_id': session['user_id'],
+            'source_path': source_path
+        })
         
         return jsonify({
-            "success": True, 
-            "message": "Foto berhasil diupdate",
-            "profile_pic": profile_pic_url
-        })
+            "success": True,
+            "message": "Foto sedang diproses",
+            "task_id": task_id,
+            "status_url": url_for('api_task_status', task_id=task_id)
+        }), 202
         
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"})
 
+@app.route("/api/tasks/<int:task_id>")
+def api_task_status(task_id):
+    """Polling status task background"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    status = tasks.get_status(task_id)
+    if not status:
+        return jsonify({"error": "Task tidak ditemukan"}), 404
+    
+    if status['name'] == 'profile_pic':
+        # Pemilik dari payload: result baru ada setelah task selesai
+        payload = tasks.get_payload(task_id) or {}
+        if payload.get('user_id') != session['user_id']:
+            return jsonify({"error": "Unauthorized"}), 401
+        if status['status'] == 'done':
+            session['profile_pic'] = status['result']['profile_pic']
+    elif session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    return jsonify(status)
+
 # ============================================
 # ROUTES - MAIN PAGES
 # ============================================
@@ -243,46 +215,114 @@ def products():
 
 
 # ============================================
-# log request details for debugging headers and body
+# HEALTH / READINESS
 # ============================================
+# Pengganti /api/debug_db (yang membuka koneksi baru dan COUNT(*) dua tabel setiap
+# dipanggil): hasil probe SELECT 1 di-cache READINESS_CACHE_SECONDS per worker, dan
+# saat circuit breaker terbuka langsung jawab 503 tanpa menyentuh database.
+READINESS_CACHE_SECONDS = 2
+# (ready, latency_ms) disimpan sebagai satu tuple supaya pembaca tanpa lock tidak dapat campuran
+_readiness = {'checked_at': None, 'result': (False, None)}
+_readiness_lock = threading.Lock()
 
-@app.before_request
-def log_request_info():
-    logger.debug('Headers: %s', request.headers)
-    logger.debug('Body: %s', request.get_data())
+def _probe_readiness():
+    start = time.perf_counter()
+    ready = False
+    conn = Database.get_conn()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            ready = True
+        except Exception as e:
+            print(f"⚠️ Probe readiness gagal: {e}")
+        finally:
+            conn.close()
+    latency_ms = round((time.perf_counter() - start) * 1000, 3) if conn else None
+    _readiness.update(checked_at=time.monotonic(), result=(ready, latency_ms))
 
-@app.route("/api/debug_db")
-def debug_db():
-    """Simple debug endpoint"""
-    try:
-        import mysql.connector
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='db_kasir1'
-        )
-        cursor = conn.cursor(dictionary=True)
-        
-        # Cek produk biasa
-        cursor.execute("SELECT COUNT(*) as count FROM produk_biasa")
-        biasa_count = cursor.fetchone()
-        
-        # Cek produk lelang
-        cursor.execute("SELECT COUNT(*) as count FROM produk_lelang")
-        lelang_count = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        return f"""
-        <h3>Database Status</h3>
-        <p>Produk Biasa: {biasa_count['count']} item</p>
-        <p>Produk Lelang: {lelang_count['count']} item</p>
-        <p>✅ Database OK</p>
-        """
-    except Exception as e:
-        return f"<h3>❌ ERROR</h3><p>{str(e)}</p>"
+def check_readiness():
+    """(ready, latency_ms) dari probe terakhir; probe ulang kalau cache sudah lewat"""
+    checked_at = _readiness['checked_at']
+    if checked_at is None or time.monotonic() - checked_at >= READINESS_CACHE_SECONDS:
+        # Cukup satu request yang probe (bisa lama saat DB lambat); yang lain langsung
+        # pakai hasil terakhir. Hanya sebelum probe pertama semua ikut menunggu.
+        if _readiness_lock.acquire(blocking=checked_at is None):
+            try:
+                checked_at = _readiness['checked_at']
+                if checked_at is None or time.monotonic() - checked_at >= READINESS_CACHE_SECONDS:
+                    _probe_readiness()
+            finally:
+                _readiness_lock.release()
+    return _readiness['result']
+
+@app.route("/api/health/ready")
+def health_ready():
+    """200 kalau database siap, 503 + Retry-After kalau tidak (dipakai terminal & load balancer)"""
+    ready, latency_ms = check_readiness()
+    breaker = primary_breaker.stats()
+    body = {
+        "ready": ready,
+        "backend": DB_BACKEND,
+        "breaker": breaker['state'],
+        "latency_ms": latency_ms,
+        "retry_after": math.ceil(primary_breaker.retry_after())
+    }
+    if session.get('role') == 'admin':
+        body["breaker_stats"] = breaker
+    response = jsonify(body)
+    response.headers['Cache-Control'] = 'no-store'
+    if not ready:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, body['retry_after']))
+    return response
+
+def service_unavailable(message, retry_after):
+    """503 seragam (JSON untuk API, teks untuk halaman) dengan Retry-After"""
+    if request.path.startswith('/api/') or request.is_json:
+        response = jsonify({"success": False, "message": message, "error": message, "retry_after": retry_after})
+    else:
+        response = app.response_class(f"<h3>⚠️ {message}</h3><p>Coba lagi dalam {retry_after} detik.</p>",
+                                      mimetype='text/html')
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.errorhandler(DatabaseUnavailable)
+def database_unavailable(error):
+    # Semua route yang butuh database (CashierSystem(required=True)) gagal dengan cara yang sama
+    return service_unavailable(str(error), error.retry_after)
+
+@app.errorhandler(QueryTimeout)
+def query_timeout(error):
+    # Query laporan dihentikan db_backend.statement_timeout: koneksi & lock sudah dilepas
+    response = service_unavailable(str(error), error.retry_after)
+    response.status_code = 504
+    return response
+
+def disconnect_check():
+    """
+    Callable untuk statement_timeout(cancel_when=...): True kalau client sudah menutup
+    koneksi (recv PEEK kosong). None kalau server WSGI tidak memberi akses socket
+    (hanya gunicorn & server dev werkzeug). Hanya untuk GET: body request sudah habis dibaca.
+    """
+    sock = request.environ.get('gunicorn.socket') or request.environ.get('werkzeug.socket')
+    if sock is None or not hasattr(socket, 'MSG_DONTWAIT'):
+        return None
+    
+    def client_gone():
+        try:
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except ValueError:
+            # Socket TLS tidak mendukung flag recv: anggap client masih ada
+            return False
+        except OSError:
+            return True
+    return client_gone
 
 # ============================================
 # ROUTES - ADMIN FEATURES
@@ -303,17 +343,21 @@ def admin_history():
     
     date_filter = request.args.get('date', '')
     
-    sys = CashierSystem()
-    
-    if date_filter:
-        transactions = sys.transaction.history.get_transactions_by_date(date_filter, date_filter)
-    else:
-        transactions = sys.transaction.history.get_all_transactions(limit=100)
-    
-    today = datetime.now().strftime("%Y-%m-%d")
-    daily_summary = sys.transaction.history.get_daily_summary(today)
-    
-    sys.close()
+    # Transaksi baru sesudah halaman dirender datang lewat SSE, jadi halaman
+    # harus sudah memuat semua transaksi sebelum itu (replica yang tertinggal tidak boleh)
+    _, version_time = data_validators('history', 'transaction')
+    sys = read_system(version_time)
+    try:
+        with statement_timeout(sys.db, 'report', cancel_when=disconnect_check()):
+            if date_filter:
+                transactions = sys.transaction.history.get_transactions_by_date(date_filter, date_filter)
+            else:
+                transactions = sys.transaction.history.get_all_transactions(limit=100)
+            
+            today = datetime.now().strftime("%Y-%m-%d")
+            daily_summary = sys.transaction.history.get_daily_summary(today)
+    finally:
+        sys.close()
     
     return render_template('admin_history.html', 
                          title='History Transaksi',
@@ -326,55 +370,96 @@ def admin_add():
     if session.get('role') != 'admin':
         return redirect(url_for('home'))
     
-    sys = CashierSystem()
+    sys = CashierSystem(required=True)
     sku = request.form.get('sku')
     name = request.form.get('name')
     harga = request.form.get('harga')
     expired_date = request.form.get('expired_date')
     
-    # Auto-generate barcode jika tersedia
-    if BARCODE_AVAILABLE and sku:
-        try:
-            # Generate barcode
-            code128 = barcode.get_barcode_class('code128')
-            barcode_instance = code128(str(sku), writer=ImageWriter())
-            
-            # Save to bytes
-            buffer = BytesIO()
-            barcode_instance.write(buffer)
-            buffer.seek(0)
-            
-            # Convert to base64
-            barcode_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            barcode_data = f"data:image/png;base64,{barcode_base64}"
-            
-            # Save to database
-            sys.inventory.save_barcode_to_db(sku, barcode_data)
-            print(f"✅ Barcode auto-generated for SKU: {sku}")
-            
-        except Exception as e:
-            print(f"⚠️ Barcode generation failed: {e}")
-    
     sys.inventory.add_produk_baru(sku, name, harga, expired_date)
     sys.close()
     
     flash('Produk berhasil ditambahkan!', 'success')
     return redirect(url_for('admin'))
 
+@app.route("/admin/import", methods=['POST'])
+def admin_import():
+    """Import katalog produk dari file CSV/JSON/JSONL (upsert per batch)"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    if 'file' not in request.files or request.files['file'].filename == '':
+        return jsonify({"success": False, "message": "Tidak ada file"}), 400
+    
+    from product_import import iter_rows, detect_format
+    
+    file = request.files['file']
+    fmt = request.form.get('format') or detect_format(file.filename)
+    
+    sys = CashierSystem(required=True)
+    
+    try:
+        report = sys.inventory.import_produk(iter_rows(file.stream, fmt))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"success": False, "message": f"File tidak valid: {e}"}), 400
+    finally:
+        sys.close()
+    
+    return jsonify({
+        "success": not report['errors'],
+        "message": f"{report['inserted']} produk baru, {report['updated']} diupdate, {len(report['errors'])} error",
+        "report": report
+    })
+
 @app.route("/admin/restock", methods=['POST'])
 def admin_restock():
     if session.get('role') != 'admin':
         return redirect(url_for('home'))
     
-    sys = CashierSystem()
-    cursor = sys.db.cursor()
-    sql = "UPDATE produk_biasa SET stok = stok + %s WHERE no_SKU = %s"
-    cursor.execute(sql, (request.form.get('qty'), request.form.get('sku')))
-    sys.db.commit()
+    sys = CashierSystem(required=True)
+    success, results = sys.inventory.restock_batch([
+        {'sku': request.form.get('sku'), 'qty': request.form.get('qty')}
+    ])
     sys.close()
-    flash('Stok berhasil diperbarui!', 'success')
+    
+    if success:
+        flash('Stok berhasil diperbarui!', 'success')
+    else:
+        status = results[0]['status'] if results else 'error'
+        flash(f'Gagal update stok ({status})', 'danger')
     return redirect(url_for('admin'))
 
+@app.route("/api/restock", methods=['POST'])
+def api_restock():
+    """Restock banyak SKU sekaligus dari JSON {items: [{sku, qty}]} atau file CSV pengiriman"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    if 'file' in request.files and request.files['file'].filename:
+        from product_import import iter_rows, detect_format
+        file = request.files['file']
+        try:
+            items = list(iter_rows(file.stream, detect_format(file.filename)))
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({"success": False, "message": f"File tidak valid: {e}"}), 400
+    else:
+        data = request.get_json(silent=True) or {}
+        items = data.get('items', [])
+    
+    if not items:
+        return jsonify({"success": False, "message": "Tidak ada item restock"}), 400
+    
+    sys = CashierSystem(required=True)
+    success, results = sys.inventory.restock_batch(items)
+    sys.close()
+    
+    updated = sum(1 for r in results if r['status'] == 'ok')
+    return jsonify({
+        "success": success,
+        "message": f"{updated} dari {len(results)} SKU berhasil direstock",
+        "results": results
+    })
+
 @app.route("/admin/move_lelang", methods=['POST'])
 def admin_move_lelang():
     if session.get('role') != 'admin':
@@ -388,13 +473,207 @@ def admin_move_lelang():
         flash('SKU dan alasan harus diisi!', 'danger')
         return redirect(url_for('admin'))
     
-    sys = CashierSystem()
+    sys = CashierSystem(required=True)
     success, message = sys.inventory.move_to_lelang(sku, reason)
     sys.close()
     
     flash(message, 'success' if success else 'danger')
     return redirect(url_for('admin'))
 
+@app.route("/admin/sweep_expiry", methods=['POST'])
+def admin_sweep_expiry():
+    """Jalankan sweeper expired secara manual"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    from expiry_sweeper import parse_policy
+    from logic import EXPIRY_SWEEP_HORIZON_DAYS
+    
+    try:
+        horizon = int(request.form.get('horizon') or EXPIRY_SWEEP_HORIZON_DAYS)
+        policy = parse_policy(request.form.get('policy', ''))
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Parameter tidak valid: {e}"}), 400
+    
+    sys = CashierSystem(required=True)
+    report = sys.inventory.sweep_near_expiry(horizon, policy)
+    sys.close()
+    
+    return jsonify({
+        "success": not report['errors'],
+        "message": f"{len(report['moved'])} produk dipindah ke lelang",
+        "report": report
+    })
+
+# ============================================
+# CONDITIONAL GET (ETAG / LAST-MODIFIED)
+# ============================================
+
+def data_validators(prefix, *names):
+    """ETag dari counter versi data (events.get_versions) + waktu perubahan terakhirnya"""
+    epoch, versions = events.get_versions(*names)
+    etag = '-'.join([prefix, str(epoch)] + [f"{name}{versions[name][0]}" for name in names])
+    return etag, max(v[1] for v in versions.values())
+
+def _last_modified(version_time):
+    # Last-Modified cuma presisi detik: dibulatkan ke atas, dan baru dikirim setelah
+    # detik itu lewat, supaya dua perubahan dalam detik yang sama tidak dijawab 304
+    return datetime.fromtimestamp(math.ceil(version_time), timezone.utc)
+
+def set_validators(response, etag, version_time=None):
+    response.set_etag(etag)
+    if version_time and datetime.now(timezone.utc) >= _last_modified(version_time):
+        response.last_modified = _last_modified(version_time)
+    # Browser wajib revalidasi tiap kali, tapi boleh pakai body cache kalau 304
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def set_read_validators(response, sys, etag, version_time):
+    """
+    Seperti set_validators, tapi hanya kalau koneksi baca (mungkin replica) sudah
+    melihat versi di ETag. Replica yang tertinggal tidak boleh memberi ETag terbaru.
+    """
+    if sys.fresh_until >= version_time:
+        return set_validators(response, etag, version_time)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified(etag, version_time=None):
+    """Response 304 kalau If-None-Match/If-Modified-Since client masih cocok, selain itu None"""
+    last_modified = _last_modified(version_time) if version_time else None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return set_validators(Response(status=304), etag, version_time)
+
+def read_system(fresh_after=None):
+    """
+    CashierSystem untuk laporan/pencarian: dirutekan ke replica kalau ada yang
+    sudah melihat tulis terakhir user ini (read-your-writes) dan fresh_after
+    """
+    fresh_after = max(session.get('last_write_at') or 0, fresh_after or 0)
+    return CashierSystem(read_only=True, fresh_after=fresh_after or None, required=True)
+
+# Cache per worker gunicorn; dikosongkan otomatis begitu versi data berubah di
+# worker mana pun (local_cache.py). Key pencarian = (jenis, query).
+search_cache = local_cache.VersionedCache('search', ('catalog',), maxsize=512)
+scan_cache = local_cache.VersionedCache('scan', ('catalog',), maxsize=1024)
+
+def cached_read(cache, key, read, category='scan'):
+    """
+    read(sys) lewat cache per worker; DatabaseUnavailable kalau database tidak terhubung.
+    Versi dibaca sebelum query, jadi hasilnya minimal sebaru ETag yang sudah
+    dihitung request ini (data_validators). Query dibatasi waktu kategori `category`.
+    """
+    def load(fresh_after):
+        sys = read_system(fresh_after)
+        try:
+            with statement_timeout(sys.db, category):
+                return read(sys)
+        finally:
+            sys.close()
+    return cache.get(key, load)
+
+# Didaftarkan paling awal supaya jalan paling akhir (after_request dipanggil terbalik):
+# header & ETag dari hook lain sudah final sebelum body dikompres
+@app.after_request
+def compress_body(response):
+    return fastjson.compress_response(response, request.accept_encodings)
+
+# File yang namanya berisi hash isi: URL berubah kalau isi berubah, jadi aman di-cache setahun
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.after_request
+def cache_immutable_files(response):
+    if response.status_code == 200 and is_avatar_variant(request.path):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+# Template: avatar_variants(session.profile_pic).webp[64] untuk <picture>/srcset (avatar di layout.html)
+app.jinja_env.globals['avatar_variants'] = avatar_variants
+
+# css/js dengan fingerprint (assets.py): url_for('static', filename='css/style.css')
+# jadi /static/dist/css/style.<hash>.css tanpa mengubah template
+# Serverless: manifest dari build saat deploy, tanpa hash ulang sumber tiap cold start
+ASSET_MANIFEST = assets.load_manifest(rebuild=not SERVERLESS)
+
+# Produk terlaris: sync event berkala di background; serverless cukup sync saat dibaca
+if not SERVERLESS:
+    topk.start_sync()
+
+@app.url_defaults
+def fingerprint_static(endpoint, values):
+    if endpoint == 'static' and values.get('filename') in ASSET_MANIFEST:
+        values['filename'] = ASSET_MANIFEST[values['filename']]
+
+@app.route('/static/dist/<path:filename>')
+def static_dist(filename):
+    """Aset hasil build: versi .br/.gz dipilih dari Accept-Encoding, cache immutable"""
+    path, encoding = assets.negotiate(filename, request.accept_encodings)
+    response = send_from_directory(assets.DIST_DIR, path, mimetype=mimetypes.guess_type(filename)[0], max_age=31536000)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+@app.after_request
+def remember_write(response):
+    # Catat waktu tulis terakhir user supaya baca berikutnya tidak dari replica yang tertinggal
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400 and session.get('user_id'):
+        session['last_write_at'] = time.time()
+    return response
+
+# ============================================
+# ADMISSION CONTROL
+# ============================================
+# Kelas prioritas per endpoint (admission.py): checkout > scan > report > batch.
+# Endpoint yang tidak ada di sini (halaman, login, SSE, aset) tidak dibatasi.
+# /api/events sengaja tidak masuk: stream-nya dibatasi sendiri (events.SSE_MAX_STREAMS,
+# SSE_MAX_SECONDS) dan thread untuk itu disisihkan di gunicorn.conf.py
+ADMISSION_CLASSES = {
+    'api_checkout': 'checkout',
+    'api_checkout_lelang': 'checkout',
+    'api_scan': 'scan',
+    'api_scan_batch': 'scan',
+    'api_search': 'scan',
+    'api_search_lelang': 'scan',
+    'api_products': 'scan',
+    'api_stats': 'report',
+    'api_analytics': 'report',
+    'admin_monthly_report': 'report',
+    'generate_all_barcodes': 'batch',
+    'api_products_for_barcode': 'batch',
+    'api_products_without_barcode': 'batch',
+    'admin_import': 'batch',
+    'admin_sweep_expiry': 'batch',
+}
+
+@app.before_request
+def admit_request():
+    name = ADMISSION_CLASSES.get(request.endpoint)
+    if not name or not admission.ADMISSION_ENABLED:
+        return None
+    try:
+        g.admission = admission.acquire(name)
+    except admission.Rejected as e:
+        return service_unavailable(str(e), e.retry_after)
+    return None
+
+@app.after_request
+def hold_admission(response):
+    # Slot dilepas setelah body terkirim, termasuk response streaming (list barcode)
+    token = g.pop('admission', None)
+    if token:
+        response.call_on_close(lambda: admission.release(token))
+    return response
+
+@app.teardown_request
+def release_admission(error):
+    # after_request tidak sempat jalan (mis. error saat finalize): jangan sampai slot bocor
+    token = g.pop('admission', None)
+    if token:
+        admission.release(token)
+
 # ============================================
 # API ENDPOINTS - PRODUCTS & TRANSACTIONS
 # ============================================
@@ -406,23 +685,97 @@ def api_search():
         query = request.args.get('q', '')
         print(f"[DEBUG] Searching produk biasa: '{query}'")
         
-        sys = CashierSystem()
-        if not sys.db:
+        # Versi dibaca sebelum query supaya ETag tidak lebih baru dari datanya
+        etag, version_time = data_validators('produk', 'catalog')
+        cached = not_modified(etag, version_time)
+        if cached:
+            return cached
+        
+        # Snapshot katalog bersama (mmap) kalau sudah sebaru versi data; selain itu query DB
+        snapshot = catalog_snapshot.current()
+        if snapshot:
+            results = snapshot.search(query)
+        else:
+            results = cached_read(search_cache, ('biasa', query.strip()), lambda sys: sys.inventory.search_produk(query))
+        if results is None:
             print("[ERROR] Database not connected")
             return jsonify([]), 200
-        
-        results = sys.inventory.search_produk(query)
         print(f"[DEBUG] Found {len(results)} results")
         
-        sys.close()
-        return jsonify(results)
+        # Isi cache minimal sebaru versi di ETag (lihat cached_read)
+        return set_validators(jsonify(results), etag, version_time)
         
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         print(f"[ERROR] api_search failed: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/products")
+def api_products():
+    """
+    Listing produk untuk halaman Daftar Produk: filter & sort di server, keyset pagination.
+    ?type=biasa|lelang&q=&sort=name_asc|price_desc|expiry_asc|stock_asc...
+    &expiry_days=N&low_stock=N&has_barcode=1|0&cursor=<next_cursor>&limit=N
+    """
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    kind = 'lelang' if request.args.get('type') == 'lelang' else 'biasa'
+    try:
+        expiry_days = request.args.get('expiry_days', type=int)
+        low_stock = request.args.get('low_stock', type=int)
+        has_barcode = request.args.get('has_barcode')
+        has_barcode = None if has_barcode in (None, '') else has_barcode == '1'
+        limit = request.args.get('limit', 50, type=int)
+        sort = request.args.get('sort', 'name_asc')
+        # Cursor menyimpan sort-nya sendiri: cursor dari sort lain tidak boleh dipakai
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(cursor, list) or len(cursor) != 3 or cursor[0] != sort:
+                raise ValueError("cursor")
+            # [sort, nilai_sort, no_SKU]: nilai_sort selalu string (lihat next_cursor di bawah)
+            if not isinstance(cursor[1], str) or not isinstance(cursor[2], int) or isinstance(cursor[2], bool):
+                raise ValueError("cursor")
+            cursor = cursor[1:]
+        else:
+            cursor = None
+    except ValueError:
+        return jsonify({"error": "Parameter tidak valid"}), 400
+    
+    # Filter expiry bergantung tanggal hari ini, jadi ikut di ETag
+    etag, version_time = data_validators(f"list-{date.today().isoformat()}", 'catalog')
+    cached = not_modified(etag, version_time)
+    if cached:
+        return cached
+    
+    sys = read_system()
+    try:
+        with statement_timeout(sys.db, 'scan'):
+            items, next_cursor, total = sys.inventory.list_produk(
+                kind,
+                query=request.args.get('q', ''),
+                sort=sort,
+                expiry_days=expiry_days,
+                low_stock=low_stock,
+                has_barcode=has_barcode,
+                cursor=cursor,
+                limit=limit
+            )
+    finally:
+        sys.close()
+    
+    if next_cursor:
+        next_cursor = base64.urlsafe_b64encode(json.dumps([sort] + next_cursor).encode()).decode()
+    return set_read_validators(jsonify({
+        "items": items,
+        "next_cursor": next_cursor,
+        "total": total
+    }), sys, etag, version_time)
+
 @app.route("/api/search_lelang")
 def api_search_lelang():
     """API untuk search produk lelang"""
@@ -430,30 +783,116 @@ def api_search_lelang():
         query = request.args.get('q', '')
         print(f"[DEBUG] Searching produk lelang: '{query}'")
         
-        sys = CashierSystem()
-        if not sys.db:
+        etag, version_time = data_validators('lelang', 'catalog')
+        cached = not_modified(etag, version_time)
+        if cached:
+            return cached
+        
+        results = cached_read(search_cache, ('lelang', query.strip()), lambda sys: sys.inventory.search_produk_lelang(query))
+        if results is None:
             print("[ERROR] Database not connected")
             return jsonify([]), 200
-        
-        results = sys.inventory.search_produk_lelang(query)
         print(f"[DEBUG] Found {len(results)} results")
         
-        sys.close()
-        return jsonify(results)
+        return set_validators(jsonify(results), etag, version_time)
         
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         print(f"[ERROR] api_search_lelang failed: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+# ============================================
+# API ENDPOINTS - SCAN BARCODE (SKU PERSIS)
+# ============================================
+
+# Maks kode per request /api/scan/batch
+SCAN_BATCH_MAX = 200
+
+def resolve_skus(skus, kind='biasa'):
+    """
+    SKU persis -> produk untuk scan barcode, {sku: produk}. Produk biasa dari hash
+    index snapshot katalog (mmap, tanpa query); lelang atau snapshot yang tertinggal
+    lewat primary key + cache per worker. None kalau query gagal.
+    """
+    if kind == 'biasa':
+        snapshot = catalog_snapshot.current()
+        if snapshot:
+            return snapshot.get_many(skus)
+    skus = tuple(sorted(set(skus)))
+    return cached_read(scan_cache, (kind, skus), lambda sys: sys.inventory.get_by_skus(skus, kind))
+
+def parse_scan_code(code):
+    """Isi barcode Code128 = SKU dalam angka ASCII; None kalau bukan"""
+    code = str(code).strip()
+    # isdigit() saja juga menerima digit Unicode ('²') yang gagal di int()
+    return int(code) if code.isascii() and code.isdigit() and len(code) <= 18 else None
+
+def with_server_timing(response, start):
+    response.headers['Server-Timing'] = f"scan;dur={(time.perf_counter() - start) * 1000:.3f}"
+    return response
+
+@app.route("/api/scan/<code>")
+def api_scan(code):
+    """
+    Satu hasil scan barcode: lookup SKU persis (tanpa LIKE seperti /api/search).
+    ?type=biasa|lelang mengikuti mode kasir.
+    """
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    start = time.perf_counter()
+    kind = 'lelang' if request.args.get('type') == 'lelang' else 'biasa'
+    sku = parse_scan_code(code)
+    if sku is None:
+        return jsonify({"error": "Kode barcode tidak valid"}), 400
+    
+    found = resolve_skus([sku], kind)
+    if found is None:
+        return jsonify({"error": "Database tidak terhubung"}), 503
+    product = found.get(sku)
+    if not product:
+        return with_server_timing(jsonify({"error": "Produk tidak ditemukan", "code": code}), start), 404
+    return with_server_timing(jsonify({**product, "type": kind}), start)
+
+@app.route("/api/scan/batch", methods=['POST'])
+def api_scan_batch():
+    """
+    Beberapa scan sekaligus (scanner lebih cepat dari round trip):
+    {"codes": [...], "type": "biasa"} -> {"items": [...] urut scan, "missing": [...]}
+    """
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    start = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    codes = data.get('codes')
+    if not isinstance(codes, list) or not codes or len(codes) > SCAN_BATCH_MAX:
+        return jsonify({"error": f"codes harus list berisi 1-{SCAN_BATCH_MAX} kode"}), 400
+    kind = 'lelang' if data.get('type') == 'lelang' else 'biasa'
+    
+    skus = [parse_scan_code(code) for code in codes]
+    found = resolve_skus([sku for sku in skus if sku is not None], kind)
+    if found is None:
+        return jsonify({"error": "Database tidak terhubung"}), 503
+    
+    items, missing = [], []
+    for code, sku in zip(codes, skus):
+        if sku in found:
+            items.append({**found[sku], "type": kind})
+        else:
+            missing.append(code)
+    return with_server_timing(jsonify({"items": items, "missing": missing}), start)
+
 @app.route("/api/checkout", methods=['POST'])
 def api_checkout():
     if not session.get('user_id'):
         return jsonify({"success": False, "message": "Silakan login terlebih dahulu"})
     
     data = request.json
-    sys = CashierSystem()
+    sys = CashierSystem(required=True)
     success, msg = sys.transaction.checkout(
         data['items'],
         session['user_id'],
@@ -468,7 +907,7 @@ def api_checkout_lelang():
         return jsonify({"success": False, "message": "Silakan login terlebih dahulu"})
     
     data = request.json
-    sys = CashierSystem()
+    sys = CashierSystem(required=True)
     success, msg = sys.transaction.checkout_lelang(
         data['items'],
         session['user_id'],
@@ -482,12 +921,15 @@ def api_transaction_detail(transaction_id):
     if session.get('role') != 'admin':
         return jsonify({"error": "Unauthorized"}), 401
     
-    sys = CashierSystem()
+    sys = CashierSystem(required=True)
     cursor = sys.db.cursor(dictionary=True)
     try:
         sql = "SELECT * FROM transaction_history WHERE id = %s"
         cursor.execute(sql, (transaction_id,))
         transaction = cursor.fetchone()
+        if not transaction:
+            # Transaksi bulan lama ada di file arsip
+            transaction = history_archive.find(sys.db, transaction_id)
         
         if not transaction:
             return jsonify({"error": "Transaction not found"}), 404
@@ -499,348 +941,167 @@ def api_transaction_detail(transaction_id):
         cursor.close()
         sys.close()
 
+@app.route("/api/events")
+def api_events():
+    """Stream perubahan data (transaksi, stok, lelang) untuk dashboard, pengganti polling"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    if last_id and not (last_id.isascii() and last_id.isdigit()):
+        return jsonify({"error": "last_id harus berupa id event (angka)"}), 400
+    is_admin = session.get('role') == 'admin'
+    
+    # Stream panjang memegang satu thread: dibatasi per proses (events.SSE_MAX_STREAMS),
+    # selebihnya dan serverless (fungsi tidak boleh menggantung) pakai mode polling
+    long_lived = not SERVERLESS and events.acquire_stream_slot()
+    if long_lived:
+        stream = events.stream(last_id, is_admin=is_admin)
+    else:
+        stream = events.stream(last_id, is_admin=is_admin, max_seconds=0, retry_ms=events.SSE_POLL_RETRY_MS)
+    
+    response = Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if long_lived:
+        response.call_on_close(events.release_stream_slot)
+    return response
+
 # ============================================
 # API ENDPOINTS - STATISTICS & REPORTS
 # ============================================
 
 @app.route("/api/stats")
 def api_stats():
+    """
+    Statistik dari cache per periode (stale-while-revalidate).
+    Cache kosong: 202 + task, client polling /api/tasks/<id> sampai selesai.
+    Cache basi: tetap dikirim langsung, satu task menghitung ulang di background.
+    """
     if session.get('role') != 'admin':
         return jsonify({"error": "Unauthorized"}), 401
     
     period = request.args.get('period', 'today')
-    end_date = datetime.now()
-    
-    if period == 'today':
-        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    elif period == 'week':
-        start_date = end_date - timedelta(days=7)
-    elif period == 'month':
-        start_date = end_date - timedelta(days=30)
-    else:
-        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period not in ('today', 'week', 'month'):
+        period = 'today'
     
-    sys = CashierSystem()
+    # Statistik hanya berubah kalau ada transaksi baru (atau ganti hari)
+    etag, version_time = data_validators(f"stats-{period}-{date.today().isoformat()}", 'transaction')
+    cached = not_modified(etag, version_time)
+    if cached:
+        stats_cache.record('hit')
+        return cached
     
-    try:
-        cursor = sys.db.cursor(dictionary=True)
-        start_str = start_date.strftime('%Y-%m-%d %H:%M:%S')
-        end_str = end_date.strftime('%Y-%m-%d %H:%M:%S')
-        
-        sql = """
-        SELECT * FROM transaction_history 
-        WHERE transaction_date BETWEEN %s AND %s
-        ORDER BY transaction_date DESC
-        """
-        cursor.execute(sql, (start_str, end_str))
-        transactions = cursor.fetchall()
-        
-        total_revenue = sum(t['total_amount'] for t in transactions)
-        total_transactions = len(transactions)
-        avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
-        
-        total_products = 0
-        for t in transactions:
-            try:
-                details = json.loads(t['details'])
-                total_products += sum(item.get('qty', 0) for item in details)
-            except:
-                pass
-        
-        sales_by_day = {}
-        for t in transactions:
-            date_key = t['transaction_date'].strftime('%d/%m') if isinstance(t['transaction_date'], datetime) else t['transaction_date'][:10]
-            sales_by_day[date_key] = sales_by_day.get(date_key, 0) + t['total_amount']
-        
-        transaction_types = {'biasa': 0, 'lelang': 0}
-        for t in transactions:
-            transaction_types[t['transaction_type']] += 1
-        
-        product_sales = {}
-        for t in transactions:
-            try:
-                details = json.loads(t['details'])
-                for item in details:
-                    product_key = item.get('name', f"SKU:{item.get('sku')}")
-                    if product_key not in product_sales:
-                        product_sales[product_key] = {'sold': 0, 'revenue': 0}
-                    product_sales[product_key]['sold'] += item.get('qty', 0)
-                    product_sales[product_key]['revenue'] += item.get('subtotal', 0)
-            except:
-                pass
-        
-        top_products = sorted(
-            [{'name': k, 'sold': v['sold'], 'revenue': v['revenue']} 
-             for k, v in product_sales.items()],
-            key=lambda x: x['sold'],
-            reverse=True
-        )[:5]
-        
-        recent_transactions = []
-        for t in transactions[:10]:
-            time_ago = get_time_ago(t['transaction_date'])
-            recent_transactions.append({
-                'transaction_id': t['transaction_id'],
-                'username': t['username'],
-                'total_amount': t['total_amount'],
-                'time_ago': time_ago
+    entry = stats_cache.get(period)
+    if entry and entry['fresh']:
+        stats_cache.record('hit')
+    else:
+        stats_cache.record('stale' if entry else 'miss')
+        # dedup_key per periode + versi data: serbuan refresh dashboard cuma memicu satu
+        # hitungan, tapi task untuk versi lama tidak dipakai ulang di bawah etag baru
+        task_id = tasks.enqueue(
+            'stats', {'period': period, 'etag': etag, 'fresh_after': version_time},
+            max_attempts=1, dedup_key=f"stats:{period}:{etag}"
+        )
+        if not entry:
+            response = jsonify({
+                "task_id": task_id,
+                "status_url": url_for('api_task_status', task_id=task_id)
             })
-        
-        stats = {
-            'summary': {
-                'total_revenue': float(total_revenue),
-                'total_transactions': total_transactions,
-                'avg_transaction': float(avg_transaction),
-                'total_products_sold': total_products
-            },
-            'charts': {
-                'sales_trend': {
-                    'labels': list(sales_by_day.keys()),
-                    'data': list(sales_by_day.values())
-                },
-                'transaction_types': {
-                    'labels': ['Biasa', 'Lelang'],
-                    'data': [transaction_types['biasa'], transaction_types['lelang']]
-                }
-            },
-            'tables': {
-                'top_products': top_products,
-                'recent_transactions': recent_transactions
-            }
-        }
-        
-        return jsonify(stats)
-        
-    except Exception as e:
-        print(f"Error getting stats: {e}")
-        return jsonify({"error": str(e)}), 500
-    finally:
-        sys.close()
-
-# ============================================
-# API ENDPOINTS - BARCODE MANAGEMENT
-# ============================================
+            response.status_code = 202
+            return set_validators(response, etag, version_time)
+    
+    # Client sudah punya entri yang sama (walau basi): tidak perlu kirim ulang body
+    cached = not_modified(entry['etag'])
+    if not cached:
+        cached = set_validators(Response(entry['result'], mimetype='application/json'), entry['etag'])
+    cached.headers['X-Cache'] = 'hit' if entry['fresh'] else 'stale'
+    return cached
 
-@app.route("/api/products/for_barcode")
-def api_products_for_barcode():
-    """Get all products for barcode dropdown - FIXED"""
-    if not session.get('user_id'):
+@app.route("/api/analytics")
+def api_analytics():
+    """
+    Laporan rentang bebas dengan pembanding periode sebelumnya.
+    ?month=YYYY-MM (dibanding bulan lalu) atau ?start=YYYY-MM-DD&end=YYYY-MM-DD,
+    &bucket=hour|day|week, &top=N
+    """
+    if session.get('role') != 'admin':
         return jsonify({"error": "Unauthorized"}), 401
+    if not NUMPY_AVAILABLE:
+        return jsonify({"error": "NumPy tidak terinstall. Install: pip install numpy"}), 501
+    
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ANALYTICS_BUCKETS:
+        bucket = 'day'
     
+    previous_start = None
     try:
-        import mysql.connector
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='db_kasir1'
-        )
-        sys = CashierSystem()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get ALL products (biasa + lelang)
-        products = []
-        
-        # Get regular products
-        cursor.execute("""
-            SELECT 
-                no_SKU as sku, 
-                Name_product as name, 
-                Price as price,
-                'biasa' as type,
-                CASE 
-                    WHEN barcode_image IS NOT NULL AND barcode_image != '' THEN 1
-                    ELSE 0 
-                END as has_barcode
-            FROM produk_biasa 
-            ORDER BY Name_product
-        """)
-        regular = cursor.fetchall()
-        products.extend(regular)
-        
-        # Get auction products
-        cursor.execute("""
-            SELECT 
-                no_SKU as sku, 
-                Name_product as name, 
-                Price as price,
-                'lelang' as type,
-                CASE 
-                    WHEN barcode_image IS NOT NULL AND barcode_image != '' THEN 1
-                    ELSE 0 
-                END as has_barcode
-            FROM produk_lelang 
-            ORDER BY Name_product
-        """)
-        auction = cursor.fetchall()
-        products.extend(auction)
-        
-        cursor.close()
-        conn.close()
-        
-        print(f"[DEBUG] Found {len(products)} products for barcode dropdown")
-        
-        return jsonify({
-            "success": True,
-            "products": products,
-            "count": len(products)
-        })
-        
-    except Exception as e:
-        print(f"[ERROR] api_products_for_barcode: {str(e)}")
-        return jsonify({"success": False, "error": str(e)}), 500
-    finally:
-        cursor.close()
-        sys.close()
-
-@app.route("/api/barcode/<sku>/image")
-def get_barcode_image(sku):
-    """Get existing barcode image"""
-    sys = CashierSystem()
-    cursor = sys.db.cursor(dictionary=True)
+        top = min(max(int(request.args.get('top', 10)), 1), 100)
+        if request.args.get('month'):
+            start_date = datetime.strptime(request.args['month'], '%Y-%m')
+            end_date = (start_date + timedelta(days=32)).replace(day=1)
+            previous_start = (start_date - timedelta(days=1)).replace(day=1)
+        else:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            start_date = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else today.replace(day=1)
+            # Tanggal akhir inklusif
+            end_date = (datetime.strptime(request.args['end'], '%Y-%m-%d') if request.args.get('end') else today) + timedelta(days=1)
+    except ValueError:
+        return jsonify({"error": "Format tanggal salah (month=YYYY-MM, start/end=YYYY-MM-DD)"}), 400
     
+    if end_date <= start_date:
+        return jsonify({"error": "Tanggal akhir harus setelah tanggal awal"}), 400
+    
+    sys = read_system()
     try:
-        # Check in produk_biasa
-        cursor.execute("""
-            SELECT barcode_image 
-            FROM produk_biasa 
-            WHERE no_SKU = %s AND barcode_image IS NOT NULL
-        """, (sku,))
-        result = cursor.fetchone()
-        
-        if not result:
-            # Check in produk_lelang
-            cursor.execute("""
-                SELECT barcode_image 
-                FROM produk_lelang 
-                WHERE no_SKU = %s AND barcode_image IS NOT NULL
-            """, (sku,))
-            result = cursor.fetchone()
-        
-        if result and result['barcode_image']:
-            return jsonify({
-                "success": True,
-                "barcode": result['barcode_image']
-            })
-        
-        return jsonify({"success": False, "message": "Barcode tidak ditemukan"})
-            
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        with statement_timeout(sys.db, 'report', cancel_when=disconnect_check()):
+            return jsonify(compute_range_report(sys.db, start_date, end_date, bucket, top, previous_start))
     finally:
-        cursor.close()
         sys.close()
 
-@app.route("/api/barcode/generate_all", methods=['POST'])
-def generate_all_barcodes():
-    """Generate barcode untuk semua produk yang belum punya"""
+@app.route("/api/top_products")
+def api_top_products():
+    """Produk terlaris real-time dari sketch top-K (tanpa scan history)"""
     if session.get('role') != 'admin':
         return jsonify({"error": "Unauthorized"}), 401
     
+    period = request.args.get('period', 'today')
+    if period not in ('today', 'week', 'month'):
+        period = 'today'
     try:
-        import mysql.connector
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='db_kasir1'
-        )
-        generate_barcode_for_product = sys.generate_barcode_for_product  # Reuse existing function
-        cursor = conn.cursor(dictionary=True)
-        
-        # Cari produk tanpa barcode
-        cursor.execute("""
-            SELECT no_SKU, Name_product, Price 
-            FROM produk_biasa 
-            WHERE barcode_image IS NULL OR barcode_image = ''
-        """)
-        biasa = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT no_SKU, Name_product, Price 
-            FROM produk_lelang 
-            WHERE barcode_image IS NULL OR barcode_image = ''
-        """)
-        lelang = cursor.fetchall()
-        
-        all_products = biasa + lelang
-        generated = 0
-        
-        # Generate barcode untuk setiap produk
-        for product in all_products:
-            try:
-                # Panggil fungsi generate barcode
-                barcode_data = generate_barcode_for_product(product['no_SKU'])
-                if barcode_data:
-                    generated += 1
-            except:
-                continue
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            "success": True,
-            "message": f"Generated {generated} barcodes from {len(all_products)} products",
-            "total": len(all_products),
-            "generated": generated
-        })
-        
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        limit = min(max(int(request.args.get('limit', 5)), 1), 50)
+    except ValueError:
+        limit = 5
+    
+    return jsonify(topk.top_products(period, limit))
 
-@app.route("/api/barcode/status")
-def api_barcode_status():
-    """Get barcode generation status"""
-    if not session.get('user_id'):
+@app.route("/api/stats/metrics")
+def api_stats_metrics():
+    """Hit ratio cache statistik dan latensi hitung ulang"""
+    if session.get('role') != 'admin':
         return jsonify({"error": "Unauthorized"}), 401
-    
-    sys = CashierSystem()
-    cursor = sys.db.cursor(dictionary=True)
-    
-    try:
-        # Count total products
-        cursor.execute("SELECT COUNT(*) as total FROM produk_biasa")
-        regular_total = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM produk_lelang")
-        auction_total = cursor.fetchone()['total']
-        total_products = regular_total + auction_total
-        
-        # Count with barcode
-        cursor.execute("""
-            SELECT COUNT(*) as count 
-            FROM produk_biasa 
-            WHERE barcode_image IS NOT NULL AND barcode_image != ''
-        """)
-        regular_with = cursor.fetchone()['count']
-        
-        cursor.execute("""
-            SELECT COUNT(*) as count 
-            FROM produk_lelang 
-            WHERE barcode_image IS NOT NULL AND barcode_image != ''
-        """)
-        auction_with = cursor.fetchone()['count']
-        total_with = regular_with + auction_with
-        
-        # Calculate progress
-        progress = round((total_with / total_products * 100), 2) if total_products > 0 else 0
-        
-        return jsonify({
-            "success": True,
-            "status": {
-                "total_products": total_products,
-                "with_barcode": total_with,
-                "without_barcode": total_products - total_with,
-                "progress_percentage": progress
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
-    finally:
-        cursor.close()
-        sys.close()
+    return jsonify(stats_cache.metrics())
+
+@app.route("/api/cache/metrics")
+def api_cache_metrics():
+    """Statistik cache per worker yang melayani request ini (hit, invalidasi)"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    snapshot = catalog_snapshot.current()
+    return jsonify({
+        "pid": os.getpid(),
+        "caches": local_cache.stats(),
+        "catalog_snapshot": snapshot.info() if snapshot else None
+    })
+
+@app.route("/api/admission/metrics")
+def api_admission_metrics():
+    """Request per kelas prioritas di worker ini: berjalan, antri, diterima, ditolak (503)"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify({"pid": os.getpid(), **admission.stats()})
 
 @app.route("/admin/history/monthly")
 def admin_monthly_report():
@@ -850,353 +1111,52 @@ def admin_monthly_report():
     year = request.args.get('year', datetime.now().year)
     month = request.args.get('month', datetime.now().month)
     
-    sys = CashierSystem()
-    report = sys.transaction.history.get_monthly_report(year, month)
-    sys.close()
+    sys = read_system()
+    try:
+        with statement_timeout(sys.db, 'report', cancel_when=disconnect_check()):
+            report = sys.transaction.history.get_monthly_report(year, month)
+    finally:
+        sys.close()
     
     return jsonify(report)
 
 # ============================================
-# API ENDPOINTS - BARCODE FEATURES
+# API ENDPOINTS - BARCODE (LAZY)
 # ============================================
+# View barcode admin ada di barcode_admin.py dan baru diimpor (beserta code128/Pillow)
+# saat salah satu endpoint-nya pertama kali dipanggil. Flask tidak mengizinkan
+# blueprint didaftarkan setelah request pertama, jadi URL rule tetap didaftarkan
+# di sini (murah) dan hanya modul view-nya yang ditunda.
 
-@app.route("/api/barcode/<sku>")
-def generate_barcode(sku):
-    """Generate barcode image untuk produk"""
-    try:
-        sys = CashierSystem()
-        cursor = sys.db.cursor(dictionary=True)
-        
-        # Cek apakah produk ada
-        cursor.execute("SELECT no_SKU, Name_product, Price FROM produk_biasa WHERE no_SKU = %s", (sku,))
-        product = cursor.fetchone()
-        
-        if not product:
-            # Cek di produk lelang
-            cursor.execute("SELECT no_SKU, Name_product, Price FROM produk_lelang WHERE no_SKU = %s", (sku,))
-            product = cursor.fetchone()
-        
-        if not product:
-            cursor.close()
-            sys.close()
-            return jsonify({
-                "success": False,
-                "message": f"Produk dengan SKU {sku} tidak ditemukan"
-            }), 404
-        
-        # Cek apakah barcode sudah ada di database
-        try:
-            cursor.execute("SELECT barcode_image FROM produk_biasa WHERE no_SKU = %s AND barcode_image IS NOT NULL", (sku,))
-            result = cursor.fetchone()
-            
-            if result and result['barcode_image']:
-                # Barcode sudah ada di database
-                cursor.close()
-                sys.close()
-                return jsonify({
-                    "success": True,
-                    "sku": sku,
-                    "barcode": result['barcode_image'],
-                    "cached": True,
-                    "product": product
-                })
-        except:
-            pass  # Kolom mungkin belum ada
-        
-        # Generate barcode baru
-        if not BARCODE_AVAILABLE:
-            cursor.close()
-            sys.close()
-            return jsonify({
-                "success": False,
-                "message": "Library barcode tidak terinstall. Install: pip install python-barcode"
-            }), 500
-        
-        # Gunakan Code128 format
-        code128 = barcode.get_barcode_class('code128')
-        barcode_instance = code128(str(sku), writer=ImageWriter())
-        
-        # Save ke bytes
-        buffer = BytesIO()
-        barcode_instance.write(buffer)
-        buffer.seek(0)
-        
-        # Convert ke base64
-        barcode_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        barcode_data = f"data:image/png;base64,{barcode_base64}"
-        
-        # Simpan ke database
-        try:
-            # Coba update produk biasa
-            cursor.execute("""
-                UPDATE produk_biasa 
-                SET barcode_image = %s 
-                WHERE no_SKU = %s
-            """, (barcode_data, sku))
-            
-            # Coba update produk lelang
-            cursor.execute("""
-                UPDATE produk_lelang 
-                SET barcode_image = %s 
-                WHERE no_SKU = %s
-            """, (barcode_data, sku))
-            
-            sys.db.commit()
-        except Exception as e:
-            print(f"Warning: Could not save barcode to database: {e}")
-            # Lanjutkan saja, mungkin kolom belum ada
-        
-        cursor.close()
-        sys.close()
-        
-        return jsonify({
-            "success": True,
-            "sku": sku,
-            "barcode": barcode_data,
-            "cached": False,
-            "product": product
-        })
-        
-    except Exception as e:
-        print(f"Error generating barcode: {e}")
-        return jsonify({
-            "success": False,
-            "message": f"Error: {str(e)}"
-        }), 500
+class LazyView:
+    """View 'modul.fungsi' yang modulnya diimpor saat pertama kali dipanggil"""
 
-@app.route("/api/barcode/<sku>/download")
-def download_barcode(sku):
-    """Download barcode as PNG file"""
-    try:
-        if not BARCODE_AVAILABLE:
-            return jsonify({
-                "success": False,
-                "message": "Library barcode tidak terinstall"
-            }), 500
-        
-        # Generate barcode
-        code128 = barcode.get_barcode_class('code128')
-        barcode_instance = code128(str(sku), writer=ImageWriter())
-        
-        # Save to bytes
-        buffer = BytesIO()
-        barcode_instance.write(buffer)
-        buffer.seek(0)
-        
-        # Return as downloadable file
-        return send_file(
-            buffer,
-            mimetype='image/png',
-            as_attachment=True,
-            download_name=f'barcode_{sku}.png'
-        )
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
 
-@app.route("/api/barcode/status/<sku>")
-def check_barcode_status(sku):
-    """Cek status barcode produk"""
-    if not session.get('user_id'):
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    sys = CashierSystem()
-    cursor = sys.db.cursor(dictionary=True)
-    
-    try:
-        # Cek di produk biasa
-        cursor.execute("""
-            SELECT no_SKU, Name_product, barcode_image 
-            FROM produk_biasa 
-            WHERE no_SKU = %s
-        """, (sku,))
-        
-        result = cursor.fetchone()
-        
-        if not result:
-            # Cek di produk lelang
-            cursor.execute("""
-                SELECT no_SKU, Name_product, barcode_image 
-                FROM produk_lelang 
-                WHERE no_SKU = %s
-            """, (sku,))
-            result = cursor.fetchone()
-        
-        if not result:
-            return jsonify({
-                "success": False,
-                "message": "Produk tidak ditemukan"
-            }), 404
-        
-        has_barcode = result['barcode_image'] is not None and result['barcode_image'] != ''
-        
-        return jsonify({
-            "success": True,
-            "sku": sku,
-            "product_name": result['Name_product'],
-            "has_barcode": has_barcode,
-            "message": "Produk sudah memiliki barcode" if has_barcode else "Produk belum memiliki barcode"
-        })
-            
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
-    finally:
-        cursor.close()
-        sys.close()
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
 
-@app.route("/api/products/without_barcode")
-def api_products_without_barcode():
-    """Get all products without barcode"""
-    if session.get('role') != 'admin':
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    sys = CashierSystem()
-    cursor = sys.db.cursor(dictionary=True)
-    
-    try:
-        # Get products without barcode from produk_biasa
-        cursor.execute("""
-            SELECT no_SKU, Name_product, Price, stok 
-            FROM produk_biasa 
-            WHERE barcode_image IS NULL OR barcode_image = ''
-        """)
-        regular = cursor.fetchall()
-        
-        # Get products without barcode from produk_lelang
-        cursor.execute("""
-            SELECT no_SKU, Name_product, Price 
-            FROM produk_lelang 
-            WHERE barcode_image IS NULL OR barcode_image = ''
-        """)
-        auction = cursor.fetchall()
-        
-        products = []
-        for p in regular:
-            products.append({
-                'no_SKU': p['no_SKU'],
-                'Name_product': p['Name_product'],
-                'Price': p['Price'],
-                'type': 'biasa',
-                'stok': p['stok']
-            })
-        
-        for p in auction:
-            products.append({
-                'no_SKU': p['no_SKU'],
-                'Name_product': p['Name_product'],
-                'Price': p['Price'],
-                'type': 'lelang',
-                'stok': None
-            })
-        
-        return jsonify(products)
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        sys.close()
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+BARCODE_ADMIN_ROUTES = (
+    ("/api/products/for_barcode", 'api_products_for_barcode', ['GET']),
+    ("/api/barcode/<sku>/image", 'get_barcode_image', ['GET']),
+    ("/api/barcode/generate_all", 'generate_all_barcodes', ['POST']),
+    ("/api/barcode/status", 'api_barcode_status', ['GET']),
+    ("/api/barcode/<sku>", 'generate_barcode', ['GET']),
+    ("/api/barcode/<sku>/download", 'download_barcode', ['GET']),
+    ("/api/barcode/status/<sku>", 'check_barcode_status', ['GET']),
+    ("/api/products/without_barcode", 'api_products_without_barcode', ['GET']),
+    ("/api/print_barcode/<sku>", 'print_barcode_label', ['GET']),
+)
+
+for rule, endpoint, methods in BARCODE_ADMIN_ROUTES:
+    app.add_url_rule(rule, endpoint, LazyView(f"barcode_admin.{endpoint}"), methods=methods)
 
-@app.route("/api/print_barcode/<sku>")
-def print_barcode_label(sku):
-    """Generate printable barcode label"""
-    if session.get('role') != 'admin':
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    sys = CashierSystem()
-    cursor = sys.db.cursor(dictionary=True)
-    
-    try:
-        # Ambil data produk
-        cursor.execute("SELECT Name_product, Price FROM produk_biasa WHERE no_SKU = %s", (sku,))
-        product = cursor.fetchone()
-        
-        if not product:
-            cursor.execute("SELECT Name_product, Price FROM produk_lelang WHERE no_SKU = %s", (sku,))
-            product = cursor.fetchone()
-        
-        if not product:
-            return jsonify({"error": "Produk tidak ditemukan"}), 404
-        
-        # Generate barcode URL
-        barcode_url = f"https://barcode.tec-it.com/barcode.ashx?data={sku}&code=Code128&dpi=96"
-        
-        # HTML untuk label barcode
-        html_label = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Barcode Label - {sku}</title>
-            <style>
-                @media print {{
-                    body {{ margin: 0; padding: 0; }}
-                    .label {{ page-break-inside: avoid; }}
-                }}
-                body {{ font-family: Arial, sans-serif; padding: 10px; }}
-                .label {{ 
-                    width: 3in; 
-                    height: 1.5in; 
-                    border: 1px solid #000; 
-                    padding: 8px;
-                    margin: 5px;
-                    display: inline-block;
-                    vertical-align: top;
-                    box-sizing: border-box;
-                }}
-                .product-name {{ 
-                    font-size: 12px; 
-                    font-weight: bold; 
-                    margin-bottom: 3px;
-                    height: 30px;
-                    overflow: hidden;
-                }}
-                .sku {{ 
-                    font-size: 10px; 
-                    color: #666;
-                    margin-bottom: 3px;
-                }}
-                .price {{ 
-                    font-size: 14px; 
-                    font-weight: bold; 
-                    color: #d00;
-                    margin-bottom: 5px;
-                }}
-                .barcode {{ 
-                    margin: 3px 0;
-                    text-align: center;
-                }}
-                .print-info {{
-                    font-size: 8px; 
-                    text-align: center;
-                    color: #666;
-                    margin-top: 3px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="label">
-                <div class="product-name">{product['Name_product'][:25]}</div>
-                <div class="sku">SKU: {sku}</div>
-                <div class="price">Rp{int(product['Price']):,}</div>
-                <div class="barcode">
-                    <img src="{barcode_url}" 
-                         alt="Barcode {sku}" 
-                         width="180" 
-                         height="40">
-                </div>
-                <div class="print-info">JustCani POS System</div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return html_label
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        sys.close()
 
 # ============================================
 # ERROR HANDLERS
@@ -1225,7 +1185,7 @@ if __name__ == '__main__':
     
     print("=" * 50)
     print("🚀 JustCani POS System Starting...")
-    print(f"📦 Barcode Support: {'✅ Enabled' if BARCODE_AVAILABLE else '⚠️ Not Available'}")
+    print(f"📦 Barcode Support: {'✅ PNG + SVG' if PILLOW_AVAILABLE else '✅ SVG (Pillow tidak ada)'}")
     print(f"🖼️  Image Support: {'✅ Enabled' if PILLOW_AVAILABLE else '⚠️ Not Available'}")
     print("=" * 50)
     
@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+# Minifier & brotli opsional; tanpa itu tetap jalan dengan minifier konservatif + gzip
+try:
+    import rcssmin
+    import rjsmin
+    MINIFIER_AVAILABLE = True
+except ImportError:
+    MINIFIER_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# ============================================
+# ASET STATIS: FINGERPRINT + PRECOMPRESS
+# ============================================
+# css/js di static/ diminify, diberi hash isi di nama file lalu ditulis ke
+# static/dist/ bersama versi .gz dan .br. url_for('static', filename='css/style.css')
+# otomatis menunjuk ke versi dist (app.py), yang dikirim dengan cache immutable:
+# terminal kasir tidak perlu request aset statis lagi sampai isinya berubah.
+#
+# Build: `python assets.py build`, atau otomatis saat app start kalau belum ada /
+# sumbernya berubah. Perubahan file saat server jalan baru terlihat setelah restart.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+ASSET_EXTENSIONS = ('.css', '.js')
+# Folder di static/ yang bukan aset sumber
+SKIP_DIRS = ('dist', 'uploads')
+
+# Urutan preferensi server kalau client menerima beberapa encoding
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _sources():
+    """Path relatif (pakai '/') semua css/js sumber di static/"""
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if root == STATIC_DIR:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS) and not name.endswith(('.min.css', '.min.js')):
+                yield os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/')
+
+
+def _minify_css(text):
+    if MINIFIER_AVAILABLE:
+        return rcssmin.cssmin(text)
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+
+def _minify_js(text):
+    """
+    Tanpa rjsmin: hanya buang indentasi, baris kosong dan baris komentar '//'.
+    Baris baru dipertahankan (ASI) dan isi template literal multi-baris tidak disentuh.
+    """
+    if MINIFIER_AVAILABLE:
+        return rjsmin.jsmin(text)
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        if not in_template:
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+        lines.append(line)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+def minify(name, text):
+    return _minify_css(text) if name.endswith('.css') else _minify_js(text)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def _minified(name):
+    """(isi minified, nama dist relatif static/ dengan hash isi)"""
+    with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+        data = minify(name, f.read()).encode('utf-8')
+    base, ext = os.path.splitext(name)
+    return data, f"dist/{base}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _build_one(name):
+    """Tulis versi fingerprint (+ .gz/.br) satu aset, return (nama dist, ukuran per varian)"""
+    data, dist_name = _minified(name)
+    path = os.path.join(STATIC_DIR, dist_name)
+
+    variants = {'identity': data}
+    # mtime=0: isi .gz identik di setiap build/worker
+    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+    if BROTLI_AVAILABLE:
+        variants['br'] = brotli.compress(data, quality=11)
+
+    # Nama berisi hash isi: kalau file sudah ada, isinya pasti sama
+    for encoding, suffix in (('identity', ''),) + ENCODINGS:
+        if encoding in variants and not os.path.exists(path + suffix):
+            _write_atomic(path + suffix, variants[encoding])
+    return dist_name, {encoding: len(body) for encoding, body in variants.items()}
+
+
+def build(clean=False):
+    """
+    Build semua aset dan tulis manifest {nama sumber: nama dist}.
+    clean=True menghapus hasil build lama yang tidak dipakai manifest baru
+    (jangan saat worker versi lama mungkin masih melayani halaman).
+    """
+    manifest = {}
+    sizes = {}
+    for name in _sources():
+        manifest[name], sizes[name] = _build_one(name)
+
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    if clean:
+        keep = {MANIFEST_PATH}
+        for dist_name in manifest.values():
+            path = os.path.join(STATIC_DIR, dist_name)
+            keep.update(path + suffix for suffix in ('', '.gz', '.br'))
+        for root, _, files in os.walk(DIST_DIR):
+            for name in files:
+                path = os.path.join(root, name)
+                if path not in keep:
+                    os.remove(path)
+    return manifest, sizes
+
+
+def load_manifest(rebuild=True):
+    """
+    Manifest untuk url_for; build dulu kalau belum ada atau sumber berubah.
+    Return {} (aset dilayani apa adanya dari static/) kalau static/ tidak bisa ditulis.
+    rebuild=False (serverless): pakai manifest hasil `python assets.py build` saat deploy
+    apa adanya, tanpa cek ulang sumber di setiap cold start.
+    """
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if not rebuild:
+            return manifest
+        # Hash sumber dihitung ulang (murah: cuma beberapa file) supaya edit css/js ikut ter-build
+        if manifest == {name: _minified(name)[1] for name in _sources()} and all(
+            os.path.exists(os.path.join(STATIC_DIR, dist_name)) for dist_name in manifest.values()
+        ):
+            return manifest
+    except (OSError, ValueError):
+        if not rebuild:
+            return {}
+
+    try:
+        return build()[0]
+    except OSError as e:
+        print(f"⚠️ Build aset statis gagal ({e}), css/js dilayani tanpa fingerprint")
+        return {}
+
+
+def negotiate(filename, accept_encodings):
+    """
+    (nama file di DIST_DIR, Content-Encoding atau None) terbaik untuk request ini.
+    accept_encodings: request.accept_encodings (werkzeug).
+    """
+    path = os.path.join(DIST_DIR, filename)
+    available = [encoding for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)]
+    best = accept_encodings.best_match(available + ['identity'], default='identity')
+    if best == 'identity':
+        return filename, None
+    return filename + dict(ENCODINGS)[best], best
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command != 'build':
+        print("Pemakaian: python assets.py build")
+        sys.exit(1)
+    manifest, sizes = build(clean=True)
+    print(f"📦 {len(manifest)} aset ({'rjsmin/rcssmin' if MINIFIER_AVAILABLE else 'minifier bawaan'}, "
+          f"{'gzip + brotli' if BROTLI_AVAILABLE else 'gzip saja, pip install brotli untuk .br'})")
+    for name, dist_name in manifest.items():
+        original = os.path.getsize(os.path.join(STATIC_DIR, name))
+        variants = '  '.join(f"{encoding} {size / 1024:.1f} KB" for encoding, size in sizes[name].items())
+        print(f"  {name} ({original / 1024:.1f} KB) -> {dist_name}  [{variants}]")
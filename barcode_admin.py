@@ -0,0 +1,529 @@
+import itertools
+from io import BytesIO
+
+from flask import current_app, jsonify, request, send_file, session
+
+import code128
+import events
+import fastjson
+import local_cache
+import tasks
+from app import cached_read
+from db_backend import DatabaseUnavailable
+from logic import CashierSystem
+
+# ============================================
+# API ENDPOINTS - BARCODE MANAGEMENT
+# ============================================
+# Endpoint admin barcode: jarang dipakai, jadi modul ini (dan code128/Pillow) baru
+# diimpor saat salah satu endpoint-nya pertama kali dipanggil (LazyView di app.py).
+# URL rule-nya didaftarkan di app.py, BARCODE_ADMIN_ROUTES.
+
+# Dropdown & status barcode per worker, dikosongkan otomatis kalau katalog berubah
+barcode_cache = local_cache.VersionedCache('barcode', ('catalog',), maxsize=4)
+
+def products_for_barcode(sys):
+    """Semua produk (biasa + lelang) untuk dropdown barcode"""
+    cursor = sys.db.cursor(dictionary=True)
+    try:
+        # Get ALL products (biasa + lelang)
+        products = []
+        
+        # Get regular products
+        cursor.execute("""
+            SELECT 
+                no_SKU as sku, 
+                Name_product as name, 
+                Price as price,
+                'biasa' as type,
+                CASE 
+                    WHEN barcode_image IS NOT NULL AND barcode_image != '' THEN 1
+                    ELSE 0 
+                END as has_barcode
+            FROM produk_biasa 
+            ORDER BY Name_product
+        """)
+        regular = cursor.fetchall()
+        products.extend(regular)
+        
+        # Get auction products
+        cursor.execute("""
+            SELECT 
+                no_SKU as sku, 
+                Name_product as name, 
+                Price as price,
+                'lelang' as type,
+                CASE 
+                    WHEN barcode_image IS NOT NULL AND barcode_image != '' THEN 1
+                    ELSE 0 
+                END as has_barcode
+            FROM produk_lelang 
+            ORDER BY Name_product
+        """)
+        auction = cursor.fetchall()
+        products.extend(auction)
+        return products
+    finally:
+        cursor.close()
+
+def api_products_for_barcode():
+    """Get all products for barcode dropdown - FIXED"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    try:
+        products = cached_read(barcode_cache, 'products', products_for_barcode, category='batch')
+        if products is None:
+            return jsonify({"success": False, "error": "Database tidak terhubung"}), 503
+        
+        print(f"[DEBUG] Found {len(products)} products for barcode dropdown")
+        
+        # Semua produk: dikirim per chunk, tidak dirakit jadi satu body besar dulu
+        chunks = itertools.chain(
+            [b'{"success":true,"count":%d,"products":' % len(products)],
+            fastjson.iter_json_list(products),
+            [b'}']
+        )
+        return fastjson.stream_response(chunks, request.accept_encodings, current_app.response_class)
+        
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f"[ERROR] api_products_for_barcode: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def get_barcode_image(sku):
+    """Get existing barcode image"""
+    sys = CashierSystem(required=True)
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Check in produk_biasa
+        cursor.execute("""
+            SELECT barcode_image 
+            FROM produk_biasa 
+            WHERE no_SKU = %s AND barcode_image IS NOT NULL
+        """, (sku,))
+        result = cursor.fetchone()
+        
+        if not result:
+            # Check in produk_lelang
+            cursor.execute("""
+                SELECT barcode_image 
+                FROM produk_lelang 
+                WHERE no_SKU = %s AND barcode_image IS NOT NULL
+            """, (sku,))
+            result = cursor.fetchone()
+        
+        if result and result['barcode_image']:
+            return jsonify({
+                "success": True,
+                "barcode": result['barcode_image']
+            })
+        
+        return jsonify({"success": False, "message": "Barcode tidak ditemukan"})
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    finally:
+        cursor.close()
+        sys.close()
+
+def generate_all_barcodes():
+    """Generate barcode untuk semua produk yang belum punya (lewat task worker)"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    sys = CashierSystem(required=True)
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Cari produk tanpa barcode
+        cursor.execute("""
+            SELECT no_SKU FROM produk_biasa 
+            WHERE barcode_image IS NULL OR barcode_image = ''
+            UNION
+            SELECT no_SKU FROM produk_lelang 
+            WHERE barcode_image IS NULL OR barcode_image = ''
+        """)
+        skus = [row['no_SKU'] for row in cursor.fetchall()]
+        
+        task_ids = tasks.enqueue_barcodes(skus)
+        
+        return jsonify({
+            "success": True,
+            "message": f"{len(skus)} barcode masuk antrian",
+            "total": len(skus),
+            "generated": 0,
+            "task_ids": task_ids
+        })
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    finally:
+        cursor.close()
+        sys.close()
+
+def api_barcode_status():
+    """Get barcode generation status"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    try:
+        status = cached_read(barcode_cache, 'status', barcode_status)
+        if status is None:
+            return jsonify({"success": False, "error": "Database tidak terhubung"}), 503
+        return jsonify({"success": True, "status": status})
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def barcode_status(sys):
+    """Jumlah produk dengan/tanpa barcode"""
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Count total products
+        cursor.execute("SELECT COUNT(*) as total FROM produk_biasa")
+        regular_total = cursor.fetchone()['total']
+        
+        cursor.execute("SELECT COUNT(*) as total FROM produk_lelang")
+        auction_total = cursor.fetchone()['total']
+        total_products = regular_total + auction_total
+        
+        # Count with barcode
+        cursor.execute("""
+            SELECT COUNT(*) as count 
+            FROM produk_biasa 
+            WHERE barcode_image IS NOT NULL AND barcode_image != ''
+        """)
+        regular_with = cursor.fetchone()['count']
+        
+        cursor.execute("""
+            SELECT COUNT(*) as count 
+            FROM produk_lelang 
+            WHERE barcode_image IS NOT NULL AND barcode_image != ''
+        """)
+        auction_with = cursor.fetchone()['count']
+        total_with = regular_with + auction_with
+        
+        # Calculate progress
+        progress = round((total_with / total_products * 100), 2) if total_products > 0 else 0
+        
+        return {
+            "total_products": total_products,
+            "with_barcode": total_with,
+            "without_barcode": total_products - total_with,
+            "progress_percentage": progress
+        }
+    finally:
+        cursor.close()
+
+# ============================================
+# API ENDPOINTS - BARCODE FEATURES
+# ============================================
+
+def generate_barcode(sku):
+    """Generate barcode image untuk produk"""
+    try:
+        sys = CashierSystem(required=True)
+        cursor = sys.db.cursor(dictionary=True)
+        
+        # Cek apakah produk ada
+        cursor.execute("SELECT no_SKU, Name_product, Price FROM produk_biasa WHERE no_SKU = %s", (sku,))
+        product = cursor.fetchone()
+        
+        if not product:
+            # Cek di produk lelang
+            cursor.execute("SELECT no_SKU, Name_product, Price FROM produk_lelang WHERE no_SKU = %s", (sku,))
+            product = cursor.fetchone()
+        
+        if not product:
+            cursor.close()
+            sys.close()
+            return jsonify({
+                "success": False,
+                "message": f"Produk dengan SKU {sku} tidak ditemukan"
+            }), 404
+        
+        # Cek apakah barcode sudah ada di database
+        try:
+            cursor.execute("SELECT barcode_image FROM produk_biasa WHERE no_SKU = %s AND barcode_image IS NOT NULL", (sku,))
+            result = cursor.fetchone()
+            
+            if result and result['barcode_image']:
+                # Barcode sudah ada di database
+                cursor.close()
+                sys.close()
+                return jsonify({
+                    "success": True,
+                    "sku": sku,
+                    "barcode": result['barcode_image'],
+                    "cached": True,
+                    "product": product
+                })
+        except:
+            pass  # Kolom mungkin belum ada
+        
+        # Generate barcode baru (Code128, PNG; SVG kalau Pillow tidak ada)
+        barcode_data = code128.png_data_uri(sku)
+        
+        # Simpan ke database
+        try:
+            # Coba update produk biasa
+            cursor.execute("""
+                UPDATE produk_biasa 
+                SET barcode_image = %s 
+                WHERE no_SKU = %s
+            """, (barcode_data, sku))
+            
+            # Coba update produk lelang
+            cursor.execute("""
+                UPDATE produk_lelang 
+                SET barcode_image = %s 
+                WHERE no_SKU = %s
+            """, (barcode_data, sku))
+            
+            sys.db.commit()
+            # has_barcode di cache katalog/ETag /api/products ikut berubah (sama seperti barcode_task)
+            events.bump('catalog')
+        except Exception as e:
+            print(f"Warning: Could not save barcode to database: {e}")
+            # Lanjutkan saja, mungkin kolom belum ada
+        
+        cursor.close()
+        sys.close()
+        
+        return jsonify({
+            "success": True,
+            "sku": sku,
+            "barcode": barcode_data,
+            "cached": False,
+            "product": product
+        })
+        
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error generating barcode: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Error: {str(e)}"
+        }), 500
+
+def download_barcode(sku):
+    """Download barcode as PNG file (?format=svg untuk vektor)"""
+    try:
+        if request.args.get('format') == 'svg' or not code128.PILLOW_AVAILABLE:
+            buffer, mimetype, ext = BytesIO(code128.svg(sku).encode('utf-8')), 'image/svg+xml', 'svg'
+        else:
+            buffer, mimetype, ext = BytesIO(code128.to_png(code128.render(sku))), 'image/png', 'png'
+        
+        # Return as downloadable file
+        return send_file(
+            buffer,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=f'barcode_{sku}.{ext}'
+        )
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def check_barcode_status(sku):
+    """Cek status barcode produk"""
+    if not session.get('user_id'):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    sys = CashierSystem(required=True)
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Cek di produk biasa
+        cursor.execute("""
+            SELECT no_SKU, Name_product, barcode_image 
+            FROM produk_biasa 
+            WHERE no_SKU = %s
+        """, (sku,))
+        
+        result = cursor.fetchone()
+        
+        if not result:
+            # Cek di produk lelang
+            cursor.execute("""
+                SELECT no_SKU, Name_product, barcode_image 
+                FROM produk_lelang 
+                WHERE no_SKU = %s
+            """, (sku,))
+            result = cursor.fetchone()
+        
+        if not result:
+            return jsonify({
+                "success": False,
+                "message": "Produk tidak ditemukan"
+            }), 404
+        
+        has_barcode = result['barcode_image'] is not None and result['barcode_image'] != ''
+        
+        return jsonify({
+            "success": True,
+            "sku": sku,
+            "product_name": result['Name_product'],
+            "has_barcode": has_barcode,
+            "message": "Produk sudah memiliki barcode" if has_barcode else "Produk belum memiliki barcode"
+        })
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    finally:
+        cursor.close()
+        sys.close()
+
+def api_products_without_barcode():
+    """Get all products without barcode (streaming, baris dibaca langsung dari cursor)"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    sys = CashierSystem(required=True)
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Query pertama dijalankan sebelum streaming supaya error database masih bisa jadi 500
+        cursor.execute("""
+            SELECT no_SKU, Name_product, Price, stok 
+            FROM produk_biasa 
+            WHERE barcode_image IS NULL OR barcode_image = ''
+        """)
+    except Exception as e:
+        cursor.close()
+        sys.close()
+        return jsonify({"error": str(e)}), 500
+    
+    def products():
+        for p in cursor:
+            yield {
+                'no_SKU': p['no_SKU'],
+                'Name_product': p['Name_product'],
+                'Price': p['Price'],
+                'type': 'biasa',
+                'stok': p['stok']
+            }
+        
+        cursor.execute("""
+            SELECT no_SKU, Name_product, Price 
+            FROM produk_lelang 
+            WHERE barcode_image IS NULL OR barcode_image = ''
+        """)
+        for p in cursor:
+            yield {
+                'no_SKU': p['no_SKU'],
+                'Name_product': p['Name_product'],
+                'Price': p['Price'],
+                'type': 'lelang',
+                'stok': None
+            }
+    
+    def close():
+        cursor.close()
+        sys.close()
+    
+    response = fastjson.stream_response(fastjson.iter_json_list(products()), request.accept_encodings, current_app.response_class)
+    # Koneksi ditutup setelah response selesai dikirim (atau client putus)
+    response.call_on_close(close)
+    return response
+
+def print_barcode_label(sku):
+    """Generate printable barcode label"""
+    if session.get('role') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    sys = CashierSystem(required=True)
+    cursor = sys.db.cursor(dictionary=True)
+    
+    try:
+        # Ambil data produk
+        cursor.execute("SELECT Name_product, Price FROM produk_biasa WHERE no_SKU = %s", (sku,))
+        product = cursor.fetchone()
+        
+        if not product:
+            cursor.execute("SELECT Name_product, Price FROM produk_lelang WHERE no_SKU = %s", (sku,))
+            product = cursor.fetchone()
+        
+        if not product:
+            return jsonify({"error": "Produk tidak ditemukan"}), 404
+        
+        # Barcode SVG inline: tajam di printer mana pun, tanpa layanan barcode eksternal
+        barcode_svg = code128.svg(sku, height_mm=10, text=False)
+        
+        # HTML untuk label barcode
+        html_label = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Barcode Label - {sku}</title>
+            <style>
+                @media print {{
+                    body {{ margin: 0; padding: 0; }}
+                    .label {{ page-break-inside: avoid; }}
+                }}
+                body {{ font-family: Arial, sans-serif; padding: 10px; }}
+                .label {{ 
+                    width: 3in; 
+                    height: 1.5in; 
+                    border: 1px solid #000; 
+                    padding: 8px;
+                    margin: 5px;
+                    display: inline-block;
+                    vertical-align: top;
+                    box-sizing: border-box;
+                }}
+                .product-name {{ 
+                    font-size: 12px; 
+                    font-weight: bold; 
+                    margin-bottom: 3px;
+                    height: 30px;
+                    overflow: hidden;
+                }}
+                .sku {{ 
+                    font-size: 10px; 
+                    color: #666;
+                    margin-bottom: 3px;
+                }}
+                .price {{ 
+                    font-size: 14px; 
+                    font-weight: bold; 
+                    color: #d00;
+                    margin-bottom: 5px;
+                }}
+                .barcode {{ 
+                    margin: 3px 0;
+                    text-align: center;
+                }}
+                .print-info {{
+                    font-size: 8px; 
+                    text-align: center;
+                    color: #666;
+                    margin-top: 3px;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="label">
+                <div class="product-name">{product['Name_product'][:25]}</div>
+                <div class="sku">SKU: {sku}</div>
+                <div class="price">Rp{int(product['Price']):,}</div>
+                <div class="barcode">{barcode_svg}</div>
+                <div class="print-info">JustCani POS System</div>
+            </div>
+        </body>
+        </html>
+        """
+        
+        return html_label
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        sys.close()
@@ -1,7 +1,9 @@
 import os
-import barcode
-from barcode.writer import ImageWriter
-from PIL import Image, ImageDraw, ImageFont
+
+import code128
+
+# Resolusi printer label thermal umum (203 dpi = 8 titik/mm)
+LABEL_DPI = 203
 
 def generate_barcode_image(sku, product_name, price, output_folder="barcodes"):
     """
@@ -11,71 +13,14 @@ def generate_barcode_image(sku, product_name, price, output_folder="barcodes"):
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     
-    # Gunakan Code128 format
-    code128 = barcode.get_barcode_class('code128')
-    
-    # Generate barcode
-    barcode_instance = code128(str(sku), writer=ImageWriter())
-    
-    # Save barcode image
+    # Barcode Code128 + nama, SKU, harga digambar sekaligus, disimpan sekali
     filename = f"{output_folder}/barcode_{sku}"
-    barcode_instance.save(filename)
-    
-    # Add label text ke barcode
-    add_label_to_barcode(filename, sku, product_name, price)
+    label = code128.render_label(sku, product_name, price, module_px=code128.px_per_module(LABEL_DPI))
+    label.save(f"{filename}.png", dpi=(LABEL_DPI, LABEL_DPI))
     
     print(f"✓ Barcode berhasil dibuat: {filename}.png")
     return f"{filename}.png"
 
-def add_label_to_barcode(filename, sku, product_name, price):
-    """
-    Tambahkan teks label ke gambar barcode
-    """
-    # Buka gambar barcode
-    img = Image.open(f"{filename}.png")
-    
-    # Buat gambar baru dengan ruang untuk label
-    new_height = img.height + 100
-    new_img = Image.new('RGB', (img.width, new_height), 'white')
-    
-    # Tempel barcode
-    new_img.paste(img, (0, 30))
-    
-    # Tambahkan teks
-    draw = ImageDraw.Draw(new_img)
-    
-    # Gunakan font default atau arial
-    try:
-        font_large = ImageFont.truetype("arial.ttf", 16)
-        font_medium = ImageFont.truetype("arial.ttf", 14)
-        font_small = ImageFont.truetype("arial.ttf", 12)
-    except:
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-    
-    # Nama produk (dipotong jika terlalu panjang)
-    product_display = product_name[:20] + "..." if len(product_name) > 20 else product_name
-    draw.text((10, 5), product_display, fill='black', font=font_large)
-    
-    # SKU
-    draw.text((10, img.height + 40), f"SKU: {sku}", fill='gray', font=font_medium)
-    
-    # Harga
-    price_text = f"Rp{int(price):,}"
-    price_width = draw.textlength(price_text, font=font_medium)
-    draw.text((img.width - price_width - 10, img.height + 40), 
-              price_text, fill='red', font=font_medium)
-    
-    # Save gambar baru
-    new_img.save(f"{filename}_label.png")
-    
-    # Hapus file lama
-    os.remove(f"{filename}.png")
-    
-    # Rename file
-    os.rename(f"{filename}_label.png", f"{filename}.png")
-
 def generate_barcodes_from_database():
     """
     Generate barcode untuk semua produk di database
@@ -0,0 +1,1014 @@
+import json
+import multiprocessing
+import random
+import statistics
+import os
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+import admission
+import analytics
+import catalog_snapshot
+import code128
+import db_backend
+import events
+import local_cache
+import logic
+from logic import Database, Inventory, Transaction
+from stats import aggregate_transactions
+
+
+def stress_checkout(terminals=8, checkouts_per_terminal=50, skus=None, user_id=1, username='stress'):
+    """
+    Simulasi N terminal kasir yang checkout SKU yang sama secara paralel.
+    Setelah selesai dicek: tidak ada stok negatif dan jumlah stok yang
+    berkurang sama persis dengan qty yang tercatat di transaction_history.
+    """
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return None
+
+    cursor = db.cursor(dictionary=True)
+    if skus:
+        placeholders = ', '.join(['%s'] * len(skus))
+        cursor.execute(f"SELECT no_SKU, stok FROM produk_biasa WHERE no_SKU IN ({placeholders})", tuple(skus))
+    else:
+        cursor.execute("SELECT no_SKU, stok FROM produk_biasa WHERE stok > 0 ORDER BY stok DESC LIMIT 5")
+    stok_awal = {str(row['no_SKU']): row['stok'] for row in cursor.fetchall()}
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM transaction_history")
+    last_id = cursor.fetchone()['last_id']
+    cursor.close()
+    db.close()
+
+    if not stok_awal:
+        print("✗ Tidak ada produk dengan stok untuk diuji")
+        return None
+
+    print(f"🔥 {terminals} terminal x {checkouts_per_terminal} checkout pada SKU {list(stok_awal)}")
+
+    latencies = []
+    hasil = {'berhasil': 0, 'ditolak': 0, 'error': 0}
+    lock = threading.Lock()
+
+    def terminal(no):
+        conn = Database.get_conn()
+        trx = Transaction(conn)
+        rng = random.Random(no)
+        for _ in range(checkouts_per_terminal):
+            items = [
+                {'sku': sku, 'qty': rng.randint(1, 3)}
+                for sku in rng.sample(list(stok_awal), k=rng.randint(1, len(stok_awal)))
+            ]
+            start = time.perf_counter()
+            try:
+                success, message = trx.checkout(items, user_id, f"{username}{no}")
+                key = 'berhasil' if success else ('error' if message.startswith('Gagal') else 'ditolak')
+            except Exception:
+                key = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                hasil[key] += 1
+                latencies.append(elapsed)
+        conn.close()
+
+    threads = [threading.Thread(target=terminal, args=(i,)) for i in range(terminals)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    durasi = time.perf_counter() - start
+
+    # Verifikasi tidak ada oversell
+    db = Database.get_conn()
+    cursor = db.cursor(dictionary=True)
+    placeholders = ', '.join(['%s'] * len(stok_awal))
+    cursor.execute(f"SELECT no_SKU, stok FROM produk_biasa WHERE no_SKU IN ({placeholders})", tuple(stok_awal))
+    stok_akhir = {str(row['no_SKU']): row['stok'] for row in cursor.fetchall()}
+    cursor.execute(
+        "SELECT details FROM transaction_history WHERE id > %s AND transaction_type = 'biasa' AND username LIKE %s",
+        (last_id, f"{username}%")
+    )
+    terjual = {sku: 0 for sku in stok_awal}
+    for row in cursor.fetchall():
+        for item in json.loads(row['details']):
+            if str(item['sku']) in terjual:
+                terjual[str(item['sku'])] += item['qty']
+    cursor.close()
+    db.close()
+
+    konsisten = True
+    for sku, awal in stok_awal.items():
+        akhir = stok_akhir.get(sku, 0)
+        ok = akhir >= 0 and awal - akhir == terjual[sku]
+        konsisten = konsisten and ok
+        print(f"  SKU {sku}: stok {awal} → {akhir}, terjual {terjual[sku]} {'✅' if ok else '❌'}")
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(f"\n📊 {hasil['berhasil']} berhasil, {hasil['ditolak']} ditolak (stok habis), {hasil['error']} error")
+    print(f"⏱️  {durasi:.2f}s total, median {statistics.median(latencies) * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+    print("✅ Tidak ada oversell" if konsisten else "❌ Stok tidak konsisten dengan history!")
+    return konsisten
+
+
+def fake_transactions(line_items=1_000_000, items_per_trx=4, products=2000, days=30, seed=42):
+    """Baris transaction_history sintetis (format sama dengan hasil query), terbaru di depan"""
+    rng = random.Random(seed)
+    end = datetime.now()
+    rows = []
+    for i in range(line_items // items_per_trx):
+        items = []
+        for _ in range(items_per_trx):
+            sku = rng.randrange(products)
+            qty = rng.randint(1, 5)
+            price = 1000 + sku * 10
+            items.append({'sku': str(100000 + sku), 'name': f"Produk {sku}", 'price': price, 'qty': qty, 'subtotal': price * qty})
+        rows.append({
+            'id': i + 1,
+            'transaction_id': f"TRX{i:08d}",
+            'username': 'bench',
+            'transaction_date': end - timedelta(seconds=rng.randrange(days * 86400)),
+            'transaction_type': 'lelang' if rng.random() < 0.1 else 'biasa',
+            'total_amount': sum(item['subtotal'] for item in items),
+            'details': json.dumps(items)
+        })
+    rows.sort(key=lambda r: r['transaction_date'], reverse=True)
+    return rows
+
+
+def bench_analytics(line_items=1_000_000):
+    """Bandingkan agregasi loop per baris (stats.aggregate_transactions) dengan NumPy"""
+    if not analytics.NUMPY_AVAILABLE:
+        print("✗ NumPy tidak terinstall. Install: pip install numpy")
+        return None
+
+    print(f"🧪 Membuat {line_items:,} line item sintetis...")
+    rows = fake_transactions(line_items)
+
+    start = time.perf_counter()
+    loop_stats = aggregate_transactions(rows)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cols = analytics.from_rows(rows)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    numpy_stats = analytics.summarize(cols)
+    for bucket in ('hour', 'week'):
+        analytics.summarize(cols, bucket)
+    aggregate_time = (time.perf_counter() - start) / 3
+
+    same = (
+        loop_stats['summary']['total_products_sold'] == numpy_stats['summary']['total_products_sold']
+        and abs(loop_stats['summary']['total_revenue'] - numpy_stats['summary']['total_revenue']) < 1
+        and loop_stats['charts']['transaction_types']['data'] == numpy_stats['charts']['transaction_types']['data']
+        and [p['sold'] for p in loop_stats['tables']['top_products']] == [p['sold'] for p in numpy_stats['tables']['top_products']]
+        and sorted(loop_stats['charts']['sales_trend']['labels']) == sorted(numpy_stats['charts']['sales_trend']['labels'])
+    )
+
+    print(f"\n📊 {len(rows):,} transaksi, {line_items:,} line item")
+    print(f"  Loop per baris        : {loop_time * 1000:8.1f}ms")
+    print(f"  NumPy muat kolom      : {load_time * 1000:8.1f}ms (parsing JSON, sekali per rentang)")
+    print(f"  NumPy agregasi        : {aggregate_time * 1000:8.1f}ms per bucket → {loop_time / aggregate_time:.0f}x lebih cepat")
+    print(f"  NumPy total           : {(load_time + aggregate_time) * 1000:8.1f}ms → {loop_time / (load_time + aggregate_time):.1f}x lebih cepat")
+    print("✅ Hasil sama dengan versi loop" if same else "❌ Hasil berbeda dengan versi loop!")
+    return same
+
+
+def check_replicas():
+    """
+    Cek routing baca primary/replica (JUSTCANI_DB_PRIMARY / JUSTCANI_DB_REPLICAS),
+    mis. dengan dua instance MariaDB lokal yang direplikasi.
+    """
+    def server_id(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT @@server_id")
+        value = cursor.fetchone()[0]
+        cursor.close()
+        return value
+
+    primary = Database.get_conn()
+    if not primary:
+        print("✗ Primary tidak terhubung")
+        return None
+    print(f"🗄️  Primary {logic.parse_dsn(logic.DB_PRIMARY_DSN)['host']}: server_id {server_id(primary)}")
+
+    if not logic.DB_REPLICA_DSNS:
+        print("ℹ️  JUSTCANI_DB_REPLICAS kosong, semua baca ke primary")
+    for dsn in logic.DB_REPLICA_DSNS:
+        dsn_info = logic.parse_dsn(dsn)
+        try:
+            conn = db_backend.connect_mysql(**dsn_info)
+        except Exception as e:
+            print(f"  ✗ Replica {dsn_info['host']}:{dsn_info['port']} tidak bisa dihubungi: {e}")
+            continue
+        print(f"  Replica {dsn_info['host']}:{dsn_info['port']}: server_id {server_id(conn)}, "
+              f"lag {Database._replica_lag(conn)}s (maks {logic.REPLICA_MAX_LAG_SECONDS}s)")
+        conn.close()
+
+    def routed(label, fresh_after):
+        conn, fresh_until = Database.get_read_conn(fresh_after)
+        print(f"  {label:<32} → server_id {server_id(conn)} (data lengkap s/d {time.time() - fresh_until:.1f}s lalu)")
+        conn.close()
+
+    print("\n🔀 Routing baca:")
+    routed("Laporan biasa", None)
+    routed("Sesaat setelah user menulis", time.time())
+    routed("10 detik setelah user menulis", time.time() - 10)
+
+    # Read-your-writes: transaksi yang baru ditulis harus langsung terlihat
+    cursor = primary.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transaction_history")
+    last_id = cursor.fetchone()[0]
+    cursor.close()
+    primary.close()
+    conn, _ = Database.get_read_conn(time.time())
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transaction_history")
+    seen = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    ok = seen >= last_id
+    print("✅ Read-your-writes terpenuhi" if ok else f"❌ Baca setelah tulis melihat id {seen}, primary {last_id}")
+    return ok
+
+
+# SKU produk sintetis benchmark backend, jauh di atas SKU toko asli
+BENCH_SKU_START = 900_000
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[max(0, int(len(values) * pct) - 1)] if values else 0
+
+
+def _bench_backend(label, connect, products, searches, checkouts, terminals):
+    """Isi produk sintetis, ukur search & checkout, lalu hapus lagi datanya"""
+    conn = connect()
+    dialect = db_backend.dialect_of(conn)
+    cursor = conn.cursor()
+    skus = list(range(BENCH_SKU_START, BENCH_SKU_START + products))
+    cursor.execute("DELETE FROM produk_biasa WHERE no_SKU >= %s", (BENCH_SKU_START,))
+    cursor.executemany(
+        "INSERT INTO produk_biasa (no_SKU, Name_product, Price, expired_date, stok) VALUES (%s, %s, %s, %s, %s)",
+        [(sku, f"Bench Produk {sku % 997} {sku}", 1000 + sku % 500 * 10, date.today() + timedelta(days=365), 1_000_000)
+         for sku in skus]
+    )
+    if dialect is db_backend.SQLiteDialect:
+        cursor.execute("INSERT OR IGNORE INTO users (id, username, email, password_hash, role) "
+                       "VALUES (1, 'bench', 'bench@localhost', '-', 'kasir')")
+    cursor.execute("SELECT MIN(id) FROM users")
+    user_id = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transaction_history")
+    last_id = cursor.fetchone()[0]
+    conn.commit()
+    cursor.close()
+
+    # 1. Search (nama LIKE + SKU persis), satu koneksi seperti satu request
+    rng = random.Random(7)
+    inventory = Inventory(conn)
+    search_latencies = []
+    for i in range(searches):
+        query = str(rng.choice(skus)) if i % 2 else f"Produk {rng.randrange(997)} "
+        start = time.perf_counter()
+        inventory.search_produk(query)
+        search_latencies.append(time.perf_counter() - start)
+    conn.close()
+
+    # 2. Checkout paralel, tiap terminal koneksi sendiri
+    checkout_latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def terminal(no):
+        term_conn = connect()
+        trx = Transaction(term_conn)
+        term_rng = random.Random(no)
+        for _ in range(checkouts // terminals):
+            items = [{'sku': sku, 'qty': term_rng.randint(1, 3)} for sku in term_rng.sample(skus[:50], k=3)]
+            start = time.perf_counter()
+            success, _ = trx.checkout(items, user_id, 'bench')
+            elapsed = time.perf_counter() - start
+            with lock:
+                checkout_latencies.append(elapsed)
+                errors[0] += 0 if success else 1
+        term_conn.close()
+
+    threads = [threading.Thread(target=terminal, args=(i,)) for i in range(terminals)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.perf_counter() - start
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM transaction_history WHERE id > %s AND username = 'bench'", (last_id,))
+    cursor.execute("DELETE FROM produk_biasa WHERE no_SKU >= %s", (BENCH_SKU_START,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    return {
+        'label': label,
+        'search_p50': statistics.median(search_latencies) * 1000,
+        'search_p95': _percentile(search_latencies, 0.95) * 1000,
+        'checkout_p50': statistics.median(checkout_latencies) * 1000,
+        'checkout_p95': _percentile(checkout_latencies, 0.95) * 1000,
+        'checkout_per_sec': len(checkout_latencies) / duration,
+        'errors': errors[0]
+    }
+
+
+def bench_backends(products=20_000, searches=500, checkouts=400, terminals=4):
+    """
+    Latensi search dan checkout MySQL (JUSTCANI_DB_PRIMARY) vs SQLite WAL (file
+    sementara) dengan data dan beban yang sama. Data sintetis dihapus setelahnya.
+    """
+    backends = []
+    if db_backend.MYSQL_AVAILABLE:
+        dsn = logic.parse_dsn(logic.DB_PRIMARY_DSN)
+        try:
+            db_backend.connect_mysql(**dsn).close()
+            backends.append(("MySQL", lambda: db_backend.connect_mysql(**dsn)))
+        except db_backend.Error as e:
+            print(f"ℹ️  MySQL dilewati: {e}")
+
+    sqlite_dir = tempfile.mkdtemp(prefix='justcani-bench-')
+    sqlite_path = os.path.join(sqlite_dir, 'bench.sqlite3')
+    backends.append(("SQLite (WAL)", lambda: db_backend.connect_sqlite(sqlite_path)))
+
+    print(f"🧪 {products:,} produk, {searches} search, {checkouts} checkout dari {terminals} terminal")
+    results = []
+    for label, connect in backends:
+        print(f"  ⏳ {label}...")
+        results.append(_bench_backend(label, connect, products, searches, checkouts, terminals))
+
+    for name in os.listdir(sqlite_dir):
+        os.remove(os.path.join(sqlite_dir, name))
+    os.rmdir(sqlite_dir)
+
+    print(f"\n{'Backend':<14} {'search p50':>11} {'p95':>8} {'checkout p50':>13} {'p95':>8} {'checkout/s':>11} {'gagal':>6}")
+    for r in results:
+        print(f"{r['label']:<14} {r['search_p50']:9.2f}ms {r['search_p95']:6.2f}ms "
+              f"{r['checkout_p50']:11.2f}ms {r['checkout_p95']:6.2f}ms {r['checkout_per_sec']:11.1f} {r['errors']:6}")
+    return results
+
+
+def _coherence_worker(rounds, ready, out):
+    """Proses 'worker gunicorn': polling cache sampai melihat invalidasi"""
+    cache = local_cache.VersionedCache('coherence', ('catalog',))
+
+    def load(fresh_after):
+        return events.version_stamp('catalog')[0]
+
+    seen = cache.get('versi', load)
+    ready.set()
+    for _ in range(rounds):
+        while True:
+            value = cache.get('versi', load)
+            if value != seen:
+                out.put(time.time())
+                seen = value
+                break
+            time.sleep(0.0005)
+
+
+def check_cache_coherence(workers=4, rounds=20):
+    """
+    Ukur berapa lama sampai cache di proses lain kosong setelah tulis:
+    N proses polling cache, proses ini menaikkan versi 'catalog' berulang kali.
+    """
+    ready = [multiprocessing.Event() for _ in range(workers)]
+    out = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_coherence_worker, args=(rounds, ready[i], out), daemon=True)
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    for event in ready:
+        event.wait(10)
+
+    latencies = []
+    for _ in range(rounds):
+        start = time.time()
+        events.bump('catalog')
+        for _ in range(workers):
+            latencies.append(out.get(timeout=5) - start)
+        time.sleep(0.05)
+    for p in procs:
+        p.join(5)
+
+    # Biaya cache hit (stempel versi tidak berubah = hanya PRAGMA data_version)
+    cache = local_cache.VersionedCache('coherence-hit', ('catalog',))
+    cache.get('x', lambda fresh_after: [1])
+    start = time.perf_counter()
+    for _ in range(10_000):
+        cache.get('x', lambda fresh_after: [1])
+    hit_cost = (time.perf_counter() - start) / 10_000
+
+    print(f"\n📡 {workers} proses x {rounds} tulis")
+    print(f"  Invalidasi terlihat : median {statistics.median(latencies) * 1000:.2f}ms, "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.2f}ms, maks {max(latencies) * 1000:.2f}ms")
+    print(f"  Biaya cache hit     : {hit_cost * 1e6:.1f}µs (termasuk cek versi)")
+    return latencies
+
+
+def fake_catalog(skus=1_000_000, unique_names=200_000, seed=42):
+    """Baris katalog sintetis (sku, nama, harga, expired, stok) urut SKU; nama dipakai ulang per varian/batch"""
+    rng = random.Random(seed)
+    brands = [f"Merek{i:03d}" for i in range(200)]
+    items = ['Susu', 'Roti', 'Kopi', 'Teh', 'Mie', 'Sabun', 'Beras', 'Gula', 'Minyak', 'Keju']
+    today = date.today().toordinal()
+    for sku in range(1, skus + 1):
+        n = sku % unique_names
+        name = f"{brands[n % 200]} {items[n // 200 % 10]} {n // 2000}00ml"
+        yield sku, name, rng.randint(1, 500) * 500, date.fromordinal(today + rng.randint(-30, 365)), rng.randint(0, 200)
+
+
+def _memory_kb():
+    """(private, pss) proses ini dalam KB dari /proc/self/smaps_rollup (Linux)"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Private_Clean'] + fields['Private_Dirty'], fields['Pss']
+
+
+def _catalog_memory_worker(mode, path, skus, ready, done, out):
+    """Satu 'worker gunicorn': muat katalog dengan cara mode, laporkan memori & latensi"""
+    before_private, before_pss = _memory_kb()
+    if mode == 'dict':
+        # Seperti cursor(dictionary=True): satu dict + str + date per baris
+        catalog = {
+            sku: {'no_SKU': sku, 'Name_product': name, 'Price': price, 'expired_date': expired_date, 'stok': stok}
+            for sku, name, price, expired_date, stok in fake_catalog(skus)
+        }
+        lookup = catalog.get
+        search = lambda q: [row for row in catalog.values() if q in row['Name_product'].lower()][:50]
+    else:
+        catalog = catalog_snapshot.Snapshot(path)
+        # Sentuh semua halaman file tanpa menyalin
+        for section in catalog.offsets:
+            zlib.crc32(getattr(catalog, section))
+        lookup = catalog.get
+        search = catalog.search
+    # Semua worker memuat sebelum diukur, supaya PSS halaman bersama sudah terbagi rata
+    ready.wait()
+    private, pss = _memory_kb()
+
+    probe = random.Random(1).sample(range(1, skus + 1), 10_000)
+    start = time.perf_counter()
+    for sku in probe:
+        lookup(sku)
+    lookup_us = (time.perf_counter() - start) / len(probe) * 1e6
+    start = time.perf_counter()
+    search('kopi 12')
+    search_ms = (time.perf_counter() - start) * 1000
+    out.put((private - before_private, pss - before_pss, lookup_us, search_ms))
+    done.wait()
+
+
+def bench_catalog_memory(skus=1_000_000, workers=4):
+    """
+    Memori katalog produk_biasa di N worker: list/dict per worker vs snapshot
+    mmap bersama (catalog_snapshot.py). Data sintetis, tidak butuh database.
+    """
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("✗ Butuh Linux (/proc/self/smaps_rollup) untuk mengukur memori")
+        return None
+
+    tmpdir = tempfile.mkdtemp(prefix='catalog_bench_')
+    path = os.path.join(tmpdir, 'catalog.snapshot')
+    start = time.perf_counter()
+    catalog_snapshot.write(path, fake_catalog(skus), (0, 0, 0))
+    build_seconds = time.perf_counter() - start
+    info = catalog_snapshot.Snapshot(path).info()
+
+    print(f"\n📦 Katalog {skus:,} SKU ({info['names']:,} nama unik), {workers} worker")
+    print(f"  Snapshot: {info['bytes'] / 1024 / 1024:.1f} MB di disk/page cache, dibangun {build_seconds:.1f}s")
+    results = {}
+    for mode in ('dict', 'snapshot'):
+        ready = multiprocessing.Barrier(workers + 1)
+        done = multiprocessing.Event()
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_catalog_memory_worker, args=(mode, path, skus, ready, done, out))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        ready.wait()
+        rows = [out.get() for _ in procs]
+        done.set()
+        for p in procs:
+            p.join()
+        private = sum(r[0] for r in rows) / 1024
+        pss = sum(r[1] for r in rows) / 1024
+        results[mode] = rows
+        label = 'dict per worker' if mode == 'dict' else 'snapshot mmap  '
+        print(f"  {label}: private {private / workers:7.1f} MB/worker, total PSS {pss:7.1f} MB, "
+              f"lookup {statistics.median(r[2] for r in rows):.2f}µs, search {statistics.median(r[3] for r in rows):.1f}ms")
+
+    os.remove(path)
+    os.rmdir(tmpdir)
+    return results
+
+
+def bench_scan(products=100_000, scans=2000, batch=10):
+    """
+    Lookup scan barcode: search_produk (LIKE + CAST, jalur lama) vs primary key
+    (Inventory.get_by_skus) vs hash index snapshot katalog (/api/scan).
+    Pakai database dari konfigurasi; produk sintetis dihapus setelahnya.
+    """
+    conn = Database.get_conn()
+    if not conn:
+        print("✗ Database tidak terhubung")
+        return None
+
+    cursor = conn.cursor()
+    skus = list(range(BENCH_SKU_START, BENCH_SKU_START + products))
+    cursor.execute("DELETE FROM produk_biasa WHERE no_SKU >= %s", (BENCH_SKU_START,))
+    cursor.executemany(
+        "INSERT INTO produk_biasa (no_SKU, Name_product, Price, expired_date, stok) VALUES (%s, %s, %s, %s, %s)",
+        [(sku, f"Bench Produk {sku % 997} {sku}", 1000 + sku % 500 * 10, date.today() + timedelta(days=365), 100)
+         for sku in skus]
+    )
+    conn.commit()
+    cursor.close()
+
+    tmpdir = tempfile.mkdtemp(prefix='scan_bench_')
+    path = os.path.join(tmpdir, 'catalog.snapshot')
+    try:
+        catalog_snapshot.write(path, catalog_snapshot._read_catalog(conn), (0, 0, 0))
+        snapshot = catalog_snapshot.Snapshot(path)
+        inventory = Inventory(conn)
+        rng = random.Random(3)
+        probe = [rng.choice(skus) for _ in range(scans)]
+        groups = [probe[i:i + batch] for i in range(0, len(probe), batch)]
+
+        def measure(lookup, items):
+            latencies = []
+            for item in items:
+                start = time.perf_counter()
+                lookup(item)
+                latencies.append(time.perf_counter() - start)
+            return statistics.median(latencies) * 1000, _percentile(latencies, 0.99) * 1000
+
+        results = {
+            'search_produk (LIKE)': measure(lambda sku: inventory.search_produk(str(sku)), probe[:scans // 10]),
+            'primary key': measure(lambda sku: inventory.get_by_skus([sku]), probe),
+            'snapshot hash index': measure(snapshot.get, probe),
+            f'primary key x{batch}': measure(inventory.get_by_skus, groups),
+            f'snapshot x{batch}': measure(snapshot.get_many, groups),
+        }
+    finally:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM produk_biasa WHERE no_SKU >= %s", (BENCH_SKU_START,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+    print(f"\n🔫 Scan SKU persis, {products:,} produk ({db_backend.DB_BACKEND})")
+    for label, (p50, p99) in results.items():
+        print(f"  {label:<22} p50 {p50:8.3f}ms   p99 {p99:8.3f}ms")
+    return results
+
+
+def _legacy_label(sku, name, price, writer_options):
+    """Jalur lama: python-barcode ImageWriter -> PNG -> buka lagi -> tempel label -> PNG lagi"""
+    import barcode
+    from barcode.writer import ImageWriter
+    from PIL import Image, ImageDraw, ImageFont
+
+    buffer = BytesIO()
+    barcode.get_barcode_class('code128')(str(sku), writer=ImageWriter()).write(buffer, writer_options)
+    buffer.seek(0)
+    img = Image.open(buffer)
+    label = Image.new('RGB', (img.width, img.height + 100), 'white')
+    label.paste(img, (0, 30))
+    draw = ImageDraw.Draw(label)
+    font = ImageFont.load_default()
+    draw.text((10, 5), name[:20], fill='black', font=font)
+    draw.text((10, img.height + 40), f"SKU: {sku}", fill='gray', font=font)
+    draw.text((img.width - 80, img.height + 40), f"Rp{int(price):,}", fill='red', font=font)
+    out = BytesIO()
+    label.save(out, 'PNG')
+    return out.getvalue()
+
+
+def bench_barcodes(labels=500):
+    """Label barcode per detik: python-barcode + add_label_to_barcode vs code128.py (PNG & SVG)"""
+    items = [(100_000 + i * 37, f"Produk Bench {i}", 1000 + i) for i in range(labels)]
+    results = {}
+
+    def measure(label, render):
+        start = time.perf_counter()
+        size = sum(len(render(*item)) for item in items)
+        elapsed = time.perf_counter() - start
+        results[label] = (labels / elapsed, size / labels)
+
+    try:
+        import barcode  # noqa: F401
+        writer_options = {}
+        try:
+            _legacy_label(*items[0], writer_options)
+        except AttributeError as e:
+            # python-barcode lama + Pillow >= 10 (font.getsize sudah dihapus): ukur tanpa teks
+            print(f"ℹ️  python-barcode gagal menulis teks ({e}), diukur dengan write_text=False")
+            writer_options = {'write_text': False}
+        measure('python-barcode + label', lambda *item: _legacy_label(*item, writer_options))
+    except ImportError:
+        print("ℹ️  python-barcode tidak terinstall, jalur lama dilewati")
+
+    code128.encode.cache_clear()
+    code128.bar_widths.cache_clear()
+    if code128.PILLOW_AVAILABLE:
+        measure('code128 label PNG', lambda sku, name, price: code128.to_png(code128.render_label(sku, name, price)))
+        measure('code128 data URI PNG', lambda sku, name, price: code128.png_data_uri(sku))
+    measure('code128 SVG', lambda sku, name, price: code128.svg(sku).encode())
+
+    print(f"\n🏷️  {labels} label barcode")
+    for label, (per_sec, size) in results.items():
+        print(f"  {label:<24} {per_sec:8.0f} label/s   {size / 1024:6.1f} KB/label")
+    return results
+
+
+def _legacy_avatar(data):
+    """Jalur lama images.py: decode penuh, crop, LANCZOS 400x400, satu JPEG"""
+    from PIL import Image
+
+    img = Image.open(BytesIO(data)).convert('RGB')
+    min_dim = min(img.size)
+    left, top = (img.width - min_dim) // 2, (img.height - min_dim) // 2
+    img = img.crop((left, top, left + min_dim, top + min_dim)).resize((400, 400), Image.Resampling.LANCZOS)
+    out = BytesIO()
+    img.save(out, 'JPEG', quality=85)
+    return out.getvalue()
+
+
+def bench_avatars(uploads=20, width=4032, height=3024):
+    """Foto profil per detik: decode penuh + 1 JPEG vs draft decode + semua varian WebP/JPEG"""
+    from PIL import Image
+    import images
+
+    # Foto kamera sintetis: gradien + noise supaya encoder JPEG tidak terlalu mudah
+    base = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    photo = Image.merge('RGB', (base, noise, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    buffer = BytesIO()
+    photo.save(buffer, 'JPEG', quality=85)
+    data = buffer.getvalue()
+    print(f"\n🖼️  Upload {width}x{height} JPEG, {len(data) / 1024:.0f} KB, {uploads}x")
+
+    start = time.perf_counter()
+    for _ in range(uploads):
+        old_size = len(_legacy_avatar(data))
+    old = (time.perf_counter() - start) / uploads
+
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        for user_id in range(uploads):
+            url = images.process_and_save_image(BytesIO(data), user_id, folder=folder)
+        new = (time.perf_counter() - start) / uploads
+        sizes = {name.rsplit('_', 1)[1]: os.path.getsize(os.path.join(folder, name))
+                 for name in os.listdir(folder) if name.startswith(f"avatar_{uploads - 1}_")}
+
+    print(f"  lama: {old * 1000:7.1f} ms/upload  (1 file: 400.jpg {old_size / 1024:.1f} KB)")
+    print(f"  baru: {new * 1000:7.1f} ms/upload  ({len(sizes)} file, {old / new:.1f}x lebih cepat)")
+    for name, size in sorted(sizes.items(), key=lambda item: (int(item[0].split('.')[0]), item[0])):
+        print(f"    {name:<10} {size / 1024:6.1f} KB")
+    print(f"  URL: {url}")
+    return old, new
+
+
+def _timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def bench_json(products=20_000, line_items=200_000, repeat=5):
+    """Serialisasi + kompresi: jsonify bawaan Flask vs fastjson (orjson + gzip/br)"""
+    from decimal import Decimal
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+
+    import fastjson
+    from tasks import _json_default
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = fastjson.FastJSONProvider(app)
+
+    # Baris seperti cursor(dictionary=True) MySQL: Price DECIMAL, expired_date DATE
+    rows = [{
+        'no_SKU': 100000 + i,
+        'Name_product': f"Produk Bench {i}",
+        'Price': Decimal(f"{1000 + i * 7}.00"),
+        'expired_date': date(2026, 1, 1) + timedelta(days=i % 365),
+        'stok': i % 50
+    } for i in range(products)]
+    stats = aggregate_transactions(fake_transactions(line_items))
+
+    # Body response yang benar-benar dikirim (jsonify = provider.response)
+    payloads = [
+        ("/api/products (50 baris)", lambda p: p.response({'items': rows[:50], 'next_cursor': 'x', 'total': products}).get_data()),
+        (f"for_barcode ({products:,} baris)", lambda p: p.response({'success': True, 'products': rows, 'count': products}).get_data()),
+        ("/api/stats (isi cache)", lambda p: (json.dumps(stats, default=_json_default).encode() if p is default_provider
+                                              else fastjson.dumps(stats, default=_json_default))),
+    ]
+    encodings = ['gzip'] + (['br'] if fastjson.BROTLI_AVAILABLE else [])
+
+    print(f"\n📦 JSON: {'orjson' if fastjson.ORJSON_AVAILABLE else 'json bawaan (orjson tidak terinstall)'}")
+    for label, dump in payloads:
+        before, body = _timed(lambda: dump(default_provider), repeat)
+        after, fast_body = _timed(lambda: dump(fast_provider), repeat)
+        print(f"  {label}")
+        print(f"    jsonify bawaan : {before * 1000:8.2f} ms  {len(body) / 1024:8.1f} KB")
+        print(f"    fastjson       : {after * 1000:8.2f} ms  {len(fast_body) / 1024:8.1f} KB  ({before / after:.1f}x)")
+        for encoding in encodings:
+            elapsed, compressed = _timed(lambda: fastjson.compress(fast_body, encoding), repeat)
+            print(f"    + {encoding:<12} : {(after + elapsed) * 1000:8.2f} ms  {len(compressed) / 1024:8.1f} KB  "
+                  f"({len(body) / len(compressed):.1f}x lebih kecil dari sebelumnya)")
+
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+timings = {'import': imported - start}
+for label, url in (('first_request', '/api/search?q=Produk'), ('second_request', '/api/search?q=Bench'), ('login_page', '/login')):
+    t = time.perf_counter()
+    status = client.get(url).status_code
+    timings[label] = time.perf_counter() - t
+    assert status == 200, (url, status)
+# Modul dari lazy_import ada di sys.modules sejak awal, tapi baru dieksekusi saat dipakai
+timings['modules'] = {name: name in sys.modules and type(sys.modules[name]).__name__ != '_LazyModule'
+                      for name in ('numpy', 'PIL.Image', 'wtforms', 'bcrypt', 'mysql.connector', 'barcode_admin')}
+print(json.dumps(timings))
+"""
+
+
+def bench_cold_start(runs=5):
+    """Cold start: import app.py + request pertama di proses Python baru (seperti serverless)"""
+    import subprocess
+    import sys
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            JUSTCANI_DB_BACKEND='sqlite',
+            JUSTCANI_SQLITE_PATH=os.path.join(tmp, 'kasir.sqlite3'),
+            JUSTCANI_TASK_DB=os.path.join(tmp, 'tasks.db'),
+            JUSTCANI_CATALOG_SNAPSHOT=os.path.join(tmp, 'catalog.snapshot'),
+        )
+        here = os.path.dirname(os.path.abspath(__file__))
+        results = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=here, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            result['process'] = time.perf_counter() - start
+            results.append(result)
+
+    print(f"\n🥶 Cold start, median dari {runs} proses baru (SQLite)")
+    for label in ('import', 'first_request', 'second_request', 'login_page', 'process'):
+        values = [r[label] * 1000 for r in results]
+        print(f"  {label:<16} {statistics.median(values):8.1f} ms   (min {min(values):.1f}, max {max(values):.1f})")
+    loaded = [name for name, yes in results[-1]['modules'].items() if yes]
+    print(f"  Modul berat termuat setelah 3 request: {', '.join(loaded) or '-'} (login memuat wtforms)")
+    return results
+
+
+def _admission_run(control, workers, db_connections, reports, terminals, duration, report_ms, checkout_ms):
+    """Satu putaran simulasi: latensi checkout (ms) dan jumlah laporan selesai/ditolak"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    server = ThreadPoolExecutor(max_workers=workers)
+    db_pool = threading.BoundedSemaphore(db_connections)
+    stop = time.perf_counter() + duration
+    latencies = []
+    counts = {'report_done': 0, 'report_rejected': 0}
+    lock = threading.Lock()
+
+    def handle(name, work_ms):
+        token = None
+        if control:
+            try:
+                token = control.acquire(name)
+            except admission.Rejected:
+                return False
+        try:
+            with db_pool:
+                time.sleep(work_ms / 1000)
+            return True
+        finally:
+            if token:
+                control.release(token)
+
+    def report_client():
+        while time.perf_counter() < stop:
+            done = server.submit(handle, 'report', report_ms).result()
+            with lock:
+                counts['report_done' if done else 'report_rejected'] += 1
+            if not done:
+                # Dashboard menunggu Retry-After; dipendekkan supaya simulasi tetap singkat
+                time.sleep(0.05)
+
+    def terminal():
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            server.submit(handle, 'checkout', checkout_ms).result()
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(random.uniform(0.01, 0.03))
+
+    clients = [threading.Thread(target=report_client) for _ in range(reports)]
+    clients += [threading.Thread(target=terminal) for _ in range(terminals)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    server.shutdown()
+    return latencies, counts
+
+
+def bench_admission(workers=8, db_connections=4, reports=6, terminals=4, duration=5.0, report_ms=300, checkout_ms=5):
+    """
+    Checkout selagi beberapa dashboard menarik laporan: worker & koneksi DB terbatas
+    (disimulasikan), tanpa vs dengan admission control (kelas dari admission.py).
+    """
+    print(f"\n🚦 {terminals} terminal checkout ({checkout_ms}ms) + {reports} laporan paralel ({report_ms}ms), "
+          f"{workers} worker, {db_connections} koneksi DB, {duration:.0f} detik per putaran")
+    runs = (
+        ('tanpa admission', None),
+        ('dengan admission', admission.Admission(admission.CLASSES, workers)),
+    )
+    for label, control in runs:
+        latencies, counts = _admission_run(control, workers, db_connections, reports, terminals,
+                                           duration, report_ms, checkout_ms)
+        print(f"  {label:<18} checkout p50 {_percentile(latencies, 0.50):7.1f} ms  "
+              f"p99 {_percentile(latencies, 0.99):7.1f} ms  ({len(latencies)} checkout)  "
+              f"laporan selesai {counts['report_done']}, ditolak 503 {counts['report_rejected']}")
+
+
+# Query tanpa batas (rekursif), mewakili laporan tanpa index di rentang besar
+RUNAWAY_SQL = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+               "SELECT MAX(x) FROM (SELECT x FROM c LIMIT %s)")
+
+
+def bench_statement_timeout(rows=20_000_000, timeout=2.0, cancel_after=0.5):
+    """Berapa lama query laporan runaway memegang koneksi: tanpa batas vs statement_timeout (SQLite)"""
+    # Batas report default (30 detik) terlalu lama untuk benchmark; dikembalikan di akhir
+    original = db_backend.STATEMENT_TIMEOUTS['report']
+    db_backend.STATEMENT_TIMEOUTS['report'] = timeout
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = db_backend.connect_sqlite(os.path.join(tmp, 'timeout.sqlite3'))
+            print(f"\n⏳ Query runaway ({rows:,} baris rekursif), batas report {timeout:g} detik")
+
+            def run(label, guard):
+                start = time.perf_counter()
+                outcome = 'selesai'
+                try:
+                    with guard:
+                        cursor = conn.cursor()
+                        cursor.execute(RUNAWAY_SQL, (rows,))
+                        cursor.fetchall()
+                        cursor.close()
+                except db_backend.QueryTimeout as e:
+                    outcome = str(e)
+                print(f"  {label:<28} koneksi dipegang {(time.perf_counter() - start) * 1000:9.1f} ms  ({outcome})")
+
+            from contextlib import nullcontext
+            run('tanpa batas', nullcontext())
+            run('statement_timeout(report)', db_backend.statement_timeout(conn, 'report'))
+            cancel_at = time.monotonic() + cancel_after
+            run(f'client putus setelah {cancel_after:g}s',
+                db_backend.statement_timeout(conn, 'report', cancel_when=lambda: time.monotonic() >= cancel_at))
+            conn.close()
+    finally:
+        db_backend.STATEMENT_TIMEOUTS['report'] = original
+
+
+if __name__ == "__main__":
+    print("⏱️  BENCHMARK & STRESS TEST - JustCani")
+    print("=" * 40)
+
+    while True:
+        print("\nPilih opsi:")
+        print("1. Stress test checkout paralel")
+        print("2. Analytics NumPy vs loop (1 juta line item)")
+        print("3. Cek routing replica (read/write splitting)")
+        print("4. Latensi search & checkout: MySQL vs SQLite")
+        print("5. Invalidasi cache antar worker")
+        print("6. Memori katalog 1 juta SKU: dict per worker vs snapshot mmap")
+        print("7. Latensi scan barcode: LIKE vs primary key vs hash index")
+        print("8. Render label barcode: python-barcode vs code128.py")
+        print("9. Foto profil: decode penuh vs draft decode + varian WebP")
+        print("10. Serialisasi JSON & kompresi response")
+        print("11. Cold start: import app + request pertama")
+        print("12. Admission control: checkout selagi laporan berjalan")
+        print("13. Batas waktu query laporan (statement timeout)")
+        print("14. Keluar")
+
+        choice = input("\nPilihan (1-14): ").strip()
+
+        if choice == '1':
+            try:
+                terminals = int(input("Jumlah terminal [8]: ").strip() or 8)
+                rounds = int(input("Checkout per terminal [50]: ").strip() or 50)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            stress_checkout(terminals, rounds)
+
+        elif choice == '2':
+            try:
+                line_items = int(input("Jumlah line item [1000000]: ").strip() or 1_000_000)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            bench_analytics(line_items)
+
+        elif choice == '3':
+            check_replicas()
+
+        elif choice == '4':
+            try:
+                products = int(input("Jumlah produk sintetis [20000]: ").strip() or 20_000)
+                terminals = int(input("Jumlah terminal [4]: ").strip() or 4)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            bench_backends(products, terminals=terminals)
+
+        elif choice == '5':
+            try:
+                workers = int(input("Jumlah proses worker [4]: ").strip() or 4)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            check_cache_coherence(workers)
+
+        elif choice == '6':
+            try:
+                skus = int(input("Jumlah SKU [1000000]: ").strip() or 1_000_000)
+                workers = int(input("Jumlah proses worker [4]: ").strip() or 4)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            bench_catalog_memory(skus, workers)
+
+        elif choice == '7':
+            try:
+                products = int(input("Jumlah produk sintetis [100000]: ").strip() or 100_000)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            bench_scan(products)
+
+        elif choice == '8':
+            try:
+                labels = int(input("Jumlah label [500]: ").strip() or 500)
+            except ValueError:
+                print("✗ Harus angka!")
+                continue
+            bench_barcodes(labels)
+
+        elif choice == '9':
+            bench_avatars()
+
+        elif choice == '10':
+            bench_json()
+
+        elif choice == '11':
+            bench_cold_start()
+
+        elif choice == '12':
+            bench_admission()
+
+        elif choice == '13':
+            bench_statement_timeout()
+
+        elif choice == '14':
+            print("Keluar...")
+            break
+
+        else:
+            print("✗ Pilihan tidak valid!")
@@ -0,0 +1,518 @@
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+import events
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# ============================================
+# SNAPSHOT KATALOG PRODUK_BIASA (MMAP, DIPAKAI BERSAMA)
+# ============================================
+# Katalog disimpan sebagai satu file biner berisi array lebar tetap, bukan
+# list dict per worker. Semua worker gunicorn me-mmap file yang sama
+# (read-only), jadi datanya ada sekali di page cache OS untuk semua proses:
+#
+#   header 128 byte   magic, seqlock, versi katalog, event terakhir, jumlah baris
+#   sku      int64[n]   urut naik
+#   price    int64[n]
+#   stok     int32[n]
+#   expired  int32[n]   date.toordinal()
+#   name_id  uint32[n]  indeks ke tabel nama (nama kembar disimpan sekali)
+#   name_rows/name_start  baris per nama (hasil search per nama)
+#   name_off + names      nama asli UTF-8
+#   fold_off + folded     nama huruf kecil dipisah \0 untuk search substring
+#   slots    uint32[2^k]  hash index SKU -> baris+1 (open addressing, load <= 0.5)
+#
+# Hanya ada satu penulis (task 'catalog_snapshot' + flock): rebuild penuh
+# ditulis ke file sementara lalu os.replace (atomik), perubahan stok dari event
+# 'stock' ditulis langsung ke file di bawah seqlock. Pembaca hanya memakai
+# snapshot yang versinya >= versi 'catalog' saat ini (events.version_stamp),
+# selain itu kembali ke query database dan meminta refresh.
+
+CATALOG_SNAPSHOT_PATH = os.environ.get(
+    'JUSTCANI_CATALOG_SNAPSHOT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.snapshot')
+)
+SNAPSHOT_MAGIC = b'JCCAT\x00\x00\x02'
+HEADER = struct.Struct('<8sqqqqdqqqq')
+HEADER_SIZE = 128
+# Offset field header yang berubah saat patch
+SEQ_OFFSET = 8
+STATE = struct.Struct('<qqqd')
+STATE_OFFSET = 16
+
+# Baris per query saat rebuild (keyset pagination)
+REBUILD_BATCH_ROWS = 50_000
+# Lebih dari ini SKU berubah sejak refresh terakhir: rebuild saja
+PATCH_MAX_SKUS = 5_000
+# Event dihapus retensi setelah EVENT_RETENTION_SECONDS; snapshot yang lebih tua dari ini di-rebuild
+PATCH_MAX_AGE_SECONDS = events.EVENT_RETENTION_SECONDS // 2
+# Snapshot basi: minta refresh lagi paling cepat tiap N detik per proses
+REFRESH_RETRY_SECONDS = 2
+SEARCH_LIMIT = 50
+# Fibonacci hashing untuk slot hash index
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+_lock = threading.Lock()
+_snapshot = None
+_requested = (None, 0)
+
+
+def _hash_bits(count):
+    """Jumlah slot hash index = 2^bits, minimal 2x jumlah baris"""
+    return max(1, (2 * count).bit_length())
+
+
+def _slot(sku, bits):
+    return ((sku * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+
+def _layout(count, name_count, names_size, fold_size):
+    """Offset tiap section (kelipatan 8 byte) dan ukuran file"""
+    sections = [
+        ('slots', 'I', 1 << _hash_bits(count)),
+        ('sku', 'q', count), ('price', 'q', count), ('stok', 'i', count), ('expired', 'i', count),
+        ('name_id', 'I', count), ('name_rows', 'I', count), ('name_start', 'I', name_count + 1),
+        ('name_off', 'I', name_count + 1), ('fold_off', 'I', name_count + 1),
+        ('names', 'B', names_size), ('folded', 'B', fold_size),
+    ]
+    offsets = {}
+    pos = HEADER_SIZE
+    for name, code, length in sections:
+        offsets[name] = (pos, code, length)
+        pos += -(-length * struct.calcsize(code) // 8) * 8
+    return offsets, pos
+
+
+# ============================================
+# PEMBACA
+# ============================================
+
+class Snapshot:
+    """Tampilan zero-copy atas file snapshot (memoryview.cast ke mmap)"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mm, 0)
+        if header[0] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} bukan file snapshot katalog")
+        self.count, name_count, names_size, fold_size = header[6:]
+        self._bits = _hash_bits(self.count)
+        self._mask = (1 << self._bits) - 1
+        view = memoryview(self._mm)
+        self.offsets, _ = _layout(self.count, name_count, names_size, fold_size)
+        for name, (pos, code, length) in self.offsets.items():
+            setattr(self, name, view[pos:pos + length * struct.calcsize(code)].cast(code))
+
+    def __len__(self):
+        return self.count
+
+    def _read(self, func):
+        """Jalankan func di bawah seqlock: ulangi kalau penulis sedang patch"""
+        while True:
+            seq = struct.unpack_from('<q', self._mm, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            result = func()
+            if struct.unpack_from('<q', self._mm, SEQ_OFFSET)[0] == seq:
+                return result
+
+    def state(self):
+        """(epoch, versi katalog, id event terakhir, waktu refresh)"""
+        return self._read(lambda: STATE.unpack_from(self._mm, STATE_OFFSET))
+
+    def is_fresh(self, stamp):
+        epoch, version, _, _ = self.state()
+        return epoch == stamp[0] and version >= stamp[1]
+
+    def name(self, name_id):
+        return str(self.names[self.name_off[name_id]:self.name_off[name_id + 1]], 'utf-8')
+
+    def _row(self, i):
+        return {
+            'no_SKU': self.sku[i],
+            'Name_product': self.name(self.name_id[i]),
+            'Price': self.price[i],
+            'expired_date': date.fromordinal(self.expired[i]),
+            'stok': self.stok[i]
+        }
+
+    def _index(self, sku):
+        """Baris untuk sku lewat hash index (O(1) rata-rata), None kalau tidak ada"""
+        slot = _slot(sku, self._bits)
+        while True:
+            row = self.slots[slot]
+            if row == 0:
+                return None
+            if self.sku[row - 1] == sku:
+                return row - 1
+            slot = (slot + 1) & self._mask
+
+    def get(self, sku):
+        """Satu produk (dict seperti cursor(dictionary=True)) atau None"""
+        def read():
+            i = self._index(sku)
+            return None if i is None else self._row(i)
+        return self._read(read)
+
+    def get_many(self, skus):
+        """{sku: produk} untuk SKU yang ada"""
+        def read():
+            found = {}
+            for sku in skus:
+                i = self._index(sku)
+                if i is not None:
+                    found[sku] = self._row(i)
+            return found
+        return self._read(read)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Sama dengan Inventory.search_produk: SKU persis atau nama mengandung query
+        (tanpa beda huruf besar/kecil). Query kosong = limit produk pertama.
+        """
+        query = str(query).strip()
+
+        def read():
+            if not query:
+                return [self._row(i) for i in range(min(limit, self.count))]
+            results = []
+            exact = self._index(int(query)) if query.isascii() and query.isdigit() else None
+            if exact is not None:
+                results.append(self._row(exact))
+            # Cari langsung di mmap (C, tanpa salin); \0 memisahkan nama supaya tidak cocok lintas nama
+            needle = query.lower().encode('utf-8')
+            base = self.offsets['folded'][0]
+            end = base + len(self.folded)
+            pos = base
+            while len(results) < limit:
+                pos = self._mm.find(needle, pos, end)
+                if pos < 0:
+                    break
+                name_id = bisect_right(self.fold_off, pos - base) - 1
+                for j in range(self.name_start[name_id], self.name_start[name_id + 1]):
+                    i = self.name_rows[j]
+                    if i != exact:
+                        results.append(self._row(i))
+                        if len(results) >= limit:
+                            break
+                # Lanjut dari nama berikutnya: satu nama cukup cocok sekali
+                pos = base + self.fold_off[name_id + 1]
+            return results
+        return self._read(read)
+
+    def info(self):
+        epoch, version, event_id, refreshed_at = self.state()
+        return {
+            'path': CATALOG_SNAPSHOT_PATH,
+            'skus': self.count,
+            'names': len(self.name_off) - 1,
+            'bytes': len(self._mm),
+            'version': [epoch, version],
+            'event_id': event_id,
+            'refreshed_at': refreshed_at
+        }
+
+
+def _open(path=None):
+    """Snapshot yang sedang di-mmap proses ini; buka ulang kalau file diganti rebuild"""
+    global _snapshot
+    path = path or CATALOG_SNAPSHOT_PATH
+    with _lock:
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            _snapshot = None
+            return None
+        if _snapshot is None or _snapshot.inode != inode:
+            try:
+                _snapshot = Snapshot(path)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"⚠️ Snapshot katalog tidak bisa dibuka: {e}")
+                _snapshot = None
+        return _snapshot
+
+
+def current():
+    """
+    Snapshot yang minimal sebaru versi 'catalog' saat ini, atau None (pakai
+    database) kalau belum ada / tertinggal. Kasus terakhir otomatis meminta refresh.
+    """
+    stamp, _ = events.version_stamp('catalog')
+    snapshot = _snapshot
+    if snapshot is None or not snapshot.is_fresh(stamp):
+        # File baru dari rebuild punya inode baru; patch stok terlihat langsung lewat mmap
+        snapshot = _open()
+        if snapshot is None or not snapshot.is_fresh(stamp):
+            request_refresh(stamp)
+            return None
+    return snapshot
+
+
+def request_refresh(stamp=None):
+    """Masukkan task refresh (dedup antar worker, throttle per proses)"""
+    global _requested
+    import tasks
+
+    now = time.time()
+    if stamp is not None and _requested[0] == stamp and now - _requested[1] < REFRESH_RETRY_SECONDS:
+        return
+    _requested = (stamp, now)
+    try:
+        tasks.enqueue('catalog_snapshot', dedup_key='catalog_snapshot')
+    except Exception as e:
+        print(f"⚠️ Gagal meminta refresh snapshot katalog: {e}")
+
+
+# ============================================
+# PENULIS (SATU PROSES PADA SATU WAKTU)
+# ============================================
+
+def write(path, rows, state):
+    """
+    Tulis snapshot dari rows (sku, nama, harga, expired_date, stok) urut SKU.
+    state = (epoch, versi katalog, id event terakhir). Atomik: file sementara + os.replace.
+    """
+    skus, prices, stoks, expired, name_ids = array('q'), array('q'), array('i'), array('i'), array('I')
+    name_index = {}
+    for sku, name, price, expired_date, stok in rows:
+        name_id = name_index.get(name)
+        if name_id is None:
+            name_id = name_index[name] = len(name_index)
+        skus.append(sku)
+        prices.append(price)
+        stoks.append(stok)
+        expired.append(expired_date.toordinal())
+        name_ids.append(name_id)
+    count, name_count = len(skus), len(name_index)
+
+    # Baris dikelompokkan per nama (counting sort) untuk hasil search
+    name_start = array('I', [0]) * (name_count + 1)
+    for name_id in name_ids:
+        name_start[name_id + 1] += 1
+    for i in range(name_count):
+        name_start[i + 1] += name_start[i]
+    fill = array('I', name_start[:-1]) if name_count else array('I')
+    name_rows = array('I', [0]) * count
+    for i, name_id in enumerate(name_ids):
+        name_rows[fill[name_id]] = i
+        fill[name_id] += 1
+
+    names, folded = [], []
+    name_off, fold_off = array('I', [0]), array('I', [0])
+    for name in name_index:
+        encoded = name.encode('utf-8')
+        names.append(encoded)
+        name_off.append(name_off[-1] + len(encoded))
+        encoded = name.lower().encode('utf-8') + b'\x00'
+        folded.append(encoded)
+        fold_off.append(fold_off[-1] + len(encoded))
+    names, folded = b''.join(names), b''.join(folded)
+
+    bits = _hash_bits(count)
+    mask = (1 << bits) - 1
+    slots = array('I', [0]) * (1 << bits)
+    for i, sku in enumerate(skus):
+        slot = _slot(sku, bits)
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = i + 1
+
+    offsets, size = _layout(count, name_count, len(names), len(folded))
+    sections = {
+        'slots': slots, 'sku': skus, 'price': prices, 'stok': stoks, 'expired': expired, 'name_id': name_ids,
+        'name_rows': name_rows, 'name_start': name_start, 'name_off': name_off, 'fold_off': fold_off,
+        'names': names, 'folded': folded,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, 0, *state, time.time(), count, name_count, len(names), len(folded)))
+        for name, (pos, _, _) in offsets.items():
+            f.seek(pos)
+            data = sections[name]
+            f.write(data if isinstance(data, bytes) else data.tobytes())
+        f.truncate(size)
+    os.replace(tmp_path, path)
+    return count
+
+
+def _read_catalog(db):
+    """Semua produk_biasa urut SKU, per batch supaya tidak ada result set raksasa"""
+    cursor = db.cursor()
+    try:
+        last_sku = None
+        while True:
+            if last_sku is None:
+                cursor.execute(
+                    "SELECT no_SKU, Name_product, Price, expired_date, stok FROM produk_biasa "
+                    "ORDER BY no_SKU LIMIT %s", (REBUILD_BATCH_ROWS,)
+                )
+            else:
+                cursor.execute(
+                    "SELECT no_SKU, Name_product, Price, expired_date, stok FROM produk_biasa "
+                    "WHERE no_SKU > %s ORDER BY no_SKU LIMIT %s", (last_sku, REBUILD_BATCH_ROWS)
+                )
+            rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < REBUILD_BATCH_ROWS:
+                break
+            last_sku = rows[-1][0]
+    finally:
+        cursor.close()
+
+
+def _patch(path, db, skus, state):
+    """
+    Tulis stok terbaru untuk skus langsung ke file (seqlock).
+    Return False kalau ada SKU yang tidak ada di snapshot/DB (butuh rebuild).
+    """
+    cursor = db.cursor()
+    current_stok = {}
+    try:
+        skus = sorted(skus)
+        for i in range(0, len(skus), 500):
+            chunk = skus[i:i + 500]
+            cursor.execute(
+                f"SELECT no_SKU, stok FROM produk_biasa WHERE no_SKU IN ({', '.join(['%s'] * len(chunk))})",
+                tuple(chunk)
+            )
+            current_stok.update(cursor.fetchall())
+    finally:
+        cursor.close()
+    if len(current_stok) != len(skus):
+        return False
+
+    snapshot = Snapshot(path)
+    indexes = [snapshot._index(sku) for sku in skus]
+    if None in indexes:
+        return False
+    stok_pos = snapshot.offsets['stok'][0]
+    with open(path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+        # Seqlock: angka ganjil = sedang ditulis, pembaca mengulang bacaannya
+        seq = struct.unpack_from('<q', mm, SEQ_OFFSET)[0]
+        struct.pack_into('<q', mm, SEQ_OFFSET, seq + 1)
+        for sku, i in zip(skus, indexes):
+            struct.pack_into('<i', mm, stok_pos + 4 * i, current_stok[sku])
+        STATE.pack_into(mm, STATE_OFFSET, *state, time.time())
+        struct.pack_into('<q', mm, SEQ_OFFSET, seq + 2)
+    return True
+
+
+class _WriterLock:
+    """Satu penulis per file snapshot, juga antar proses (flock)"""
+    _thread_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if FCNTL_AVAILABLE:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+        self._thread_lock.release()
+
+
+def _plan(snapshot, stamp, changes, oldest, latest):
+    """None = rebuild penuh, selain itu set SKU yang stoknya perlu di-patch"""
+    if snapshot is None:
+        return None
+    epoch, _, event_id, refreshed_at = snapshot.state()
+    # Event yang sudah dihapus retensi, tasks.db baru, atau daftar event terpotong limit
+    if (epoch != stamp[0] or time.time() - refreshed_at > PATCH_MAX_AGE_SECONDS
+            or oldest > event_id + 1 or latest < event_id or len(changes) >= PATCH_MAX_SKUS):
+        return None
+    skus = set()
+    for _, event_type, data in changes:
+        if event_type == 'catalog' or (event_type == 'lelang' and data.get('moved')):
+            return None
+        if event_type == 'stock':
+            skus.update(int(item['sku']) for item in data.get('items', []))
+    return None if len(skus) > PATCH_MAX_SKUS else skus
+
+
+def refresh(path=None, rebuild=False, max_rounds=3):
+    """
+    Bawa snapshot ke versi katalog terbaru: patch stok kalau cukup, rebuild kalau
+    perlu. Diulang selama versi masih bergerak (maks max_rounds).
+    Return {'mode': 'rebuild'|'patch'|'fresh', 'skus': jumlah, 'version': [...]}
+    """
+    from logic import Database
+
+    path = path or CATALOG_SNAPSHOT_PATH
+    result = None
+    with _WriterLock(path):
+        for _ in range(max_rounds):
+            try:
+                snapshot = None if rebuild else Snapshot(path)
+            except (OSError, ValueError, struct.error):
+                snapshot = None
+            event_id = snapshot.state()[2] if snapshot else 0
+            # Versi dibaca SEBELUM data: isi snapshot tidak pernah lebih lama dari versinya
+            stamp, updated_at, changes, oldest, latest = events.changes_since(event_id, 'catalog', limit=PATCH_MAX_SKUS)
+            if snapshot and snapshot.state()[:2] == stamp and latest == event_id:
+                result = result or {'mode': 'fresh', 'skus': snapshot.count, 'version': list(stamp)}
+                break
+
+            skus = _plan(snapshot, stamp, changes, oldest, latest)
+            state = stamp + (latest,)
+            db, _ = Database.get_read_conn(updated_at)
+            if not db:
+                raise RuntimeError("Database tidak terhubung")
+            start = time.perf_counter()
+            try:
+                if skus is not None and _patch(path, db, skus, state):
+                    result = {'mode': 'patch', 'skus': len(skus), 'version': list(stamp)}
+                else:
+                    count = write(path, _read_catalog(db), state)
+                    result = {'mode': 'rebuild', 'skus': count, 'version': list(stamp)}
+            finally:
+                db.close()
+            result['seconds'] = round(time.perf_counter() - start, 3)
+            rebuild = False
+            if events.version_stamp('catalog')[0] == stamp:
+                break
+    return result
+
+
+def status(path=None):
+    snapshot = _open(path)
+    if snapshot is None:
+        print("ℹ️  Snapshot katalog belum dibuat")
+        return None
+    info = snapshot.info()
+    fresh = snapshot.is_fresh(events.version_stamp('catalog')[0])
+    print(f"  {info['path']}: {info['skus']:,} SKU, {info['names']:,} nama unik, "
+          f"{info['bytes'] / 1024 / 1024:.1f} MB, versi {info['version']} ({'terbaru' if fresh else 'tertinggal'})")
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot katalog produk_biasa untuk semua worker (mmap)")
+    parser.add_argument('command', choices=['build', 'refresh', 'status'])
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        status()
+    else:
+        print(refresh(rebuild=args.command == 'build'))
@@ -0,0 +1,214 @@
+import base64
+from functools import lru_cache
+from html import escape
+from io import BytesIO
+
+from lazy_imports import lazy_import
+
+# Pillow baru dimuat saat bitmap pertama dirender; SVG tidak butuh Pillow sama sekali
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
+PILLOW_AVAILABLE = Image is not None
+
+# ============================================
+# ENCODER CODE128 (TANPA PYTHON-BARCODE)
+# ============================================
+# Pola modul dihitung sekali per isi barcode (lru_cache) lalu dirender langsung:
+#   render()/render_label()  bitmap PIL: satu baris piksel di-resize jadi batang,
+#                            teks label digambar di kanvas yang sama, PNG di-encode sekali
+#   svg()                    satu <path> untuk semua batang, tanpa Pillow sama sekali
+# SKU (angka) memakai code set C: dua digit per simbol, barcode lebih pendek.
+
+# Lebar bar/spasi tiap simbol 0-106 (bar dulu), total 11 modul; STOP 13 modul
+PATTERNS = (
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '2331112',
+)
+CODE_B, CODE_C = 100, 99
+START_B, START_C, STOP = 104, 105, 106
+
+# Zona sepi kiri/kanan (modul), minimal 10 menurut spesifikasi
+QUIET_MODULES = 10
+# Lebar modul (X-dimension) untuk label cetak
+MODULE_MM = 0.25
+
+
+def _digit_run(data, i):
+    end = i
+    while end < len(data) and data[end].isdigit():
+        end += 1
+    return end - i
+
+
+@lru_cache(maxsize=4096)
+def encode(data):
+    """Nilai simbol Code128 (start, data, checksum, stop) untuk string ASCII 32-126"""
+    data = str(data)
+    if not data or any(not 32 <= ord(ch) <= 126 for ch in data):
+        raise ValueError(f"Code128: isi barcode tidak valid: {data!r}")
+
+    run = _digit_run(data, 0)
+    use_c = run >= 4 or (run == len(data) and run % 2 == 0)
+    symbols = [START_C if use_c else START_B]
+    i = 0
+    while i < len(data):
+        run = _digit_run(data, i)
+        if use_c:
+            if run >= 2:
+                symbols.append(int(data[i:i + 2]))
+                i += 2
+                continue
+            use_c = False
+            symbols.append(CODE_B)
+        # Pindah ke C untuk deret angka panjang; angka ganjil pertama tetap di B
+        if run >= 4 and (run % 2 == 0 or run >= 5):
+            if run % 2:
+                symbols.append(ord(data[i]) - 32)
+                i += 1
+            use_c = True
+            symbols.append(CODE_C)
+            continue
+        symbols.append(ord(data[i]) - 32)
+        i += 1
+
+    checksum = symbols[0] + sum(pos * value for pos, value in enumerate(symbols[1:], 1))
+    return tuple(symbols) + (checksum % 103, STOP)
+
+
+@lru_cache(maxsize=4096)
+def bar_widths(data):
+    """Lebar bar/spasi berselang-seling (dalam modul), mulai dari bar"""
+    return tuple(int(width) for value in encode(data) for width in PATTERNS[value])
+
+
+def modules(data):
+    """Pola modul sebagai string '1' (bar) / '0' (spasi), tanpa zona sepi"""
+    return ''.join(('1' if k % 2 == 0 else '0') * width for k, width in enumerate(bar_widths(data)))
+
+
+def px_per_module(dpi, module_mm=MODULE_MM):
+    """Piksel per modul untuk printer dengan dpi tertentu (minimal 1)"""
+    return max(1, round(dpi * module_mm / 25.4))
+
+
+# ============================================
+# BITMAP (PIL)
+# ============================================
+
+@lru_cache(maxsize=8)
+def _font(size):
+    for name in ("arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1: font bitmap tanpa ukuran
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1024)
+def _bar_row(data, module_px):
+    """Satu baris piksel grayscale (0 = hitam) termasuk zona sepi"""
+    quiet = b'\xff' * (QUIET_MODULES * module_px)
+    bars = b''.join((b'\x00' if k % 2 == 0 else b'\xff') * (width * module_px)
+                    for k, width in enumerate(bar_widths(data)))
+    return quiet + bars + quiet
+
+
+def _draw_bars(canvas, data, module_px, height_px, position):
+    """Tempel batang: satu baris piksel di-resize (nearest) setinggi height_px"""
+    row = _bar_row(data, module_px)
+    canvas.paste(Image.frombytes('L', (len(row), 1), row).resize((len(row), height_px), Image.NEAREST), position)
+
+
+def render(data, module_px=2, height_px=60, text=True, font_size=14):
+    """Barcode + teks isi di bawahnya sebagai Image 'L'"""
+    data = str(data)
+    width = len(_bar_row(data, module_px))
+    text_height = font_size + 8 if text else 0
+    canvas = Image.new('L', (width, height_px + text_height), 255)
+    _draw_bars(canvas, data, module_px, height_px, (0, 0))
+    if text:
+        ImageDraw.Draw(canvas).text((width // 2, height_px + 2), data, fill=0, font=_font(font_size), anchor='ma')
+    return canvas
+
+
+def render_label(sku, product_name, price, module_px=2, height_px=60):
+    """
+    Label produk siap cetak: nama di atas, barcode, SKU kiri dan harga kanan
+    di bawah; semua digambar di satu kanvas (satu kali encode saat disimpan).
+    """
+    sku = str(sku)
+    bars_width = len(_bar_row(sku, module_px))
+    width = max(bars_width, 220)
+    canvas = Image.new('RGB', (width, height_px + 70), 'white')
+    _draw_bars(canvas, sku, module_px, height_px, ((width - bars_width) // 2, 30))
+    draw = ImageDraw.Draw(canvas)
+    name = product_name[:20] + "..." if len(product_name) > 20 else product_name
+    draw.text((10, 5), name, fill='black', font=_font(16))
+    draw.text((10, height_px + 40), f"SKU: {sku}", fill='gray', font=_font(14))
+    price_text = f"Rp{int(price):,}"
+    draw.text((width - draw.textlength(price_text, font=_font(14)) - 10, height_px + 40),
+              price_text, fill='red', font=_font(14))
+    return canvas
+
+
+def to_png(image, dpi=None):
+    buffer = BytesIO()
+    image.save(buffer, 'PNG', **({'dpi': (dpi, dpi)} if dpi else {}))
+    return buffer.getvalue()
+
+
+# ============================================
+# SVG (TANPA PILLOW)
+# ============================================
+
+def _bar_path(data, height):
+    """Semua batang sebagai satu path (satuan modul, mulai setelah zona sepi)"""
+    x = QUIET_MODULES
+    parts = []
+    for k, width in enumerate(bar_widths(data)):
+        if k % 2 == 0:
+            parts.append(f"M{x} 0h{width}v{height}h-{width}z")
+        x += width
+    return ''.join(parts)
+
+
+def svg(data, module_mm=MODULE_MM, height_mm=12, text=True):
+    """Barcode sebagai SVG (ukuran fisik dalam mm, viewBox dalam modul)"""
+    data = str(data)
+    total = sum(bar_widths(data)) + 2 * QUIET_MODULES
+    height = round(height_mm / module_mm)
+    text_height = 14 if text else 0
+    caption = (f'<text x="{total / 2}" y="{height + 11}" font-family="monospace" font-size="10" '
+               f'text-anchor="middle">{escape(data)}</text>') if text else ''
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{total * module_mm:g}mm" '
+        f'height="{(height + text_height) * module_mm:g}mm" viewBox="0 0 {total} {height + text_height}" '
+        f'shape-rendering="crispEdges"><rect width="100%" height="100%" fill="#fff"/>'
+        f'<path d="{_bar_path(data, height)}"/>{caption}</svg>'
+    )
+
+
+def png_data_uri(data, module_px=2, height_px=60):
+    """Data URI PNG untuk kolom barcode_image; SVG kalau Pillow tidak ada"""
+    if not PILLOW_AVAILABLE:
+        return svg_data_uri(data)
+    return "data:image/png;base64," + base64.b64encode(to_png(render(data, module_px, height_px))).decode('ascii')
+
+
+def svg_data_uri(data, **options):
+    return "data:image/svg+xml;base64," + base64.b64encode(svg(data, **options).encode('utf-8')).decode('ascii')
@@ -0,0 +1,545 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+try:
+    import mysql.connector
+    import mysql.connector.pooling
+    MYSQL_AVAILABLE = True
+except ImportError:
+    MYSQL_AVAILABLE = False
+
+# ============================================
+# BACKEND DATABASE (MYSQL / SQLITE)
+# ============================================
+# Inventory, Transaction, TransactionHistory dan CashierSystem bicara ke koneksi
+# bergaya mysql.connector (cursor(dictionary=True), parameter %s, commit/rollback).
+# Backend SQLite membungkus sqlite3 dengan antarmuka yang sama, sedangkan SQL yang
+# memang beda dialek (kunci baris, aritmetika tanggal, upsert) diambil dari
+# dialect_of(conn). Cocok untuk satu toko / mini-PC tanpa server MySQL.
+#
+#   JUSTCANI_DB_BACKEND=sqlite            pakai SQLite (default: mysql)
+#   JUSTCANI_SQLITE_PATH=/data/kasir.db   lokasi file (default: db_kasir1.sqlite3)
+#   JUSTCANI_DB_POOL_SIZE=N               pool koneksi MySQL per proses (default: 0 = tanpa
+#                                         pool, 1 kalau serverless)
+#   JUSTCANI_DB_CONNECT_TIMEOUT=3         batas detik konek ke MySQL
+#   JUSTCANI_DB_BREAKER_FAILURES=3        gagal konek berturut-turut sebelum circuit breaker terbuka
+#   JUSTCANI_DB_BREAKER_OPEN_SECONDS=5    lama breaker terbuka (fail fast) sebelum probe ulang
+#   JUSTCANI_STATEMENT_TIMEOUT_REPORT=30  batas detik per query untuk kategori report (juga SCAN, BATCH)
+
+DB_BACKEND = os.environ.get('JUSTCANI_DB_BACKEND', 'mysql').strip().lower()
+SQLITE_DB_PATH = os.environ.get(
+    'JUSTCANI_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_kasir1.sqlite3')
+)
+# Serverless (Vercel men-set VERCEL=1): proses dipakai ulang selama masih hangat
+SERVERLESS = bool(os.environ.get('VERCEL') or os.environ.get('JUSTCANI_SERVERLESS'))
+# Koneksi MySQL yang di-close() kembali ke pool dan dipakai request/invocation berikutnya,
+# jadi invocation hangat tidak membayar handshake + auth MySQL lagi
+DB_POOL_SIZE = int(os.environ.get('JUSTCANI_DB_POOL_SIZE', 1 if SERVERLESS else 0))
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DB', 'db_kasir1_sqlite.sql')
+# Tunggu lock tulis sebelum menyerah dengan "database is locked"
+SQLITE_BUSY_TIMEOUT_SECONDS = 5
+# Tanpa batas, konek ke host yang mati bisa menunggu timeout TCP OS (puluhan detik)
+DB_CONNECT_TIMEOUT = int(os.environ.get('JUSTCANI_DB_CONNECT_TIMEOUT', 3))
+DB_BREAKER_FAILURES = int(os.environ.get('JUSTCANI_DB_BREAKER_FAILURES', 3))
+DB_BREAKER_OPEN_SECONDS = float(os.environ.get('JUSTCANI_DB_BREAKER_OPEN_SECONDS', 5))
+# Batas waktu per statement, per kategori (nama sama dengan kelas admission.py).
+# Checkout sengaja tidak dibatasi: tulisnya sudah diatur lock wait timeout + retry.
+STATEMENT_TIMEOUTS = {
+    category: float(os.environ.get(f'JUSTCANI_STATEMENT_TIMEOUT_{category.upper()}', default))
+    for category, default in (('scan', 2), ('report', 30), ('batch', 120))
+}
+# Interval cek client putus / deadline watchdog selama query berjalan
+CANCEL_POLL_SECONDS = 0.5
+# SQLite: cek deadline tiap N instruksi VM
+SQLITE_PROGRESS_STEPS = 10_000
+
+
+class DriverMissingError(Exception):
+    """Backend mysql dipilih tapi mysql-connector-python tidak terpasang"""
+
+
+class DatabaseUnavailable(Exception):
+    """Database tidak bisa dihubungi (atau breaker terbuka); retry_after = detik sebelum coba lagi"""
+
+    def __init__(self, message, retry_after=DB_BREAKER_OPEN_SECONDS):
+        super().__init__(message)
+        self.retry_after = max(1, round(retry_after))
+
+
+class QueryTimeout(DatabaseUnavailable):
+    """Query melewati batas waktu kategorinya, atau dibatalkan karena client sudah pergi"""
+
+    def __init__(self, category, seconds, client_gone=False):
+        if client_gone:
+            message = "Query dibatalkan: client sudah menutup koneksi"
+        elif seconds:
+            message = f"Query dibatalkan: melewati batas waktu {seconds:g} detik ({category})"
+        else:
+            message = f"Query dibatalkan oleh server ({category})"
+        super().__init__(message)
+        self.category = category
+        self.seconds = seconds
+        self.client_gone = client_gone
+
+
+# Error yang ditangkap logic.py: error MySQL atau SQLite, tergantung backend
+Error = (DriverMissingError, sqlite3.Error) + ((mysql.connector.Error,) if MYSQL_AVAILABLE else ())
+
+
+class MySQLDialect:
+    name = 'mysql'
+    # Kunci baris yang dibaca sampai commit (InnoDB)
+    for_update = " FOR UPDATE"
+
+    # Deadlock (1213) dan lock wait timeout (1205) di InnoDB aman untuk diulang
+    RETRYABLE_ERRNOS = (1213, 1205)
+
+    @staticmethod
+    def begin_write(conn):
+        """MySQL mengunci per baris lewat FOR UPDATE, tidak perlu kunci di awal"""
+
+    @staticmethod
+    def is_retryable(e):
+        return getattr(e, 'errno', None) in MySQLDialect.RETRYABLE_ERRNOS
+
+    @staticmethod
+    def date_after_today():
+        """Tanggal hari ini + N hari (satu parameter %s berisi N)"""
+        return "CURDATE() + INTERVAL %s DAY"
+
+    @staticmethod
+    def days_until(column):
+        """Sisa hari dari hari ini sampai tanggal di column"""
+        return f"DATEDIFF({column}, CURDATE())"
+
+    # 3024: MAX_EXECUTION_TIME (MySQL), 1969: max_statement_time (MariaDB), 1317: KILL QUERY
+    TIMEOUT_ERRNOS = (3024, 1969, 1317)
+
+    @staticmethod
+    def is_timeout(e):
+        return getattr(e, 'errno', None) in MySQLDialect.TIMEOUT_ERRNOS
+
+    @staticmethod
+    def set_statement_timeout(conn, seconds):
+        """Batas waktu sesi ini; None = tanpa batas. MySQL hanya membatasi SELECT."""
+        cursor = conn.cursor()
+        try:
+            if 'MariaDB' in conn.get_server_info():
+                cursor.execute(f"SET SESSION max_statement_time = {float(seconds or 0)}")
+            else:
+                cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int((seconds or 0) * 1000)}")
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def cancel(conn):
+        """KILL QUERY dari koneksi lain (koneksi yang sedang query tidak bisa dipakai)"""
+        killer = mysql.connector.connect(**conn.connect_params)
+        try:
+            cursor = killer.cursor()
+            cursor.execute(f"KILL QUERY {int(conn.connection_id)}")
+            cursor.close()
+        finally:
+            killer.close()
+
+    @staticmethod
+    def upsert(table, columns, key, update_columns):
+        """INSERT satu baris; kalau key sudah ada, update_columns ditimpa nilai baru"""
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(f'{col} = VALUES({col})' for col in update_columns)}"
+        )
+
+
+class SQLiteDialect:
+    name = 'sqlite'
+    # SQLite tidak punya kunci baris: begin_write() mengambil kunci tulis database
+    for_update = ""
+
+    @staticmethod
+    def begin_write(conn):
+        """
+        BEGIN IMMEDIATE di awal unit of work: penulis lain menunggu (busy_timeout)
+        sampai commit, sama efeknya dengan FOR UPDATE tapi untuk seluruh database.
+        """
+        conn.begin_immediate()
+
+    @staticmethod
+    def is_retryable(e):
+        # Lock tulis tidak didapat dalam busy_timeout; aman diulang
+        return isinstance(e, sqlite3.OperationalError) and ('locked' in str(e) or 'busy' in str(e))
+
+    @staticmethod
+    def is_timeout(e):
+        return isinstance(e, sqlite3.OperationalError) and 'interrupted' in str(e)
+
+    @staticmethod
+    def set_statement_timeout(conn, seconds):
+        conn.set_deadline(time.monotonic() + seconds if seconds else None)
+
+    @staticmethod
+    def cancel(conn):
+        conn.interrupt()
+
+    @staticmethod
+    def date_after_today():
+        return "date('now', 'localtime', %s || ' days')"
+
+    @staticmethod
+    def days_until(column):
+        return f"CAST(julianday(date({column})) - julianday(date('now', 'localtime')) AS INTEGER)"
+
+    @staticmethod
+    def upsert(table, columns, key, update_columns):
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {', '.join(f'{col} = excluded.{col}' for col in update_columns)}"
+        )
+
+
+# ============================================
+# CIRCUIT BREAKER KONEKSI
+# ============================================
+# Database mati: tanpa breaker setiap request menunggu connect timeout penuh lalu
+# gagal. Setelah DB_BREAKER_FAILURES gagal konek berturut-turut breaker 'open' dan
+# permintaan koneksi langsung ditolak selama DB_BREAKER_OPEN_SECONDS. Sesudah itu
+# 'half_open': satu request dibiarkan mencoba (probe); berhasil -> 'closed' lagi,
+# gagal -> 'open' lagi. Per proses, dipakai Database.get_conn (logic.py).
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=DB_BREAKER_FAILURES, open_seconds=DB_BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_error = None
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Boleh mencoba konek sekarang? Saat half_open hanya satu pemanggil (probe) yang dapat True"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print(f"✅ Database {self.name} tersambung lagi, circuit breaker ditutup")
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error)
+            self.probing = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state == 'closed':
+                    self.trips += 1
+                    print(f"⚠️ Database {self.name} tidak bisa dihubungi ({error}), "
+                          f"circuit breaker terbuka {self.open_seconds:g} detik")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def retry_after(self):
+        """Detik sampai probe berikutnya boleh dicoba (0 kalau closed)"""
+        with self.lock:
+            if self.state == 'closed':
+                return 0
+            return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect_mysql(**params):
+    if not MYSQL_AVAILABLE:
+        raise DriverMissingError("mysql-connector-python belum terpasang (atau pakai JUSTCANI_DB_BACKEND=sqlite)")
+    params.setdefault('connection_timeout', DB_CONNECT_TIMEOUT)
+    conn = _connect_mysql(params)
+    # Untuk KILL QUERY dari koneksi lain (MySQLDialect.cancel)
+    conn.connect_params = params
+    return conn
+
+
+def _connect_mysql(params):
+    if DB_POOL_SIZE <= 0:
+        return mysql.connector.connect(**params)
+
+    key = tuple(sorted(params.items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                # Pool per DSN (primary & tiap replica), dibuat saat koneksi pertama diminta.
+                # reset_session: transaksi/snapshot baca sisa request lain tidak ikut terbawa.
+                pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name=f"justcani{len(_pools)}",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **params
+                )
+                _pools[key] = pool
+    try:
+        # Koneksi di pool di-ping dulu dan disambung ulang kalau sudah putus
+        return pool.get_connection()
+    except mysql.connector.errors.PoolError:
+        # Semua koneksi pool sedang dipakai thread lain
+        return mysql.connector.connect(**params)
+
+
+def dialect_of(conn):
+    """Dialect SQL untuk koneksi dari Database.get_conn()"""
+    return SQLiteDialect if isinstance(conn, SQLiteConnection) else MySQLDialect
+
+
+# ============================================
+# BATAS WAKTU & PEMBATALAN QUERY
+# ============================================
+# Laporan tanpa index atau rentang sangat besar bisa memegang koneksi (dan lock)
+# tanpa batas. statement_timeout() memasang batas waktu per kategori di sesi
+# koneksi selama blok berjalan:
+#   MySQL    SET SESSION MAX_EXECUTION_TIME (ms, SELECT saja)
+#   MariaDB  SET SESSION max_statement_time (detik, semua statement)
+#   SQLite   progress handler yang menghentikan VM setelah deadline
+# cancel_when: callable yang dicek tiap CANCEL_POLL_SECONDS di thread watchdog
+# (mis. client HTTP sudah putus); begitu True query dibatalkan (KILL QUERY /
+# sqlite3 interrupt). Server yang menolak SET juga dijaga watchdog sampai deadline.
+# Error timeout/batal keluar dari blok sebagai QueryTimeout.
+
+@contextmanager
+def statement_timeout(conn, category, cancel_when=None):
+    seconds = STATEMENT_TIMEOUTS.get(category)
+    if conn is None or (not seconds and cancel_when is None):
+        yield
+        return
+
+    dialect = dialect_of(conn)
+    server_side = False
+    if seconds:
+        try:
+            dialect.set_statement_timeout(conn, seconds)
+            server_side = True
+        except Error as e:
+            print(f"⚠️ Batas waktu query tidak didukung server ({e}), pakai watchdog")
+
+    done = threading.Event()
+    client_gone = threading.Event()
+    watchdog = None
+    if cancel_when is not None or (seconds and not server_side):
+        deadline = time.monotonic() + seconds if seconds and not server_side else None
+
+        def watch():
+            while not done.wait(CANCEL_POLL_SECONDS):
+                try:
+                    if cancel_when is not None and cancel_when():
+                        client_gone.set()
+                    elif deadline is None or time.monotonic() < deadline:
+                        continue
+                    dialect.cancel(conn)
+                except Exception as e:
+                    print(f"⚠️ Gagal membatalkan query: {e}")
+                return
+
+        watchdog = threading.Thread(target=watch, name='query-watchdog', daemon=True)
+        watchdog.start()
+
+    try:
+        yield
+    except Error as e:
+        if dialect.is_timeout(e):
+            print(f"⚠️ Query {category} dibatalkan ({'client putus' if client_gone.is_set() else 'timeout'}): {e}")
+            raise QueryTimeout(category, seconds, client_gone.is_set()) from e
+        raise
+    finally:
+        done.set()
+        if watchdog:
+            watchdog.join()
+        if server_side:
+            try:
+                dialect.set_statement_timeout(conn, None)
+            except Error:
+                # Koneksi rusak setelah dibatalkan: pemanggil tetap akan close()
+                pass
+
+
+# ============================================
+# SQLITE DENGAN ANTARMUKA MYSQL.CONNECTOR
+# ============================================
+
+# %s -> ?, %% -> % (aturan escape yang sama dengan mysql.connector)
+_PARAM_PATTERN = re.compile(r"%([s%])")
+
+
+@lru_cache(maxsize=512)
+def _translate(sql):
+    return _PARAM_PATTERN.sub(lambda m: '?' if m.group(1) == 's' else '%', sql)
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+# Kolom DATE/DATETIME/TIMESTAMP/DECIMAL kembali sebagai date/datetime/Decimal seperti di MySQL
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('TIMESTAMP', _parse_datetime)
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()))
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, str)
+
+
+class SQLiteCursor:
+    """Cursor sqlite3 dengan parameter %s dan baris dict (dictionary=True)"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([col[0] for col in self._cursor.description], row))
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(_translate(sql), [tuple(params) for params in seq_params])
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self._dictionary or not rows:
+            return rows
+        names = [col[0] for col in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Koneksi sqlite3 dengan commit/rollback manual seperti mysql.connector
+    (autocommit mati). Transaksi dimulai otomatis oleh sqlite3 sebelum
+    INSERT/UPDATE/DELETE; begin_immediate() untuk mengunci sejak awal.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path,
+            timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def set_deadline(self, deadline):
+        """Statement yang masih jalan setelah deadline (time.monotonic) gagal dengan 'interrupted'"""
+        if deadline is None:
+            self._conn.set_progress_handler(None, 0)
+        else:
+            self._conn.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+
+    def interrupt(self):
+        self._conn.interrupt()
+
+    def begin_immediate(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+
+    def close(self):
+        self._conn.close()
+
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_sqlite_schema(path=None):
+    """Buat tabel (sekali per proses per file); WAL supaya baca tidak menunggu tulis"""
+    path = path or SQLITE_DB_PATH
+    if path in _schema_ready:
+        return
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with open(SQLITE_SCHEMA_PATH, encoding='utf-8') as f:
+                conn.executescript(f.read())
+        finally:
+            conn.close()
+        _schema_ready.add(path)
+
+
+def connect_sqlite(path=None):
+    path = path or SQLITE_DB_PATH
+    ensure_sqlite_schema(path)
+    return SQLiteConnection(path)
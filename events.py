@@ -0,0 +1,269 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from tasks import TASK_DB_PATH, _json_default
+
+# ============================================
+# EVENT PERUBAHAN DATA (SERVER-SENT EVENTS)
+# ============================================
+# Event disimpan di file SQLite yang sama dengan antrian task, jadi event dari
+# worker gunicorn mana pun terlihat oleh semua koneksi SSE. Di proses yang sama
+# listener langsung dibangunkan; dari proses lain terlihat di polling berikutnya.
+#
+# Jenis event:
+#   transaction  transaksi baru (biasa/lelang)
+#   stock        stok produk biasa berubah: {items: [{sku, stok}]}
+#   lelang       produk masuk/keluar lelang: {moved: [...], removed: [sku]}
+#   catalog      katalog berubah massal (import): client ambil ulang daftar
+#
+# Setiap event juga menaikkan counter versi data (lihat VERSION_OF_EVENT) di
+# transaksi SQLite yang sama. Counter ini dipakai sebagai ETag API sehingga
+# polling yang datanya belum berubah dijawab 304 tanpa query ke MySQL, dan
+# sebagai bus invalidasi cache per proses (local_cache.py): version_stamp()
+# cukup membaca PRAGMA data_version (shared memory WAL) selama tidak ada commit.
+
+EVENT_RETENTION_SECONDS = 3600
+# Satu koneksi SSE memegang satu thread worker. Stream ditutup setelah
+# SSE_MAX_SECONDS (EventSource otomatis reconnect dengan Last-Event-ID), dan per
+# proses paling banyak SSE_MAX_STREAMS stream terbuka; sisanya (dan semua koneksi
+# di serverless) dijawab mode polling: kirim event yang tertunda lalu tutup, browser
+# datang lagi setelah SSE_POLL_RETRY_MS. Lihat juga gunicorn.conf.py.
+SSE_MAX_SECONDS = float(os.environ.get('JUSTCANI_SSE_MAX_SECONDS', 30))
+SSE_MAX_STREAMS = int(os.environ.get('JUSTCANI_SSE_MAX_STREAMS', 4))
+SSE_RETRY_MS = 3000
+SSE_POLL_RETRY_MS = int(os.environ.get('JUSTCANI_SSE_POLL_RETRY_MS', 5000))
+# Koneksi kasir tidak perlu data omzet
+ADMIN_ONLY_EVENTS = {'transaction'}
+# Jenis event -> counter versi yang dinaikkan
+VERSION_OF_EVENT = {
+    'transaction': 'transaction',
+    'stock': 'catalog',
+    'lelang': 'catalog',
+    'catalog': 'catalog',
+}
+
+_local = threading.local()
+_new_event = threading.Condition()
+_stream_slots = threading.BoundedSemaphore(max(1, SSE_MAX_STREAMS))
+_publish_count = 0
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(TASK_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # Epoch acak supaya ETag lama tidak bentrok kalau file tasks.db dihapus
+        conn.execute(
+            "INSERT OR IGNORE INTO versions (name, value, updated_at) VALUES ('epoch', ?, ?)",
+            (random.getrandbits(31), time.time())
+        )
+        _local.conn = conn
+    return conn
+
+
+def publish(event_type, data):
+    """Kirim event ke semua dashboard. Tidak pernah melempar error ke pemanggil."""
+    global _publish_count
+    try:
+        conn = _conn()
+        now = time.time()
+        payload = json.dumps(data, default=_json_default)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO events (type, data, created_at) VALUES (?, ?, ?)",
+                (event_type, payload, now)
+            )
+            if event_type in VERSION_OF_EVENT:
+                _bump(conn, VERSION_OF_EVENT[event_type], now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            # data_version tidak berubah untuk commit dari koneksi sendiri
+            _local.stamp = None
+        _publish_count += 1
+        if _publish_count % 100 == 0:
+            conn.execute("DELETE FROM events WHERE created_at < ?", (now - EVENT_RETENTION_SECONDS,))
+    except Exception as e:
+        print(f"⚠️ Gagal publish event {event_type}: {e}")
+        return
+    with _new_event:
+        _new_event.notify_all()
+
+
+def _bump(conn, name, now):
+    conn.execute(
+        "INSERT INTO versions (name, value, updated_at) VALUES (?, 1, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1, updated_at = excluded.updated_at",
+        (name, now)
+    )
+
+
+def bump(name):
+    """Naikkan versi data tanpa event SSE (mis. barcode selesai dirender)"""
+    try:
+        conn = _conn()
+        try:
+            _bump(conn, name, time.time())
+        finally:
+            _local.stamp = None
+    except Exception as e:
+        print(f"⚠️ Gagal menaikkan versi {name}: {e}")
+
+
+def version_stamp(*names):
+    """
+    Stempel versi untuk cache per proses: ((epoch, versi name...), updated_at terbaru).
+    Selama tidak ada commit ke tasks.db dari proses mana pun, hanya PRAGMA
+    data_version yang dibaca (tanpa I/O, dari shared memory WAL).
+    """
+    conn = _conn()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    stamp = getattr(_local, 'stamp', None)
+    if stamp is None or stamp[0] != data_version:
+        # Commit di antara dua query hanya membuat pembacaan berikutnya diulang
+        rows = conn.execute("SELECT name, value, updated_at FROM versions").fetchall()
+        stamp = _local.stamp = (data_version, {name: (value, updated_at) for name, value, updated_at in rows})
+    versions = stamp[1]
+    current = [versions.get(name, (0, 0)) for name in names]
+    return (
+        (versions.get('epoch', (0, 0))[0],) + tuple(value for value, _ in current),
+        max([updated_at for _, updated_at in current], default=0)
+    )
+
+
+def get_versions(*names):
+    """
+    Versi data saat ini: (epoch, {name: (value, updated_at)}).
+    Baca SEBELUM query data supaya ETag tidak pernah lebih baru dari isinya.
+    """
+    rows = _conn().execute("SELECT name, value, updated_at FROM versions").fetchall()
+    current = {name: (value, updated_at) for name, value, updated_at in rows}
+    epoch = current.get('epoch', (0, 0))
+    return epoch[0], {name: current.get(name, (0, epoch[1])) for name in names}
+
+
+def changes_since(after_id, *names, limit=5000):
+    """
+    Versi data + event setelah after_id dalam SATU snapshot baca tasks.db:
+    (stempel seperti version_stamp, updated_at, [(id, type, data)], oldest_id, latest_id).
+    Dipakai penulis turunan data (catalog_snapshot.py) untuk menerapkan perubahan
+    secara inkremental; oldest_id > after_id + 1 berarti ada event yang sudah
+    dihapus retensi.
+    """
+    conn = _conn()
+    conn.execute("BEGIN")
+    try:
+        rows = conn.execute("SELECT name, value, updated_at FROM versions").fetchall()
+        oldest, latest = conn.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM events").fetchone()
+        changes = conn.execute(
+            "SELECT id, type, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+    finally:
+        conn.execute("COMMIT")
+    versions = {name: (value, updated_at) for name, value, updated_at in rows}
+    current = [versions.get(name, (0, 0)) for name in names]
+    stamp = (versions.get('epoch', (0, 0))[0],) + tuple(value for value, _ in current)
+    return (
+        stamp,
+        max([updated_at for _, updated_at in current], default=0),
+        [(event_id, event_type, json.loads(data)) for event_id, event_type, data in changes],
+        oldest,
+        latest
+    )
+
+
+def latest_id():
+    row = _conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+    return row[0]
+
+
+def oldest_id():
+    """Id event tertua yang belum dihapus retensi (0 kalau kosong)"""
+    row = _conn().execute("SELECT COALESCE(MIN(id), 0) FROM events").fetchone()
+    return row[0]
+
+
+def read_since(last_id, until_id, event_type, limit=500):
+    """Event satu jenis dengan last_id < id <= until_id: list (id, data) urut naik"""
+    rows = _conn().execute(
+        "SELECT id, data FROM events WHERE id > ? AND id <= ? AND type = ? ORDER BY id LIMIT ?",
+        (last_id, until_id, event_type, limit)
+    ).fetchall()
+    return [(event_id, json.loads(data)) for event_id, data in rows]
+
+
+def acquire_stream_slot():
+    """True kalau masih ada slot stream panjang di proses ini (lepas dengan release_stream_slot)"""
+    return SSE_MAX_STREAMS > 0 and _stream_slots.acquire(blocking=False)
+
+
+def release_stream_slot():
+    _stream_slots.release()
+
+
+def stream(last_id=None, is_admin=False, poll_interval=1.0, heartbeat=15.0,
+           max_seconds=SSE_MAX_SECONDS, retry_ms=SSE_RETRY_MS):
+    """
+    Generator pesan SSE mulai setelah last_id (default: hanya event baru), berhenti
+    setelah max_seconds. max_seconds=0: mode polling, kirim yang tertunda saja.
+    """
+    last_id = int(last_id) if last_id else latest_id()
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.time()
+    # id tanpa data tetap menjadi Last-Event-ID saat reconnect, jadi event di antara
+    # dua koneksi tidak terlewat walaupun koneksi ini tidak mengirim event apa pun
+    yield f"retry: {retry_ms}\nid: {last_id}\n\n"
+
+    while True:
+        rows = _conn().execute(
+            "SELECT id, type, data FROM events WHERE id > ? ORDER BY id LIMIT 200",
+            (last_id,)
+        ).fetchall()
+
+        for event_id, event_type, data in rows:
+            last_id = event_id
+            if event_type in ADMIN_ONLY_EVENTS and not is_admin:
+                continue
+            last_sent = time.time()
+            yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+        if rows:
+            continue
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        if time.time() - last_sent >= heartbeat:
+            last_sent = time.time()
+            yield ": ping\n\n"
+
+        with _new_event:
+            _new_event.wait(min(poll_interval, remaining))
+
+    # Termasuk event admin yang dilewati, supaya reconnect tidak membacanya ulang
+    yield f"id: {last_id}\n\n"
@@ -0,0 +1,63 @@
+import argparse
+import time
+from datetime import datetime
+
+from logic import Database, Inventory, EXPIRY_SWEEP_HORIZON_DAYS
+
+
+def parse_policy(text):
+    """Format: '2:70,7:50' -> [(2, 70), (7, 50)] (sisa hari : persen diskon)"""
+    if not text:
+        return None
+    policy = []
+    for part in text.split(','):
+        days, pct = part.split(':')
+        pct = int(pct)
+        if not 0 <= pct <= 100:
+            raise ValueError(f"Diskon harus 0-100: {pct}")
+        policy.append((int(days), pct))
+    return sorted(policy)
+
+
+def run_sweep(horizon_days=EXPIRY_SWEEP_HORIZON_DAYS, policy=None, batch_size=1000):
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return None
+
+    start = time.perf_counter()
+    try:
+        report = Inventory(db).sweep_near_expiry(horizon_days, policy, batch_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] 🧹 {len(report['moved'])} produk dipindah ke lelang "
+          f"dalam {report['batches']} batch ({elapsed:.2f}s), {report['skipped']} dilewati (SKU sudah ada di lelang)")
+    for item in report['moved'][:50]:
+        print(f"  → SKU {item['sku']} {item['name']} (exp {item['expired_date']}, sisa {item['days_left']} hari): "
+              f"Rp{item['old_price']:,} → Rp{item['new_price']:,} (-{item['discount']}%)")
+    if len(report['moved']) > 50:
+        print(f"  ... dan {len(report['moved']) - 50} produk lainnya")
+    for err in report['errors']:
+        print(f"  ✗ {err}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pindahkan produk mendekati expired ke lelang")
+    parser.add_argument('--horizon', type=int, default=EXPIRY_SWEEP_HORIZON_DAYS,
+                        help="Produk yang expired dalam N hari (default %(default)s)")
+    parser.add_argument('--policy', default='',
+                        help="Diskon per sisa hari, contoh '2:70,7:50' (default: diskon lelang standar)")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--loop', type=int, default=0,
+                        help="Jalankan terus setiap N menit (0 = sekali jalan, cocok untuk cron)")
+    args = parser.parse_args()
+
+    policy = parse_policy(args.policy)
+    while True:
+        run_sweep(args.horizon, policy, args.batch_size)
+        if not args.loop:
+            break
+        time.sleep(args.loop * 60)
@@ -0,0 +1,185 @@
+import gzip
+import json
+import os
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson & brotli opsional; tanpa itu jatuh ke json bawaan dan gzip saja
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# ============================================
+# JSON CEPAT + KOMPRESI RESPONSE
+# ============================================
+# Semua jsonify() lewat FastJSONProvider (app.json): orjson langsung ke bytes.
+#   Decimal          -> string persis ("12500.00"), sama seperti jsonify sebelumnya
+#   date / datetime  -> ISO 8601 ("2025-03-01", "2025-03-01T10:15:00"); sebelumnya
+#                       format HTTP-date yang menandai waktu lokal sebagai GMT
+# Body JSON/HTML >= COMPRESS_MIN_BYTES dikompres br/gzip sesuai Accept-Encoding;
+# list besar dikirim bertahap (iter_json_list + stream_response).
+
+COMPRESS_MIN_BYTES = int(os.environ.get('JUSTCANI_COMPRESS_MIN_BYTES', 1024))
+# Level sedang: response dinamis dikompres per request, bukan sekali seperti aset statis
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/csv', 'image/svg+xml'}
+# Baris per chunk saat streaming list JSON
+STREAM_CHUNK_ROWS = 500
+
+if ORJSON_AVAILABLE:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    """Tipe yang tidak dikenal orjson/json bawaan"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"{type(value).__name__} tidak bisa dijadikan JSON")
+
+
+def dumps(obj, default=_default):
+    """obj -> bytes JSON (compact). default: konversi tipe lain, mis. tasks._json_default"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Mis. integer > 64 bit: json bawaan tidak punya batas itu
+            pass
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider JSON Flask (app.json) berbasis dumps()/loads() di atas"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # Langsung bytes, tanpa decode ke str lalu encode lagi seperti DefaultJSONProvider
+        return self._app.response_class(dumps(self._prepare_response_obj(args, kwargs)), mimetype=self.mimetype)
+
+
+# ============================================
+# KOMPRESI
+# ============================================
+
+def negotiate_encoding(accept_encodings):
+    """'br', 'gzip' atau None dari request.accept_encodings (werkzeug)"""
+    offers = (['br'] if BROTLI_AVAILABLE else []) + ['gzip', 'identity']
+    best = accept_encodings.best_match(offers, default='identity')
+    return None if best == 'identity' else best
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings):
+    """
+    Kompres body response biasa (bukan stream/file) kalau layak; dipanggil dari after_request.
+    ETag dijadikan weak: representasi gzip/br tidak identik byte-per-byte dengan aslinya,
+    tapi If-None-Match tetap cocok (perbandingan weak) jadi 304 tetap jalan.
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encodings)
+    if not encoding:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _compressor(encoding):
+    """(compress(bytes), finish()) untuk kompresi bertahap"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = format gzip
+    return compressor.compress, compressor.flush
+
+
+def iter_json_list(items, chunk_size=STREAM_CHUNK_ROWS):
+    """Array JSON bytes per chunk; items boleh iterator (mis. cursor database)"""
+    yield b'['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + dumps(chunk)[1:-1]
+    yield b']'
+
+
+def stream_response(chunks, accept_encodings, response_class, mimetype='application/json'):
+    """Response streaming dari generator bytes, dikompres bertahap kalau client mau"""
+    encoding = negotiate_encoding(accept_encodings)
+
+    def body():
+        if not encoding:
+            yield from chunks
+            return
+        compress_chunk, finish = _compressor(encoding)
+        for chunk in chunks:
+            data = compress_chunk(chunk)
+            if data:
+                yield data
+        yield finish()
+
+    response = response_class(body(), mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,22 @@
+import os
+
+# ============================================
+# KONFIGURASI GUNICORN
+# ============================================
+# Dibaca otomatis oleh `gunicorn app:app` dari folder ini.
+#
+# Worker harus gthread: koneksi SSE (/api/events) memegang satu thread selama
+# events.SSE_MAX_SECONDS, dan dengan worker sync satu tab dashboard memakai
+# satu worker penuh. Thread per worker = slot admission (admission.ADMISSION_SLOTS)
+# ditambah slot stream SSE, jadi dashboard yang terbuka tidak memakan jatah checkout.
+# Angka dibaca dari env yang sama, tanpa import app (supaya master tidak membuka DB).
+
+ADMISSION_SLOTS = int(os.environ.get('JUSTCANI_ADMISSION_SLOTS', 16))
+SSE_MAX_STREAMS = int(os.environ.get('JUSTCANI_SSE_MAX_STREAMS', 4))
+
+bind = os.environ.get('JUSTCANI_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('JUSTCANI_WORKERS', 2))
+worker_class = 'gthread'
+threads = ADMISSION_SLOTS + SSE_MAX_STREAMS
+# Lebih panjang dari SSE_MAX_SECONDS supaya stream tidak dianggap worker macet
+timeout = 60
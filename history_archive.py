@@ -0,0 +1,411 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from db_backend import Error, dialect_of
+
+# ============================================
+# ARSIP TRANSACTION_HISTORY PER BULAN
+# ============================================
+# Bulan yang sudah tutup dan lebih tua dari HISTORY_HOT_MONTHS dipindah dari tabel
+# transaction_history ke file arsip terkompresi (gzip, kolomnar per chunk):
+#
+#   archive/transaction_history/2025-01/part-00001.json.gz   {"id": [...], "details": [...], ...}
+#   archive/transaction_history/2025-01/manifest.json        jumlah baris, total, ringkasan harian
+#
+# Progres per bulan dicatat di tabel history_archive (DB utama), jadi job bisa
+# dihentikan kapan saja dan dilanjutkan: 'exporting' (chunk ditulis, last_id maju)
+# -> 'archived' (hapus dari tabel + ganti status dalam SATU transaksi DB, jadi
+# pembaca tidak pernah melihat bulan itu dobel atau hilang).
+#
+# TransactionHistory dan stats.load_transactions menggabungkan tabel dengan arsip
+# untuk bulan berstatus 'archived', jadi laporan tetap lengkap.
+
+ARCHIVE_DIR = os.environ.get(
+    'JUSTCANI_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive', 'transaction_history')
+)
+# Bulan berjalan + N-1 bulan sebelumnya tetap di tabel
+HISTORY_HOT_MONTHS = int(os.environ.get('JUSTCANI_HISTORY_HOT_MONTHS', '6'))
+ARCHIVE_CHUNK_ROWS = 5000
+# Bulan arsip yang sudah didekompresi, disimpan di memori per proses
+ARCHIVE_CACHE_MONTHS = 3
+
+COLUMNS = ('id', 'transaction_id', 'transaction_date', 'user_id', 'username', 'total_amount',
+           'transaction_type', 'payment_method', 'items_count', 'details')
+
+_month_cache = OrderedDict()
+_catalog_warned = False
+
+
+def month_of(value):
+    """'YYYY-MM' dari date/datetime/string tanggal"""
+    return str(value)[:7]
+
+
+def month_range(month):
+    """Rentang [awal bulan, awal bulan berikutnya) sebagai datetime"""
+    year, mon = int(month[:4]), int(month[5:7])
+    start = datetime(year, mon, 1)
+    return start, datetime(year + mon // 12, mon % 12 + 1, 1)
+
+
+def hot_cutoff(hot_months=HISTORY_HOT_MONTHS, today=None):
+    """Awal bulan tertua yang masih di tabel; bulan sebelum ini boleh diarsip"""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - max(1, hot_months) + 1
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _month_dir(month):
+    return os.path.join(ARCHIVE_DIR, month)
+
+
+def _part_path(month, part):
+    return os.path.join(_month_dir(month), f"part-{part:05d}.json.gz")
+
+
+def _write_atomic(path, data, compress=False):
+    tmp = path + '.tmp'
+    opener = gzip.open if compress else open
+    with opener(tmp, 'wt', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _encode(rows):
+    """Baris dict -> kolom JSON; tanggal & Decimal jadi string supaya presisi terjaga"""
+    data = {col: [] for col in COLUMNS}
+    for row in rows:
+        for col in COLUMNS:
+            value = row[col]
+            if col == 'transaction_date':
+                value = value.strftime('%Y-%m-%d %H:%M:%S')
+            elif col == 'total_amount':
+                value = str(value)
+            data[col].append(value)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _decode(data):
+    dates = [datetime.fromisoformat(value) for value in data['transaction_date']]
+    amounts = [Decimal(value) for value in data['total_amount']]
+    rows = []
+    for i in range(len(dates)):
+        row = {col: data[col][i] for col in COLUMNS}
+        row['transaction_date'] = dates[i]
+        row['total_amount'] = amounts[i]
+        rows.append(row)
+    return rows
+
+
+# ============================================
+# KATALOG (TABEL history_archive)
+# ============================================
+
+def catalog(db, status='archived'):
+    """{bulan: info} bulan dengan status tertentu (None = semua)"""
+    global _catalog_warned
+    cursor = db.cursor(dictionary=True)
+    try:
+        if status:
+            cursor.execute("SELECT * FROM history_archive WHERE status = %s", (status,))
+        else:
+            cursor.execute("SELECT * FROM history_archive")
+        return {row['month']: row for row in cursor.fetchall()}
+    except Error as e:
+        # Migration 004 belum dijalankan: anggap belum ada arsip
+        if not _catalog_warned:
+            print(f"[WARN] Tabel history_archive tidak bisa dibaca (jalankan DB/migrations/004): {e}")
+            _catalog_warned = True
+        return {}
+    finally:
+        cursor.close()
+
+
+def _save_state(db, cursor, month, **fields):
+    fields['updated_at'] = datetime.now()
+    columns = ('month',) + tuple(fields)
+    cursor.execute(
+        dialect_of(db).upsert('history_archive', columns, 'month', tuple(fields)),
+        (month,) + tuple(fields.values())
+    )
+
+
+# ============================================
+# BACA ARSIP
+# ============================================
+
+def read_manifest(month):
+    with open(os.path.join(_month_dir(month), 'manifest.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_month(month, parts):
+    """Semua baris arsip satu bulan, urut id naik (di-cache per proses)"""
+    key = (month, parts)
+    if key in _month_cache:
+        _month_cache.move_to_end(key)
+        return _month_cache[key]
+
+    rows = []
+    for part in range(1, parts + 1):
+        with gzip.open(_part_path(month, part), 'rt', encoding='utf-8') as f:
+            rows.extend(_decode(json.load(f)))
+
+    _month_cache[key] = rows
+    while len(_month_cache) > ARCHIVE_CACHE_MONTHS:
+        _month_cache.popitem(last=False)
+    return rows
+
+
+def read_range(db, start, end, archived=None):
+    """
+    Baris arsip dengan start <= transaction_date <= end (datetime), terbaru di depan.
+    Tanpa bulan arsip di rentang itu tidak ada file yang dibuka.
+    """
+    archived = catalog(db) if archived is None else archived
+    rows = []
+    for month, info in archived.items():
+        month_start, month_end = month_range(month)
+        if month_end <= start or month_start > end:
+            continue
+        rows.extend(
+            row for row in read_month(month, info['parts'])
+            if start <= row['transaction_date'] <= end
+        )
+    rows.sort(key=lambda row: row['transaction_date'], reverse=True)
+    return rows
+
+
+def read_latest(db, limit, offset=0, archived=None):
+    """Baris arsip terbaru (urut transaction_date DESC) dengan limit/offset"""
+    archived = catalog(db) if archived is None else archived
+    rows = []
+    for month in sorted(archived, reverse=True):
+        month_rows = read_month(month, archived[month]['parts'])
+        if offset >= len(month_rows):
+            offset -= len(month_rows)
+            continue
+        ordered = sorted(month_rows, key=lambda row: row['transaction_date'], reverse=True)
+        rows.extend(ordered[offset:offset + limit - len(rows)])
+        offset = 0
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def find(db, pk):
+    """Satu transaksi arsip berdasarkan id (kolom id), atau None"""
+    for month, info in catalog(db).items():
+        if info['min_id'] <= pk <= info['max_id']:
+            for row in read_month(month, info['parts']):
+                if row['id'] == pk:
+                    return row
+    return None
+
+
+def daily_summary(db, day):
+    """Ringkasan arsip untuk satu tanggal ('YYYY-MM-DD'), None kalau tidak diarsip"""
+    month = month_of(day)
+    if month not in catalog(db):
+        return None
+    return read_manifest(month)['daily'].get(str(day)[:10])
+
+
+# ============================================
+# JOB ARSIP
+# ============================================
+
+def archivable_months(db, hot_months=HISTORY_HOT_MONTHS):
+    """Bulan sebelum hot_cutoff yang masih punya baris di tabel, urut lama -> baru"""
+    cutoff = hot_cutoff(hot_months)
+    cursor = db.cursor()
+    try:
+        cursor.execute("SELECT MIN(transaction_date) FROM transaction_history WHERE transaction_date < %s", (cutoff,))
+        oldest = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if oldest is None:
+        return []
+
+    months = []
+    month = month_of(oldest)
+    while month_range(month)[0] < cutoff:
+        months.append(month)
+        month = month_of(month_range(month)[1])
+    return months
+
+
+def _export_chunks(db, month, state, chunk_rows):
+    """Tulis chunk baru sejak state['last_id']; aman diulang setelah crash"""
+    start, end = month_range(month)
+    os.makedirs(_month_dir(month), exist_ok=True)
+    cursor = db.cursor(dictionary=True)
+    try:
+        while True:
+            cursor.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM transaction_history "
+                "WHERE transaction_date >= %s AND transaction_date < %s AND id > %s ORDER BY id LIMIT %s",
+                (start, end, state['last_id'], chunk_rows)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            part = state['parts'] + 1
+            # File dulu, baru progres: kalau crash di antaranya, part yang sama ditulis ulang
+            _write_atomic(_part_path(month, part), _encode(rows), compress=True)
+            state.update(parts=part, last_id=rows[-1]['id'])
+            _save_state(db, cursor, month, status='exporting', parts=part, last_id=state['last_id'])
+            db.commit()
+            print(f"  📦 {month} part {part}: {len(rows)} baris (s/d id {state['last_id']})")
+    finally:
+        cursor.close()
+
+
+def _build_manifest(month, parts):
+    rows = read_month(month, parts)
+    daily = {}
+    for row in rows:
+        day = row['transaction_date'].strftime('%Y-%m-%d')
+        summary = daily.setdefault(day, {
+            'total_transactions': 0, 'total_revenue': Decimal(0), 'normal_count': 0, 'auction_count': 0,
+            'first_transaction': row['transaction_date'], 'last_transaction': row['transaction_date'],
+            'cashiers': []
+        })
+        summary['total_transactions'] += 1
+        summary['total_revenue'] += row['total_amount']
+        summary['normal_count' if row['transaction_type'] == 'biasa' else 'auction_count'] += 1
+        summary['first_transaction'] = min(summary['first_transaction'], row['transaction_date'])
+        summary['last_transaction'] = max(summary['last_transaction'], row['transaction_date'])
+        if row['username'] not in summary['cashiers']:
+            summary['cashiers'].append(row['username'])
+
+    for summary in daily.values():
+        summary['total_revenue'] = str(summary['total_revenue'])
+        summary['first_transaction'] = summary['first_transaction'].strftime('%Y-%m-%d %H:%M:%S')
+        summary['last_transaction'] = summary['last_transaction'].strftime('%Y-%m-%d %H:%M:%S')
+
+    return {
+        'month': month,
+        'parts': parts,
+        'row_count': len(rows),
+        'total_amount': str(sum((row['total_amount'] for row in rows), Decimal(0))),
+        'min_id': min((row['id'] for row in rows), default=0),
+        'max_id': max((row['id'] for row in rows), default=0),
+        'daily': daily,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def archive_month(db, month, chunk_rows=ARCHIVE_CHUNK_ROWS):
+    """Ekspor satu bulan lalu hapus dari tabel. Return jumlah baris yang diarsip."""
+    state = catalog(db, status=None).get(month)
+    if state and state['status'] == 'archived':
+        return 0
+    state = {'last_id': state['last_id'], 'parts': state['parts']} if state else {'last_id': 0, 'parts': 0}
+
+    _export_chunks(db, month, state, chunk_rows)
+    if not state['parts']:
+        return 0
+
+    manifest = _build_manifest(month, state['parts'])
+    start, end = month_range(month)
+    dialect = dialect_of(db)
+    cursor = db.cursor()
+    try:
+        dialect.begin_write(db)
+        cursor.execute(
+            "SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM transaction_history "
+            f"WHERE transaction_date >= %s AND transaction_date < %s AND id <= %s{dialect.for_update}",
+            (start, end, manifest['max_id'])
+        )
+        count, total = cursor.fetchone()
+        cents = Decimal('0.01')
+        if (count != manifest['row_count']
+                or Decimal(str(total)).quantize(cents) != Decimal(manifest['total_amount']).quantize(cents)):
+            db.rollback()
+            print(f"  ✗ {month}: arsip {manifest['row_count']} baris / Rp{manifest['total_amount']} "
+                  f"tidak cocok dengan tabel {count} baris / Rp{total}, tidak dihapus")
+            return 0
+
+        _write_atomic(os.path.join(_month_dir(month), 'manifest.json'), json.dumps(manifest, indent=1))
+        # Hapus + status 'archived' satu transaksi: pembaca pindah ke arsip secara atomik.
+        # Baris yang masuk bulan ini setelah ekspor (id > max_id) tetap di tabel.
+        cursor.execute(
+            "DELETE FROM transaction_history WHERE transaction_date >= %s AND transaction_date < %s AND id <= %s",
+            (start, end, manifest['max_id'])
+        )
+        _save_state(db, cursor, month, status='archived', parts=state['parts'], last_id=state['last_id'],
+                    row_count=manifest['row_count'], total_amount=manifest['total_amount'],
+                    min_id=manifest['min_id'], max_id=manifest['max_id'])
+        db.commit()
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+    return manifest['row_count']
+
+
+def run(hot_months=HISTORY_HOT_MONTHS, chunk_rows=ARCHIVE_CHUNK_ROWS):
+    from logic import Database
+
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return None
+
+    start = time.perf_counter()
+    report = {}
+    try:
+        for month in archivable_months(db, hot_months):
+            report[month] = archive_month(db, month, chunk_rows)
+            print(f"✅ {month}: {report[month]} transaksi diarsip")
+    finally:
+        db.close()
+    print(f"🗄️  {sum(report.values())} transaksi dari {len(report)} bulan diarsip "
+          f"({time.perf_counter() - start:.1f}s), tabel menyimpan {hot_months} bulan terakhir")
+    return report
+
+
+def status():
+    from logic import Database
+
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return None
+    try:
+        months = catalog(db, status=None)
+    finally:
+        db.close()
+    if not months:
+        print("ℹ️  Belum ada bulan yang diarsip")
+    for month in sorted(months):
+        info = months[month]
+        if info['status'] == 'archived':
+            print(f"  {month}: archived   {info['parts']} part, {info['row_count']} baris, id {info['min_id']}-{info['max_id']}")
+        else:
+            print(f"  {month}: {info['status']:<10} {info['parts']} part, diekspor s/d id {info['last_id']}")
+    return months
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arsip transaction_history per bulan ke file terkompresi")
+    parser.add_argument('command', choices=['run', 'status'])
+    parser.add_argument('--hot-months', type=int, default=HISTORY_HOT_MONTHS,
+                        help="Jumlah bulan terakhir yang tetap di tabel (default %(default)s)")
+    parser.add_argument('--chunk', type=int, default=ARCHIVE_CHUNK_ROWS,
+                        help="Baris per file part (default %(default)s)")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run(args.hot_months, args.chunk)
+    else:
+        status()
@@ -0,0 +1,155 @@
+import hashlib
+import math
+import os
+import re
+from io import BytesIO
+
+from lazy_imports import lazy_import
+from tasks import TASK_DB_PATH
+
+# Pillow dimuat saat foto pertama diproses (task worker), bukan saat app start
+Image = lazy_import('PIL.Image')
+ImageOps = lazy_import('PIL.ImageOps')
+PILLOW_AVAILABLE = Image is not None
+if not PILLOW_AVAILABLE:
+    print("INFO: Pillow not installed. Profile picture features will be limited.")
+
+# ============================================
+# FOTO PROFIL
+# ============================================
+
+# Upload configuration
+UPLOAD_FOLDER = 'static/uploads/profile_pics'
+# File upload mentah menunggu task worker: di luar static/ supaya tidak ikut tersaji publik
+UPLOAD_STAGING_FOLDER = os.environ.get(
+    'JUSTCANI_UPLOAD_STAGING', os.path.join(os.path.dirname(os.path.abspath(TASK_DB_PATH)), 'upload_staging')
+)
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+# Ukuran avatar (px, persegi): ikon kecil, navbar, halaman profil. Terakhir = terbesar.
+AVATAR_SIZES = (32, 64, 400)
+# (ekstensi, format PIL, opsi simpan); browser pilih WebP lewat <picture>, JPEG cadangan
+AVATAR_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+# Nama file berisi hash isi upload, jadi URL-nya boleh di-cache browser selamanya
+AVATAR_URL_RE = re.compile(r'^(.*/avatar_\d+_[0-9a-f]{16})_\d+\.(?:webp|jpg)$')
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def create_upload_folder():
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+    os.makedirs(UPLOAD_STAGING_FOLDER, exist_ok=True)
+
+def process_and_save_image(file, user_id, folder=None):
+    """
+    Simpan foto profil dalam semua ukuran AVATAR_SIZES (WebP + JPEG) dengan nama
+    berisi hash isi file. Return URL JPEG terbesar (disimpan di users.profile_pic);
+    URL ukuran/format lain diturunkan dari situ lewat avatar_variants().
+    """
+    folder = folder or UPLOAD_FOLDER
+    data = file.read()
+    stem = f"avatar_{user_id}_{hashlib.sha256(data).hexdigest()[:16]}"
+
+    if not PILLOW_AVAILABLE:
+        # Fallback sederhana: file asli, tetap dengan nama hash supaya bisa di-cache
+        filename = f"{stem}_{AVATAR_SIZES[-1]}.jpg"
+        _write_atomic(os.path.join(folder, filename), data)
+        return f"/{UPLOAD_FOLDER}/{filename}"
+
+    try:
+        for size, img in _avatar_images(data):
+            for ext, fmt, options in AVATAR_FORMATS:
+                buffer = BytesIO()
+                img.save(buffer, fmt, **options)
+                _write_atomic(os.path.join(folder, f"{stem}_{size}.{ext}"), buffer.getvalue())
+        return f"/{UPLOAD_FOLDER}/{stem}_{AVATAR_SIZES[-1]}.jpg"
+
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return None
+
+
+def _avatar_images(data):
+    """(ukuran, Image RGB persegi) dari terbesar ke terkecil"""
+    img = Image.open(BytesIO(data))
+    largest = AVATAR_SIZES[-1]
+
+    # JPEG: decode langsung di skala 1/2, 1/4 atau 1/8 (DCT), jauh lebih cepat dari
+    # decode penuh lalu resize. Hasil draft tetap >= ukuran terbesar yang dibutuhkan.
+    if img.format == 'JPEG':
+        width, height = img.size
+        scale = largest / min(width, height)
+        if scale < 1:
+            img.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode == 'P' and 'transparency' in img.info:
+        img = img.convert('RGBA')
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    width, height = img.size
+    min_dim = min(width, height)
+    left = (width - min_dim) // 2
+    top = (height - min_dim) // 2
+    img = img.crop((left, top, left + min_dim, top + min_dim))
+
+    # reducing_gap: format selain JPEG dikecilkan dulu dengan reduce() (box) sebelum LANCZOS
+    img = img.resize((largest, largest), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    yield largest, img
+    # Ukuran kecil diturunkan dari hasil 400px, bukan dari gambar asli
+    for size in reversed(AVATAR_SIZES[:-1]):
+        yield size, img.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def avatar_variants(url):
+    """
+    {'webp': {32: url, ...}, 'jpeg': {...}} untuk URL profile_pic. Foto lama
+    (profile_{id}.jpg) dan avatar default cuma punya satu file untuk semua ukuran.
+    """
+    match = AVATAR_URL_RE.match(url or '')
+    if not match:
+        return {'webp': {size: url for size in AVATAR_SIZES}, 'jpeg': {size: url for size in AVATAR_SIZES}}
+    stem = match.group(1)
+    return {
+        'webp': {size: f"{stem}_{size}.webp" for size in AVATAR_SIZES},
+        'jpeg': {size: f"{stem}_{size}.jpg" for size in AVATAR_SIZES},
+    }
+
+
+def is_avatar_variant(path):
+    """True untuk file avatar bernama hash: isinya tidak pernah berubah (immutable)"""
+    return AVATAR_URL_RE.match(path) is not None
+
+
+def remove_old_avatars(user_id, keep_url, folder=None):
+    """Hapus varian avatar lama user (hash lain) dan foto format lama profile_{id}.jpg"""
+    folder = folder or UPLOAD_FOLDER
+    match = AVATAR_URL_RE.match(keep_url or '')
+    keep_prefix = os.path.basename(match.group(1)) + '_' if match else None
+    removed = 0
+    for name in os.listdir(folder):
+        old_avatar = name.startswith(f"avatar_{user_id}_") and not (keep_prefix and name.startswith(keep_prefix))
+        if old_avatar or name == f"profile_{user_id}.jpg":
+            try:
+                os.remove(os.path.join(folder, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
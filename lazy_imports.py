@@ -0,0 +1,31 @@
+import importlib.util
+import sys
+
+# ============================================
+# IMPORT MALAS (COLD START)
+# ============================================
+# Modul berat yang opsional (numpy, Pillow) baru dieksekusi saat atributnya pertama
+# kali dipakai, bukan saat app.py diimpor. Penting untuk serverless (Vercel): request
+# /api/search tidak perlu membayar ~100ms import numpy yang cuma dipakai laporan.
+#
+#   np = lazy_import('numpy')
+#   NUMPY_AVAILABLE = np is not None
+
+
+def lazy_import(name):
+    """Modul `name` yang dimuat saat pertama dipakai, atau None kalau tidak terinstall"""
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        # Paket induk (mis. PIL untuk PIL.Image) tidak ada
+        return None
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+import events
+
+# ============================================
+# CACHE PER PROSES + INVALIDASI ANTAR WORKER
+# ============================================
+# Tiap worker gunicorn punya cache sendiri di memori. Supaya tidak basi setelah
+# tulis di worker lain, setiap cache terikat ke counter versi data di tasks.db
+# (events.VERSION_OF_EVENT): checkout / restock / import / lelang menaikkan
+# counter itu dalam commit yang sama dengan event-nya, dan setiap get()
+# membandingkan stempel versi (events.version_stamp, biasanya cuma PRAGMA
+# data_version). Jadi begitu commit selesai, akses berikutnya di worker mana pun
+# sudah melihat cache kosong -- tanpa Redis atau broadcast antar proses.
+#
+# Loader harus membaca data yang minimal sebaru stempelnya: stempel diambil
+# SEBELUM loader jalan (seperti ETag), dan loader menerima fresh_after supaya
+# replica yang tertinggal dari tulis terakhir tidak dipakai.
+
+_caches = {}
+
+
+class VersionedCache:
+    def __init__(self, name, versions=('catalog',), maxsize=256):
+        self.name = name
+        self.versions = tuple(versions)
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.stamp = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        _caches[name] = self
+
+    def _check(self, stamp):
+        if stamp != self.stamp:
+            if self.stamp is not None:
+                self.invalidations += 1
+            self.entries.clear()
+            self.stamp = stamp
+
+    def get(self, key, loader):
+        """
+        Nilai untuk key. Kalau belum ada / versi data berubah, loader(fresh_after)
+        dipanggil; fresh_after = waktu tulis terakhir yang harus sudah terlihat
+        (teruskan ke read_system / Database.get_read_conn). Hasil kosong tidak
+        disimpan, karena bisa jadi error DB yang ditelan pemanggil.
+        """
+        stamp, fresh_after = events.version_stamp(*self.versions)
+        with self.lock:
+            self._check(stamp)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = loader(fresh_after)
+
+        with self.lock:
+            # Versi berubah selama loader jalan: hasilnya mungkin sudah basi, jangan disimpan
+            self._check(events.version_stamp(*self.versions)[0])
+            if value and self.stamp == stamp:
+                self.entries[key] = value
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'versions': list(self.versions),
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'invalidations': self.invalidations
+        }
+
+
+def stats():
+    """Statistik semua cache di worker ini"""
+    return {name: cache.stats() for name, cache in _caches.items()}
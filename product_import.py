@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import sys
+
+from logic import Database, Inventory
+
+
+def iter_rows(stream, fmt):
+    """
+    Baca baris produk secara streaming dari file biner.
+    fmt: 'csv', 'jsonl' (satu objek per baris), atau 'json' (array objek).
+    """
+    if fmt == 'json':
+        # Array JSON harus dibaca utuh; untuk katalog besar pakai csv/jsonl
+        data = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        for row in data if isinstance(data, list) else [data]:
+            yield row if isinstance(row, dict) else {}
+        return
+
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'jsonl':
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = {}
+            yield row if isinstance(row, dict) else {}
+    else:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.DictReader(text, dialect=dialect)
+
+
+def detect_format(filename):
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+def import_file(path, batch_size=500):
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            report = Inventory(db).import_produk(iter_rows(f, detect_format(path)), batch_size=batch_size)
+    finally:
+        db.close()
+
+    print(f"📦 {report['total']} baris: {report['inserted']} baru, {report['updated']} diupdate, "
+          f"{len(report['errors'])} error")
+    for err in report['errors'][:50]:
+        print(f"  ✗ Baris {err['row']} (SKU {err.get('sku')}): {err['message']}")
+    if len(report['errors']) > 50:
+        print(f"  ... dan {len(report['errors']) - 50} error lainnya")
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Pemakaian: python product_import.py <file.csv|file.json|file.jsonl> [batch_size]")
+        sys.exit(1)
+
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    report = import_file(sys.argv[1], batch_size)
+
+    # Tunggu worker barcode selesai sebelum proses keluar
+    if report and report['barcode_tasks']:
+        from tasks import wait_for
+        print("⏳ Menunggu barcode selesai dirender...")
+        wait_for(report['barcode_tasks'])
@@ -63,6 +63,91 @@ async function searchItem() {
     }
 }
 
+// ============================================
+// SCAN BARCODE (SKU PERSIS)
+// ============================================
+// Scanner USB mengetik SKU ke input pencarian lalu Enter. Kode angka + Enter
+// langsung dicari lewat /api/scan (lookup SKU persis) dan masuk keranjang;
+// scan yang datang selama request masih jalan dikirim bersama lewat /api/scan/batch.
+
+let scanQueue = [];
+let scanInFlight = false;
+let searchTimer = null;
+
+function onQueryKeyup(event) {
+    const input = document.getElementById('query');
+    const code = input.value.trim();
+    
+    clearTimeout(searchTimer);
+    if (event.key === 'Enter' && /^\d+$/.test(code)) {
+        input.value = '';
+        queueScan(code);
+        return;
+    }
+    // Tunggu ketikan selesai: scanner mengetik belasan digit dalam beberapa ms
+    searchTimer = setTimeout(searchItem, 150);
+}
+
+function queueScan(code) {
+    scanQueue.push(code);
+    flushScans();
+}
+
+async function flushScans() {
+    if (scanInFlight || scanQueue.length === 0) return;
+    scanInFlight = true;
+    const codes = scanQueue.splice(0, scanQueue.length);
+    
+    try {
+        let items = [];
+        let missing = [];
+        if (codes.length === 1) {
+            const response = await fetch(`/api/scan/${encodeURIComponent(codes[0])}?type=${currentMode}`);
+            if (response.status === 404) {
+                missing = codes;
+            } else if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            } else {
+                items = [await response.json()];
+            }
+        } else {
+            const response = await fetch('/api/scan/batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ codes: codes, type: currentMode })
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            ({ items, missing } = await response.json());
+        }
+        
+        items.forEach(product => addToCart(product.no_SKU, product.Name_product, product.Price));
+        if (missing.length > 0) {
+            alert(`Barcode tidak ditemukan: ${missing.join(', ')}`);
+        }
+    } catch (error) {
+        console.error('Scan error:', error);
+        alert('Gagal scan barcode: ' + error.message);
+    } finally {
+        scanInFlight = false;
+        flushScans();
+    }
+}
+
+function manualBarcodeSearch() {
+    const input = document.getElementById('manualBarcode');
+    const code = input.value.trim();
+    if (!/^\d+$/.test(code)) {
+        alert('Barcode harus berupa angka SKU');
+        return;
+    }
+    input.value = '';
+    queueScan(code);
+}
+
 // Fungsi untuk menampilkan hasil pencarian
 function displayResults(products) {
     const resultsDiv = document.getElementById('searchResults');
@@ -275,6 +360,8 @@ async function checkout() {
         
     } catch (error) {
         alert('Error: ' + error.message);
+        // Gagal bisa karena DB turun: segarkan status tanpa menunggu interval
+        checkReadiness();
     } finally {
         document.getElementById('loadingSpinner').style.display = 'none';
     }
@@ -390,7 +477,7 @@ async function generateAllBarcodes() {
         const data = await response.json();
         
         if (data.success) {
-            alert(`Berhasil generate ${data.generated} barcode dari ${data.total} produk`);
+            alert(`${data.message}. Barcode akan muncul setelah selesai diproses.`);
             loadProductsForBarcode(); // Refresh list
         } else {
             alert('Error: ' + data.error);
@@ -428,6 +515,61 @@ async function checkBarcodeStatus() {
     }
 }
 
+// ============================================
+// LIVE UPDATE (SERVER-SENT EVENTS)
+// ============================================
+
+// Dengarkan event dari /api/events, handlers: {transaction: fn, stock: fn, lelang: fn, catalog: fn}
+function subscribeEvents(handlers) {
+    if (!window.EventSource) {
+        console.warn('Browser tidak mendukung EventSource, live update nonaktif');
+        return null;
+    }
+    
+    const source = new EventSource('/api/events');
+    Object.entries(handlers).forEach(([type, handler]) => {
+        source.addEventListener(type, event => {
+            try {
+                handler(JSON.parse(event.data));
+            } catch (error) {
+                console.error(`Error handling event ${type}:`, error);
+            }
+        });
+    });
+    return source;
+}
+
+// ============================================
+// STATUS DATABASE (READINESS)
+// ============================================
+
+// Interval cek /api/health/ready; saat DB turun ikut Retry-After dari server
+const READINESS_POLL_MS = 15000;
+let readinessTimer = null;
+
+function setDbReady(ready) {
+    document.getElementById('dbStatusBanner').classList.toggle('d-none', ready);
+    document.getElementById('btnCheckout').disabled = !ready;
+}
+
+async function checkReadiness() {
+    let delay = READINESS_POLL_MS;
+    try {
+        const response = await fetch('/api/health/ready', {cache: 'no-store'});
+        setDbReady(response.ok);
+        if (!response.ok) {
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+            delay = Math.max(1, retryAfter || 5) * 1000;
+        }
+    } catch (error) {
+        // Server tidak terjangkau: bukan berarti DB mati, cek lagi sebentar lagi
+        console.warn('Cek readiness gagal:', error);
+        delay = 5000;
+    }
+    clearTimeout(readinessTimer);
+    readinessTimer = setTimeout(checkReadiness, delay);
+}
+
 // ============================================
 // INITIALIZATION
 // ============================================
@@ -439,6 +581,11 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('Initializing kasir page...');
     }
     
+    // Tahan tombol bayar selama database tidak siap
+    if (document.getElementById('btnCheckout')) {
+        checkReadiness();
+    }
+    
     // Untuk halaman admin
     if (document.getElementById('barcodeProductSelect')) {
         console.log('Initializing admin barcode functions...');
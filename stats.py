@@ -0,0 +1,165 @@
+import json
+from datetime import datetime, timedelta
+
+import analytics
+import history_archive
+from analytics import NUMPY_AVAILABLE
+
+# ============================================
+# STATISTIK DASHBOARD
+# ============================================
+
+def get_time_ago(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    
+    now = datetime.now()
+    diff = now - timestamp
+    
+    if diff.days > 0:
+        return f"{diff.days} hari lalu"
+    elif diff.seconds > 3600:
+        hours = diff.seconds // 3600
+        return f"{hours} jam lalu"
+    elif diff.seconds > 60:
+        minutes = diff.seconds // 60
+        return f"{minutes} menit lalu"
+    else:
+        return "Baru saja"
+
+def period_range(period):
+    """Rentang waktu (start, end) untuk period today/week/month"""
+    end_date = datetime.now()
+    
+    if period == 'today':
+        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == 'week':
+        start_date = end_date - timedelta(days=7)
+    elif period == 'month':
+        start_date = end_date - timedelta(days=30)
+    else:
+        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    return start_date, end_date
+
+def load_transactions(db, start_date, end_date):
+    """Transaksi dalam rentang waktu (tabel + arsip bulanan), terbaru di depan"""
+    cursor = db.cursor(dictionary=True)
+    try:
+        sql = """
+        SELECT id, transaction_id, username, transaction_date, transaction_type, total_amount, details
+        FROM transaction_history 
+        WHERE transaction_date BETWEEN %s AND %s
+        ORDER BY transaction_date DESC
+        """
+        cursor.execute(sql, (start_date.strftime('%Y-%m-%d %H:%M:%S'), end_date.strftime('%Y-%m-%d %H:%M:%S')))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    # Bulan lama sudah dipindah ke file arsip (history_archive.py)
+    archived = history_archive.read_range(db, start_date, end_date)
+    if archived:
+        rows = sorted(rows + archived, key=lambda row: row['transaction_date'], reverse=True)
+    return rows
+
+def recent_transactions(transactions, limit=10):
+    recent = []
+    for t in transactions[:limit]:
+        recent.append({
+            'transaction_id': t['transaction_id'],
+            'username': t['username'],
+            'total_amount': t['total_amount'],
+            'time_ago': get_time_ago(t['transaction_date'])
+        })
+    return recent
+
+def compute_stats(db, period='today'):
+    """Hitung ringkasan, chart, dan tabel dashboard dari transaction_history"""
+    start_date, end_date = period_range(period)
+    transactions = load_transactions(db, start_date, end_date)
+    
+    if not NUMPY_AVAILABLE:
+        return aggregate_transactions(transactions)
+    
+    stats = analytics.summarize(analytics.from_rows(transactions))
+    stats['tables']['recent_transactions'] = recent_transactions(transactions)
+    return stats
+
+def compute_range_report(db, start_date, end_date, bucket='day', top=10, previous_start=None):
+    """Laporan rentang bebas + pembanding periode sebelumnya (butuh NumPy)"""
+    previous_start = previous_start or start_date - (end_date - start_date)
+    # Satu query untuk dua periode, dipotong di NumPy
+    transactions = load_transactions(db, previous_start, end_date)
+    return analytics.range_report(transactions, start_date, end_date, bucket, top, previous_start)
+
+def aggregate_transactions(transactions):
+    """Agregasi per baris tanpa NumPy (fallback, juga baseline benchmark)"""
+    total_revenue = sum(t['total_amount'] for t in transactions)
+    total_transactions = len(transactions)
+    avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
+    
+    total_products = 0
+    for t in transactions:
+        try:
+            details = json.loads(t['details'])
+            total_products += sum(item.get('qty', 0) for item in details)
+        except:
+            pass
+    
+    sales_by_day = {}
+    for t in transactions:
+        date_key = t['transaction_date'].strftime('%d/%m') if isinstance(t['transaction_date'], datetime) else t['transaction_date'][:10]
+        sales_by_day[date_key] = sales_by_day.get(date_key, 0) + t['total_amount']
+    
+    transaction_types = {'biasa': 0, 'lelang': 0}
+    for t in transactions:
+        transaction_types[t['transaction_type']] += 1
+    
+    product_sales = {}
+    for t in transactions:
+        try:
+            details = json.loads(t['details'])
+            for item in details:
+                # Per SKU dengan nama yang pertama terlihat, sama seperti analytics.from_rows
+                product_key = str(item.get('sku'))
+                if product_key not in product_sales:
+                    product_sales[product_key] = {
+                        'name': item.get('name', f"SKU:{item.get('sku')}"), 'sold': 0, 'revenue': 0
+                    }
+                product_sales[product_key]['sold'] += item.get('qty', 0)
+                product_sales[product_key]['revenue'] += item.get('subtotal', 0)
+        except:
+            pass
+    
+    top_products = sorted(
+        [{'name': v['name'], 'sold': v['sold'], 'revenue': v['revenue']}
+         for v in product_sales.values() if v['sold'] > 0],
+        key=lambda x: x['sold'],
+        reverse=True
+    )[:5]
+    
+    stats = {
+        'summary': {
+            'total_revenue': float(total_revenue),
+            'total_transactions': total_transactions,
+            'avg_transaction': float(avg_transaction),
+            'total_products_sold': total_products
+        },
+        'charts': {
+            'sales_trend': {
+                'labels': list(sales_by_day.keys()),
+                'data': list(sales_by_day.values())
+            },
+            'transaction_types': {
+                'labels': ['Biasa', 'Lelang'],
+                'data': [transaction_types['biasa'], transaction_types['lelang']]
+            }
+        },
+        'tables': {
+            'top_products': top_products,
+            'recent_transactions': recent_transactions(transactions)
+        }
+    }
+    
+    return stats
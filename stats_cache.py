@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+import fastjson
+from tasks import TASK_DB_PATH, _json_default
+
+# ============================================
+# CACHE STATISTIK (STALE-WHILE-REVALIDATE)
+# ============================================
+# Hasil compute_stats disimpan per periode di file SQLite antrian task, jadi
+# semua worker gunicorn berbagi cache yang sama. Entri yang lebih tua dari
+# STATS_FRESH_SECONDS tetap langsung dikirim ke client, sementara satu task
+# 'stats' (dedup_key per periode dan versi data = single-flight) menghitung ulang di background.
+
+STATS_FRESH_SECONDS = 30
+METRIC_NAMES = ('hit', 'stale', 'miss', 'recompute_count', 'recompute_seconds_total', 'recompute_seconds_max')
+
+_local = threading.local()
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(TASK_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_cache (
+                period TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                result TEXT NOT NULL,
+                computed_at REAL NOT NULL,
+                duration REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_metrics (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+
+def get(period):
+    """
+    Entri cache untuk period, atau None kalau belum ada / dihitung kemarin.
+    'result' berupa teks JSON siap kirim, tidak perlu di-serialize ulang.
+    """
+    row = _conn().execute(
+        "SELECT etag, result, computed_at, duration FROM stats_cache WHERE period = ?",
+        (period,)
+    ).fetchone()
+    if not row:
+        return None
+
+    etag, result, computed_at, duration = row
+    # Angka 'hari ini' dari kemarin bukan sekadar basi, tapi salah
+    if datetime.fromtimestamp(computed_at).date() != date.today():
+        return None
+
+    age = time.time() - computed_at
+    return {
+        'etag': etag,
+        'result': result,
+        'computed_at': computed_at,
+        'duration': duration,
+        'age': age,
+        'fresh': age < STATS_FRESH_SECONDS
+    }
+
+
+def store(period, etag, result, duration):
+    """Simpan hasil hitung ulang (dipanggil task worker) dan catat latensinya"""
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO stats_cache (period, etag, result, computed_at, duration) VALUES (?, ?, ?, ?, ?)",
+            (period, etag, fastjson.dumps(result, default=_json_default).decode('utf-8'), time.time(), duration)
+        )
+        _increment(conn, 'recompute_count', 1)
+        _increment(conn, 'recompute_seconds_total', duration)
+        conn.execute(
+            "INSERT INTO stats_metrics (name, value) VALUES ('recompute_seconds_max', ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+            (duration,)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _increment(conn, name, amount):
+    conn.execute(
+        "INSERT INTO stats_metrics (name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount)
+    )
+
+
+def record(outcome):
+    """Catat hasil lookup: 'hit' (segar / 304), 'stale' (basi, dihitung ulang), 'miss'"""
+    try:
+        _increment(_conn(), outcome, 1)
+    except sqlite3.Error as e:
+        print(f"⚠️ Gagal mencatat metrik stats: {e}")
+
+
+def metrics():
+    """Hit ratio cache dan latensi hitung ulang (gabungan semua worker)"""
+    conn = _conn()
+    values = {name: 0 for name in METRIC_NAMES}
+    values.update(conn.execute("SELECT name, value FROM stats_metrics").fetchall())
+
+    lookups = values['hit'] + values['stale'] + values['miss']
+    recomputes = values['recompute_count']
+    periods = {}
+    for period, etag, computed_at, duration in conn.execute(
+        "SELECT period, etag, computed_at, duration FROM stats_cache"
+    ):
+        periods[period] = {
+            'etag': etag,
+            'age_seconds': round(time.time() - computed_at, 1),
+            'last_recompute_ms': round(duration * 1000, 1)
+        }
+
+    return {
+        'lookups': int(lookups),
+        'hit': int(values['hit']),
+        'stale': int(values['stale']),
+        'miss': int(values['miss']),
+        # Stale tetap dilayani dari cache, jadi dihitung sebagai hit
+        'hit_ratio': round((values['hit'] + values['stale']) / lookups, 4) if lookups else None,
+        'fresh_seconds': STATS_FRESH_SECONDS,
+        'recompute': {
+            'count': int(recomputes),
+            'avg_ms': round(values['recompute_seconds_total'] / recomputes * 1000, 1) if recomputes else None,
+            'max_ms': round(values['recompute_seconds_max'] * 1000, 1)
+        },
+        'periods': periods
+    }
@@ -0,0 +1,387 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import date, datetime
+from decimal import Decimal
+
+import code128
+
+# ============================================
+# ANTRIAN TASK BACKGROUND (SQLITE)
+# ============================================
+# Antrian disimpan di file SQLite lokal supaya tidak butuh Redis/broker lain.
+# Bisa dipakai banyak proses (gunicorn worker + `python tasks.py`) sekaligus:
+# klaim task pakai BEGIN IMMEDIATE sehingga satu task hanya diambil satu worker.
+
+TASK_DB_PATH = os.environ.get('JUSTCANI_TASK_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tasks.db'))
+# Task 'running' yang tidak selesai dalam waktu ini dianggap workernya mati
+TASK_STALE_SECONDS = 300
+
+_handlers = {}
+_local = threading.local()
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def task(name):
+    """Decorator untuk mendaftarkan handler task: @task('barcode')"""
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(TASK_DB_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedup_key TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                result TEXT,
+                error TEXT,
+                run_after REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, run_after, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_dedup ON tasks (dedup_key, status)")
+        _local.conn = conn
+    return conn
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} tidak bisa dijadikan JSON")
+
+
+def enqueue(name, payload=None, max_attempts=3, dedup_key=None):
+    """
+    Masukkan task ke antrian dan langsung return id-nya.
+    dedup_key: kalau sudah ada task queued/running dengan key sama, id lama yang dipakai.
+    """
+    if name not in _handlers:
+        raise ValueError(f"Task '{name}' tidak terdaftar")
+
+    conn = _conn()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if dedup_key:
+            row = conn.execute(
+                "SELECT id FROM tasks WHERE dedup_key = ? AND status IN ('queued', 'running') LIMIT 1",
+                (dedup_key,)
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row['id']
+        cur = conn.execute(
+            "INSERT INTO tasks (name, payload, dedup_key, max_attempts, run_after, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (name, json.dumps(payload or {}, default=_json_default), dedup_key, max_attempts, now, now, now)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    _wakeup.set()
+    start_workers()
+    return cur.lastrowid
+
+
+def get_status(task_id):
+    """Status task untuk polling: queued, running, done, atau failed"""
+    row = _conn().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'status': row['status'],
+        'attempts': row['attempts'],
+        'result': json.loads(row['result']) if row['result'] else None,
+        'error': row['error'],
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at']
+    }
+
+
+def get_payload(task_id):
+    """Payload asli task (untuk cek pemilik); tidak ikut get_status karena berisi path server"""
+    row = _conn().execute("SELECT payload FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return json.loads(row['payload']) if row else None
+
+
+def _claim():
+    conn = _conn()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Kembalikan task yang workernya mati di tengah jalan
+        conn.execute(
+            "UPDATE tasks SET status = 'queued' WHERE status = 'running' AND updated_at < ?",
+            (now - TASK_STALE_SECONDS,)
+        )
+        row = conn.execute(
+            "SELECT * FROM tasks WHERE status = 'queued' AND run_after <= ? ORDER BY id LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (now, row['id'])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def _finish(row, result=None, error=None):
+    conn = _conn()
+    now = time.time()
+    if error is None:
+        conn.execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (json.dumps(result, default=_json_default), now, row['id'])
+        )
+    elif row['attempts'] + 1 < row['max_attempts']:
+        # Retry dengan backoff eksponensial: 2, 4, 8 ... detik
+        conn.execute(
+            "UPDATE tasks SET status = 'queued', error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+            (error, now + 2 ** (row['attempts'] + 1), now, row['id'])
+        )
+    else:
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, now, row['id'])
+        )
+
+
+def is_last_attempt():
+    """Dari dalam handler: True kalau gagal sekarang berarti task 'failed' (tidak diulang lagi)"""
+    row = getattr(_local, 'row', None)
+    return row is None or row['attempts'] + 1 >= row['max_attempts']
+
+
+def run_pending(limit=None):
+    """Kerjakan task yang siap di thread ini. Return jumlah task yang dikerjakan."""
+    done = 0
+    while limit is None or done < limit:
+        row = _claim()
+        if not row:
+            break
+        handler = _handlers.get(row['name'])
+        _local.row = row
+        try:
+            if handler is None:
+                raise ValueError(f"Task '{row['name']}' tidak terdaftar")
+            result = handler(**json.loads(row['payload']))
+            _finish(row, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            _finish(row, error=f"{type(e).__name__}: {e}")
+        finally:
+            _local.row = None
+        done += 1
+    return done
+
+
+def _worker_loop(poll_interval):
+    while True:
+        try:
+            if run_pending():
+                continue
+        except Exception as e:
+            print(f"⚠️ Task worker error: {e}")
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+
+
+def start_workers(count=2, poll_interval=1.0):
+    """Jalankan worker thread di proses ini (sekali saja per proses)"""
+    with _workers_lock:
+        alive = [w for w in _workers if w.is_alive()]
+        _workers[:] = alive
+        for i in range(len(alive), count):
+            worker = threading.Thread(target=_worker_loop, args=(poll_interval,), name=f'task-worker-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def wait_for(task_ids, timeout=None, poll_interval=0.2):
+    """Blok sampai semua task selesai (dipakai CLI sebelum keluar)"""
+    deadline = time.time() + timeout if timeout else None
+    pending = set(task_ids)
+    while pending:
+        for task_id in list(pending):
+            status = get_status(task_id)
+            if not status or status['status'] in ('done', 'failed'):
+                pending.discard(task_id)
+        if pending:
+            if deadline and time.time() > deadline:
+                return False
+            time.sleep(poll_interval)
+    return True
+
+
+# ============================================
+# HANDLER: BARCODE
+# ============================================
+
+def render_barcode_data_uri(sku):
+    """Render barcode Code128 jadi data URI PNG (SVG kalau Pillow tidak ada)"""
+    return code128.png_data_uri(sku)
+
+
+@task('barcode')
+def barcode_task(skus):
+    from logic import Database
+
+    db = Database.get_conn()
+    if not db:
+        raise RuntimeError("Database tidak terhubung")
+
+    cursor = db.cursor()
+    rendered = 0
+    try:
+        for sku in skus:
+            data = render_barcode_data_uri(sku)
+            cursor.execute(
+                "UPDATE produk_biasa SET barcode_image = %s WHERE no_SKU = %s AND (barcode_image IS NULL OR barcode_image = '')",
+                (data, sku)
+            )
+            cursor.execute(
+                "UPDATE produk_lelang SET barcode_image = %s WHERE no_SKU = %s AND (barcode_image IS NULL OR barcode_image = '')",
+                (data, sku)
+            )
+            rendered += 1
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+    # Status barcode ikut ETag & cache per worker katalog (local_cache.py)
+    import events
+    events.bump('catalog')
+    return {'rendered': rendered}
+
+
+def enqueue_barcodes(skus, chunk_size=100):
+    """Masukkan SKU ke antrian barcode per chunk, return list id task"""
+    skus = list(skus)
+    return [
+        enqueue('barcode', {'skus': skus[i:i + chunk_size]})
+        for i in range(0, len(skus), chunk_size)
+    ]
+
+
+# ============================================
+# HANDLER: FOTO PROFIL
+# ============================================
+
+@task('profile_pic')
+def profile_pic_task(user_id, source_path):
+    from images import avatar_variants, process_and_save_image, remove_old_avatars
+    from logic import Database
+
+    # File upload dipertahankan sampai users.profile_pic ter-commit, supaya retry masih bisa
+    # memprosesnya; dihapus kalau ini percobaan terakhir yang gagal
+    try:
+        with open(source_path, 'rb') as f:
+            profile_pic_url = process_and_save_image(f, user_id)
+        if not profile_pic_url:
+            raise ValueError("Gagal memproses gambar")
+
+        db = Database.get_conn()
+        if not db:
+            raise RuntimeError("Database tidak terhubung")
+        cursor = db.cursor()
+        try:
+            cursor.execute("UPDATE users SET profile_pic = %s WHERE id = %s", (profile_pic_url, user_id))
+            db.commit()
+        finally:
+            cursor.close()
+            db.close()
+    except Exception:
+        if is_last_attempt() and os.path.exists(source_path):
+            os.remove(source_path)
+        raise
+
+    if os.path.exists(source_path):
+        os.remove(source_path)
+    # Varian lama baru dihapus setelah users.profile_pic menunjuk ke yang baru
+    remove_old_avatars(user_id, profile_pic_url)
+    return {'user_id': user_id, 'profile_pic': profile_pic_url, 'variants': avatar_variants(profile_pic_url)}
+
+
+# ============================================
+# HANDLER: STATISTIK DASHBOARD
+# ============================================
+
+@task('stats')
+def stats_task(period, etag=None, fresh_after=None):
+    from db_backend import statement_timeout
+    from logic import Database
+    from stats import compute_stats
+    import stats_cache
+
+    # Replica boleh dipakai asal sudah melihat versi data di etag
+    db, _ = Database.get_read_conn(fresh_after)
+    if not db:
+        raise RuntimeError("Database tidak terhubung")
+    start = time.perf_counter()
+    try:
+        # Rentang besar tanpa index tidak boleh memegang koneksi tanpa batas
+        with statement_timeout(db, 'report'):
+            result = compute_stats(db, period)
+    finally:
+        db.close()
+
+    # etag = versi data saat task di-enqueue, jadi tidak pernah lebih baru dari hasilnya
+    if etag:
+        stats_cache.store(period, etag, result, time.perf_counter() - start)
+    return result
+
+
+# ============================================
+# HANDLER: SNAPSHOT KATALOG
+# ============================================
+
+@task('catalog_snapshot')
+def catalog_snapshot_task():
+    import catalog_snapshot
+
+    return catalog_snapshot.refresh()
+
+
+if __name__ == "__main__":
+    import sys
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print(f"🔧 Menjalankan {count} task worker ({TASK_DB_PATH})")
+    start_workers(count)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("Keluar...")
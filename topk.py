@@ -0,0 +1,275 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import events
+from tasks import TASK_DB_PATH
+
+# ============================================
+# PRODUK TERLARIS REAL-TIME (SPACE-SAVING)
+# ============================================
+# Satu sketch Space-Saving per hari: maksimal TOPK_CAPACITY counter, jadi memori
+# dan waktu baca O(K) berapa pun volume transaksinya. Sketch diisi dari event
+# 'transaction' (dipublish checkout & checkout_lelang) sehingga semua worker
+# gunicorn melihat penjualan yang sama, lalu di-checkpoint ke SQLite berkala
+# supaya tetap ada setelah restart (event setelah checkpoint di-replay).
+# Sketch dibaca dari thread background (start_sync) dan saat dashboard membaca,
+# tidak pernah di jalur checkout.
+
+TOPK_CAPACITY = 100
+TOPK_RETENTION_DAYS = 31
+TOPK_CHECKPOINT_SECONDS = 60
+# Interval sync background (start_sync); harus jauh di bawah events.EVENT_RETENTION_SECONDS
+TOPK_SYNC_SECONDS = 30
+
+_local = threading.local()
+_sync_lock = threading.Lock()
+_sync_thread = None
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(TASK_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS topk_checkpoint (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_event_id INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+
+class SpaceSaving:
+    """
+    Top-K streaming (Metwally dkk.): hitungan tiap SKU bisa lebih besar dari
+    aslinya paling banyak 'error', dan SKU dengan penjualan > total/capacity
+    dijamin ada di sketch.
+    """
+
+    def __init__(self, capacity=TOPK_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        # sku -> [sold, error, revenue, name]
+        self.counters = {}
+
+    def add(self, sku, qty, revenue=0, name=None):
+        self.total += qty
+        counter = self.counters.get(sku)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[sku] = [0, 0, 0, name]
+            else:
+                # Ganti counter terkecil; hitungannya jadi batas error SKU baru
+                victim = min(self.counters, key=lambda key: self.counters[key][0])
+                floor = self.counters.pop(victim)[0]
+                counter = self.counters[sku] = [floor, floor, 0, name]
+        counter[0] += qty
+        counter[2] += revenue
+        if name:
+            counter[3] = name
+
+    def min_count(self):
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other):
+        """Gabungkan dua sketch (mis. beberapa hari jadi satu periode)"""
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        merged.total = self.total + other.total
+        # SKU yang tidak ada di salah satu sketch bisa saja terjual sampai min_count di sana
+        floors = (self.min_count(), other.min_count())
+        for sku in set(self.counters) | set(other.counters):
+            counter = [0, 0, 0, None]
+            for sketch, floor in zip((self, other), floors):
+                sold, error, revenue, name = sketch.counters.get(sku, (floor, floor, 0, None))
+                counter[0] += sold
+                counter[1] += error
+                counter[2] += revenue
+                counter[3] = counter[3] or name
+            merged.counters[sku] = counter
+        if len(merged.counters) > merged.capacity:
+            keep = sorted(merged.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:merged.capacity]
+            merged.counters = dict(keep)
+        return merged
+
+    def top(self, n):
+        best = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [
+            {'sku': sku, 'name': name or f"SKU:{sku}", 'sold': sold, 'revenue': revenue, 'error': error}
+            for sku, (sold, error, revenue, name) in best
+        ]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': self.total, 'counters': self.counters}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch.counters = {sku: list(counter) for sku, counter in data['counters'].items()}
+        return sketch
+
+
+class TopSellers:
+    """Sketch per hari + posisi baca event, aman dipakai banyak thread"""
+
+    def __init__(self):
+        self.days = {}
+        self.last_event_id = None
+        self.saved_at = 0
+        self.lock = threading.Lock()
+
+    def observe(self, trx):
+        day = str(trx['transaction_date'])[:10]
+        sketch = self.days.get(day)
+        if sketch is None:
+            sketch = self.days[day] = SpaceSaving()
+        for item in trx['items']:
+            sketch.add(str(item['sku']), item['qty'], item.get('subtotal', 0), item.get('name'))
+
+    def load_checkpoint(self):
+        row = _conn().execute("SELECT last_event_id, data FROM topk_checkpoint WHERE id = 1").fetchone()
+        if not row:
+            self.days, self.last_event_id = {}, 0
+            return
+        self.last_event_id = row[0]
+        self.days = {day: SpaceSaving.from_dict(data) for day, data in json.loads(row[1]).items()}
+
+    def save_checkpoint(self):
+        data = json.dumps({day: sketch.to_dict() for day, sketch in self.days.items()})
+        # Worker lain mungkin sudah menyimpan checkpoint yang lebih baru
+        _conn().execute(
+            "INSERT INTO topk_checkpoint (id, last_event_id, data, saved_at) VALUES (1, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET last_event_id = excluded.last_event_id, data = excluded.data, "
+            "saved_at = excluded.saved_at WHERE excluded.last_event_id > topk_checkpoint.last_event_id",
+            (self.last_event_id, data, time.time())
+        )
+        self.saved_at = time.time()
+
+    def sync(self):
+        """Baca event transaksi baru sejak sync terakhir"""
+        with self.lock:
+            if self.last_event_id is None:
+                self.load_checkpoint()
+
+            # Event lama sudah dihapus retensi: mulai lagi dari checkpoint (worker lain
+            # mungkin lebih up to date), yang kurang dari itu memang tidak bisa diulang
+            oldest = events.oldest_id()
+            if oldest and self.last_event_id < oldest - 1:
+                self.load_checkpoint()
+                if self.last_event_id < oldest - 1:
+                    print(f"⚠️ Top-K: event {self.last_event_id + 1}-{oldest - 1} sudah terhapus, dilewati")
+
+            until = events.latest_id()
+            while True:
+                rows = events.read_since(self.last_event_id, until, 'transaction')
+                for event_id, trx in rows:
+                    self.observe(trx)
+                    self.last_event_id = event_id
+                if len(rows) < 500:
+                    break
+            self.last_event_id = max(self.last_event_id, until)
+
+            cutoff = (date.today() - timedelta(days=TOPK_RETENTION_DAYS)).isoformat()
+            for day in [day for day in self.days if day < cutoff]:
+                del self.days[day]
+
+            if time.time() - self.saved_at >= TOPK_CHECKPOINT_SECONDS:
+                self.save_checkpoint()
+
+    def top(self, start_day, end_day, n=5):
+        """Top-n gabungan hari start_day..end_day (inklusif, date)"""
+        with self.lock:
+            merged = SpaceSaving()
+            day = start_day
+            while day <= end_day:
+                sketch = self.days.get(day.isoformat())
+                if sketch:
+                    merged = merged.merge(sketch)
+                day += timedelta(days=1)
+        return {'total_sold': merged.total, 'items': merged.top(n)}
+
+
+_tracker = TopSellers()
+
+
+def _sync_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            _tracker.sync()
+        except Exception as e:
+            print(f"⚠️ Top-K gagal sync: {e}")
+
+
+def start_sync(interval=TOPK_SYNC_SECONDS):
+    """
+    Sync + checkpoint berkala di thread background (sekali per proses), bukan di
+    checkout: event transaksi tetap terbaca sebelum dihapus retensi walaupun
+    dashboard jarang dibuka. top_products() juga sync sendiri saat dibaca.
+    """
+    global _sync_thread
+    with _sync_lock:
+        if _sync_thread is None or not _sync_thread.is_alive():
+            _sync_thread = threading.Thread(target=_sync_loop, args=(interval,), name='topk-sync', daemon=True)
+            _sync_thread.start()
+
+
+def top_products(period='today', n=5):
+    """Produk terlaris per period dashboard (today/week/month), O(K)"""
+    from stats import period_range
+
+    _tracker.sync()
+    start_date, end_date = period_range(period)
+    return _tracker.top(start_date.date(), end_date.date(), n)
+
+
+def rebuild(days=TOPK_RETENTION_DAYS):
+    """Bangun ulang sketch dari transaction_history (instalasi baru / checkpoint rusak)"""
+    from logic import Database
+    from stats import load_transactions
+
+    db = Database.get_conn()
+    if not db:
+        print("✗ Database tidak terhubung")
+        return False
+
+    tracker = TopSellers()
+    # Posisi event dibaca sebelum query: transaksi di sela keduanya bisa terhitung
+    # dua kali, tapi tidak ada yang terlewat (Space-Saving memang hanya melebihkan)
+    tracker.last_event_id = events.latest_id()
+    end_date = datetime.now()
+    start_date = (end_date - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        transactions = load_transactions(db, start_date, end_date)
+    finally:
+        db.close()
+
+    for t in reversed(transactions):
+        try:
+            items = json.loads(t['details'])
+        except (TypeError, ValueError):
+            continue
+        tracker.observe({'transaction_date': t['transaction_date'], 'items': items})
+
+    _conn().execute("DELETE FROM topk_checkpoint")
+    tracker.save_checkpoint()
+    print(f"✅ {len(transactions)} transaksi dimuat ke {len(tracker.days)} sketch harian")
+    print("ℹ️  Restart worker aplikasi supaya checkpoint baru dimuat")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Pemakaian: python topk.py rebuild [hari]")
+        sys.exit(1)
+    rebuild(int(sys.argv[2]) if len(sys.argv) > 2 else TOPK_RETENTION_DAYS)